@@ -4,6 +4,9 @@
 This script will create a separate SQL file for each schema, replacing:
 - DATE_OF_BIRTH with AGE_FIRST and AGE_LAST for non-admin users
 - SSN with md5("SSN"::text) as SSN_HASH for non-admin users
+
+With --summary_tables each view is instead materialized as an indexed table of the same name, refreshed for a
+submission by its grafana_refresh_<name> function when a parse finishes.
 """
 
 import argparse
@@ -57,6 +60,52 @@
 ;
 """
 
+# Drops the summary table of the same name so views and summary tables can replace each other
+drop_summary_table_template = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM pg_tables WHERE schemaname = current_schema() AND tablename = '{name}') THEN
+        DROP TABLE "{name}";
+    END IF;
+END
+$$;
+DROP FUNCTION IF EXISTS "grafana_refresh_{name}"(INTEGER[]);
+"""
+
+summary_table_template = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM pg_views WHERE schemaname = current_schema() AND viewname = '{name}') THEN
+        DROP VIEW "{name}";
+    END IF;
+END
+$$;
+DROP TABLE IF EXISTS "{name}";
+CREATE TABLE "{name}" AS {query}
+CREATE INDEX "{name}_datafile_idx" ON "{name}" (datafile_id);                -- Used by the refresh
+CREATE INDEX "{name}_submission_idx" ON "{name}" ("STT_CODE", year, quarter);
+CREATE INDEX "{name}_rpt_month_year_idx" ON "{name}" ("RPT_MONTH_YEAR");
+
+-- Replace the rows of the submissions of the datafiles with the rows of the submissions' latest versions
+CREATE OR REPLACE FUNCTION "grafana_refresh_{name}"(datafile_ids INTEGER[])
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM "{name}" WHERE datafile_id IN (
+        SELECT id FROM data_files_datafile WHERE (stt_id, program_type, section, year, quarter) IN (
+            SELECT stt_id, program_type, section, year, quarter FROM data_files_datafile WHERE id = ANY(datafile_ids)
+        )
+    );
+    INSERT INTO "{name}" {refresh_query}
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Limits the query to the submissions of the datafiles being refreshed
+refresh_where_clause = """
+        AND (data_files.stt_id, data_files.program_type, data_files.section, data_files.year, data_files.quarter) IN (
+            SELECT stt_id, program_type, section, year, quarter FROM data_files_datafile WHERE id = ANY(datafile_ids)
+        )"""
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -209,8 +258,8 @@ def handle_where_clause(record_type):
         return ""
 
 
-def main(is_admin):
-    """Generate views."""
+def main(is_admin, summary_tables=False):
+    """Generate views, or summary tables when `summary_tables` is set."""
     # Log start of script execution
     logger.info(f"Starting {'admin' if is_admin else 'user'} view generation")
 
@@ -244,11 +293,15 @@ def main(is_admin):
             for field in fields:
                 handle_field(field, formatted_fields, is_admin)
 
-            formatted_fields_str = ",".join(formatted_fields) + ","
-
             # Determine the appropriate table name based on schema type and name
             table_name, record_type = handle_table_name(schema_type, schema_name)
 
+            # Summary tables keep the datafile of each record to refresh its submission
+            if summary_tables:
+                formatted_fields.append(f"{record_type}.datafile_id")
+
+            formatted_fields_str = ",".join(formatted_fields) + ","
+
             # Handle custom where clause
             custom_where_clause = handle_where_clause(record_type)
 
@@ -277,13 +330,27 @@ def main(is_admin):
                 )
             if "SSN" in fields and not is_admin:
                 header_comment += "--   * SSN transformed to md5 hash for privacy\n"
+            if summary_tables:
+                header_comment += "--   * Materialized as a summary table, refreshed when a parse finishes\n"
 
             # Add a blank line at the end
             header_comment += "\n\n"
 
-            # Modify the query to create a view
+            # Modify the query to create a view or summary table
             view_name = f'{"admin_" if is_admin else ""}{schema_type}_{schema_name}'
-            view_query = f"""CREATE OR REPLACE VIEW "{view_name}" AS {query}"""
+            if summary_tables:
+                refresh_query = query_template.format(
+                    fields=formatted_fields_str,
+                    table=table_name,
+                    record_type=record_type,
+                    custom_where_clause=custom_where_clause + refresh_where_clause,
+                )
+                view_query = summary_table_template.format(
+                    name=view_name, query=query, refresh_query=refresh_query
+                )
+            else:
+                view_query = drop_summary_table_template.format(name=view_name)
+                view_query += f"""CREATE OR REPLACE VIEW "{view_name}" AS {query}"""
 
             # Write to a file
             output_file = os.path.join(output_dir, f"{view_name}.sql")
@@ -310,12 +377,17 @@ def main(is_admin):
         "--user_only", help="Only generate user version of views.", action="store_true"
     )
     parser.add_argument("--all", help="Generate all views.", action="store_true")
+    parser.add_argument(
+        "--summary_tables",
+        help="Generate indexed summary tables of the latest versions instead of views.",
+        action="store_true",
+    )
 
     args = parser.parse_args()
     if args.all:
-        main(True)
-        main(False)
+        main(True, args.summary_tables)
+        main(False, args.summary_tables)
     elif args.admin_only and not (args.user_only or args.all):
-        main(True)
+        main(True, args.summary_tables)
     elif args.user_only and not (args.admin_only or args.all):
-        main(False)
+        main(False, args.summary_tables)
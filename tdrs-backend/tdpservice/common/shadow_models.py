@@ -12,6 +12,7 @@ def create_shadow_model(
     module=None,
     foreign_key_overrides=None,
     exclude_fields=None,
+    indexes=None,
 ):
     """Create a managed shadow model with cloned fields from a source model."""
     foreign_key_overrides = foreign_key_overrides or {}
@@ -41,6 +42,9 @@ def create_shadow_model(
     }
     if app_label:
         meta_attrs["app_label"] = app_label
+    if indexes:
+        # Index names are global to the database, so the source model's indexes can't be cloned as they are.
+        meta_attrs["indexes"] = indexes
     attrs["Meta"] = type("Meta", (), meta_attrs)
 
     return type(name, (models.Model,), attrs)
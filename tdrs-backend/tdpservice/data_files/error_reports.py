@@ -1,20 +1,36 @@
 """Utility functions for DataFile views."""
 
 import calendar
+import tempfile
 from abc import ABC, abstractmethod
-from io import BytesIO
 
 from django.conf import settings
-from django.core.paginator import Paginator
-from django.db.models import Count, Q
+from django.db.models import Count, Max
 
 import xlsxwriter
+from xlsxwriter.utility import xl_pixel_width
 
 from tdpservice.data_files.models import DataFile
-from tdpservice.data_files.parser_error_choices import ParserErrorCategoryChoices
+from tdpservice.data_files.parser_error_choices import (
+    ParserErrorCategoryChoices,
+    ParserErrorPriorityChoices,
+)
+from tdpservice.parsers.error_priority import set_error_priorities
 from tdpservice.parsers.models import ParserError
 
 
+def get_error_set_version(datafile, parser_error_model=ParserError):
+    """Return a version identifying the datafile's current set of reportable errors.
+
+    Errors are only ever added, deleted or deprecated, each of which changes the number of non-deprecated errors or the
+    greatest error id. Reports generated for the same version are identical.
+    """
+    errors = parser_error_model.objects.filter(
+        file=datafile, deprecated=False
+    ).aggregate(count=Count("id"), last_id=Max("id"))
+    return f"{errors['count']}-{errors['last_id'] or 0}"
+
+
 class ErrorReportFactory:
     """Factory class for error report generators."""
 
@@ -36,6 +52,59 @@ def get_error_report_generator(datafile, parser_error_model=ParserError):
             raise ValueError(f"Unsupported section: {datafile.section}")
 
 
+class ColumnAutofit:
+    """Computes the column widths `Worksheet.autofit` would set from the values written to a worksheet.
+
+    Autofit isn't supported in xlsxwriter's constant memory mode because rows are flushed to disk as soon as the next
+    row is started, so the widths are tracked while the rows are written instead.
+    """
+
+    # Maximum width in pixels, `Worksheet.autofit`'s default.
+    MAX_WIDTH = 1790
+
+    def __init__(self):
+        self.pixel_widths = dict()
+
+    @staticmethod
+    def _pixel_width(value):
+        """Return the pixel width autofit uses for a value as it is written by `Worksheet.write`."""
+        if value is None or isinstance(value, bool):
+            return 0 if value is None else (31 if value else 36)
+        if isinstance(value, (int, float)):
+            return 7 * len(str(value))
+        value = str(value)
+        # Strings starting with "=" are written as formulas which autofit ignores until they're calculated.
+        if value.startswith("="):
+            return 0
+        return max(xl_pixel_width(line) for line in value.split("\n"))
+
+    @staticmethod
+    def _pixels_to_width(pixels):
+        """Convert pixels to a column width like `Worksheet._pixels_to_width`."""
+        if pixels <= 12:
+            return pixels / 12.0
+        return (pixels - 5.0) / 7.0
+
+    def add(self, col, value):
+        """Account for a value written to the column."""
+        width = self._pixel_width(value)
+        if width > self.pixel_widths.get(col, 0):
+            self.pixel_widths[col] = width
+
+    def add_row(self, first_col, values):
+        """Account for a row of values written starting at `first_col`."""
+        for col, value in enumerate(values, first_col):
+            self.add(col, value)
+
+    def apply(self, worksheet):
+        """Set the width of every column written to."""
+        max_width = min(self._pixels_to_width(self.MAX_WIDTH), 255.0)
+        for col, pixels in self.pixel_widths.items():
+            # Like Excel, autofit pads the widest value with 7 pixels.
+            width = min(self._pixels_to_width(pixels + 7), max_width)
+            worksheet.set_column(col, col, width)
+
+
 class ErrorReportBase(ABC):
     """Base class for error report generators."""
 
@@ -45,8 +114,10 @@ def __init__(self, datafile, parser_error_model=ParserError):
         self.parser_errors = parser_error_model.objects.filter(
             file=datafile, deprecated=False
         )
-        self.output = BytesIO()
-        self.workbook = xlsxwriter.Workbook(self.output)
+        # Rows are flushed to temporary files as they're written and the workbook is assembled in a temporary file,
+        # so memory use doesn't grow with the number of errors. The file is deleted once it's closed.
+        self.output = tempfile.TemporaryFile()
+        self.workbook = xlsxwriter.Workbook(self.output, {"constant_memory": True})
         self.row_generator = self.get_row_generator()
 
     @abstractmethod
@@ -84,6 +155,28 @@ def internal_names(self, fields_json):
         """Return comma separated string of internal names."""
         return ",".join([i for i in fields_json["friendly_name"].keys()])
 
+    def iterate_by_pk(self, queryset):
+        """Yield the queryset's objects ordered by primary key.
+
+        Objects are fetched in batches of `BULK_CREATE_BATCH_SIZE` using keyset pagination, i.e. each batch starts
+        after the last primary key of the previous one, so every batch is an index range scan no matter how deep into
+        the result it is.
+        """
+        batch_size = settings.BULK_CREATE_BATCH_SIZE
+        queryset = queryset.order_by("pk")
+        batch = list(queryset[:batch_size])
+        while batch:
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            batch = list(queryset.filter(pk__gt=batch[-1].pk)[:batch_size])
+
+    def close(self):
+        """Close the workbook and return the report positioned at its start."""
+        self.workbook.close()
+        self.output.seek(0)
+        return self.output
+
     def check_fields_json(self, fields_json, field_name):
         """If fields_json is None, impute field name to avoid NoneType errors."""
         if not fields_json:
@@ -103,12 +196,15 @@ def generate(self):
         worksheet = self.workbook.add_worksheet(name="Error Report")
 
         bold = self.workbook.add_format({"bold": True})
+        autofit = ColumnAutofit()
         columns = self.get_columns()
         for idx, col in enumerate(columns):
-            worksheet.write(0, idx, self.format_header(col), bold)
+            header = self.format_header(col)
+            worksheet.write(0, idx, header, bold)
+            autofit.add(idx, header)
 
         row_idx = 1
-        for error in self.parser_errors.iterator():
+        for error in self.iterate_by_pk(self.parser_errors):
             values_json = getattr(error, "values_json", {}) or {}
             ssn = values_json.get("SSN", None)
             exit_date = values_json.get("EXIT_DATE", None)
@@ -117,13 +213,12 @@ def generate(self):
             )
             row = self.row_generator(error, exit_date, ssn, fields_json)
             worksheet.write_row(row_idx, 0, row)
+            autofit.add_row(0, row)
             row_idx += 1
 
-        worksheet.autofit()
+        autofit.apply(worksheet)
 
-        self.workbook.close()
-        self.output.seek(0)
-        return self.output
+        return self.close()
 
     def get_columns(self):
         """Get the columns for header."""
@@ -166,45 +261,42 @@ def generate(self):
         self.write_readme_sheet(readme_sheet)
 
         bold = self.workbook.add_format({"bold": True})
-        self.write_prioritized_errors(prioritized_sheet, bold)
-        self.write_aggregate_errors(aggregate_sheet, bold)
+        self.write_prioritized_errors(prioritized_sheet, bold).apply(prioritized_sheet)
+        self.write_aggregate_errors(aggregate_sheet, bold).apply(aggregate_sheet)
 
         # autofit all columns except for the first one
-        prioritized_sheet.autofit()
         prioritized_sheet.set_column(0, 0, 20)
-        aggregate_sheet.autofit()
         aggregate_sheet.set_column(0, 0, 20)
 
-        self.workbook.close()
-        self.output.seek(0)
-        return self.output
+        return self.close()
 
     def write_prioritized_errors(self, worksheet, bold):
-        """Write prioritized errors to spreadsheet."""
+        """Write prioritized errors to spreadsheet and return the sheet's `ColumnAutofit`."""
+        autofit = ColumnAutofit()
         # We will write the headers in the first row, remove case_number if we are s3/s4
         columns = self.get_columns()
         for idx, col in enumerate(columns):
-            worksheet.write(0, idx, self.format_header(col), bold)
+            header = self.format_header(col)
+            worksheet.write(0, idx, header, bold)
+            autofit.add(idx, header)
 
-        paginator = Paginator(
-            self.prioritized_errors.order_by("pk"), settings.BULK_CREATE_BATCH_SIZE
-        )
         row_idx = 1
-        for page in paginator:
-            for error in page.object_list:
-                rpt_month_year = getattr(error, "rpt_month_year", None)
-                rpt_month_year = str(rpt_month_year) if rpt_month_year else ""
-                fields_json = self.check_fields_json(
-                    getattr(error, "fields_json", {}), error.field_name
-                )
-
-                worksheet.write_row(
-                    row_idx, 0, self.row_generator(error, rpt_month_year, fields_json)
-                )
-                row_idx += 1
+        for error in self.iterate_by_pk(self.prioritized_errors):
+            rpt_month_year = getattr(error, "rpt_month_year", None)
+            rpt_month_year = str(rpt_month_year) if rpt_month_year else ""
+            fields_json = self.check_fields_json(
+                getattr(error, "fields_json", {}), error.field_name
+            )
+
+            row = self.row_generator(error, rpt_month_year, fields_json)
+            worksheet.write_row(row_idx, 0, row)
+            autofit.add_row(0, row)
+            row_idx += 1
+        return autofit
 
     def write_aggregate_errors(self, worksheet, bold):
-        """Aggregate by error message and write."""
+        """Aggregate by error message, write and return the sheet's `ColumnAutofit`."""
+        autofit = ColumnAutofit()
         row, col = 0, 0
 
         # We will write the headers in the first row
@@ -219,7 +311,9 @@ def write_aggregate_errors(self, worksheet, bold):
             "number_of_occurrences",
         ]
         for idx, col in enumerate(columns):
-            worksheet.write(row, idx, self.format_header(col), bold)
+            header = self.format_header(col)
+            worksheet.write(row, idx, header, bold)
+            autofit.add(idx, header)
 
         aggregates = self.parser_errors.values(
             "rpt_month_year",
@@ -230,44 +324,36 @@ def write_aggregate_errors(self, worksheet, bold):
             "error_type",
         ).annotate(num_occurrences=Count("error_message"))
 
-        paginator = Paginator(
-            aggregates.order_by("-num_occurrences"), settings.BULK_CREATE_BATCH_SIZE
-        )
+        # The grouped rows are read through a single cursor; paginating would repeat the aggregation for every page.
         row_idx = 1
-        for page in paginator:
-            for error in page.object_list:
-                rpt_month_year = error["rpt_month_year"]
-                rpt_month_year = str(rpt_month_year) if rpt_month_year else ""
-
-                fields_json = self.check_fields_json(
-                    error["fields_json"], error["field_name"]
-                )
-
-                worksheet.write(row_idx, 0, rpt_month_year[:4])
-                worksheet.write(
-                    row_idx,
-                    1,
-                    (
-                        calendar.month_name[int(rpt_month_year[4:])]
-                        if rpt_month_year[4:]
-                        else None
-                    ),
-                )
-                worksheet.write(
-                    row_idx,
-                    2,
-                    self.format_error_msg(error["error_message"], fields_json),
-                )
-                worksheet.write(row_idx, 3, error["item_number"])
-                worksheet.write(row_idx, 4, self.friendly_names(fields_json))
-                worksheet.write(row_idx, 5, self.internal_names(fields_json))
-                worksheet.write(
-                    row_idx,
-                    6,
-                    str(ParserErrorCategoryChoices(error["error_type"]).label),
-                )
-                worksheet.write(row_idx, 7, error["num_occurrences"])
-                row_idx += 1
+        for error in aggregates.order_by("-num_occurrences").iterator(
+            chunk_size=settings.BULK_CREATE_BATCH_SIZE
+        ):
+            rpt_month_year = error["rpt_month_year"]
+            rpt_month_year = str(rpt_month_year) if rpt_month_year else ""
+
+            fields_json = self.check_fields_json(
+                error["fields_json"], error["field_name"]
+            )
+
+            row = (
+                rpt_month_year[:4],
+                (
+                    calendar.month_name[int(rpt_month_year[4:])]
+                    if rpt_month_year[4:]
+                    else None
+                ),
+                self.format_error_msg(error["error_message"], fields_json),
+                error["item_number"],
+                self.friendly_names(fields_json),
+                self.internal_names(fields_json),
+                str(ParserErrorCategoryChoices(error["error_type"]).label),
+                error["num_occurrences"],
+            )
+            worksheet.write_row(row_idx, 0, row)
+            autofit.add_row(0, row)
+            row_idx += 1
+        return autofit
 
     def write_readme_sheet(self, worksheet):
         """Write README sheet guidance."""
@@ -432,49 +518,15 @@ def __init__(self, datafile, parser_error_model=ParserError):
 
     def get_prioritized_queryset(self):
         """Generate a prioritized queryset of ParserErrors."""
-        PRIORITIZED_CAT2 = (
-            ("FAMILY_AFFILIATION", "CITIZENSHIP_STATUS", "CLOSURE_REASON"),
-        )
-        PRIORITIZED_CAT3 = (
-            ("WORK_ELIGIBLE_INDICATOR", "SSN"),
-            ("FAMILY_AFFILIATION", "CITIZENSHIP_STATUS"),
-            (
-                "AMT_FOOD_STAMP_ASSISTANCE",
-                "AMT_SUB_CC",
-                "CASH_AMOUNT",
-                "CC_AMOUNT",
-                "TRANSP_AMOUNT",
-            ),
-            ("FAMILY_AFFILIATION", "PARENT_MINOR_CHILD"),
-            ("FAMILY_AFFILIATION", "EDUCATION_LEVEL"),
-            ("FAMILY_AFFILIATION", "WORK_ELIGIBLE_INDICATOR"),
-            ("CITIZENSHIP_STATUS", "WORK_ELIGIBLE_INDICATOR"),
-            ("FUNDING_STREAM", "FAMILY_AFFILIATION", "SSN"),
-        )
+        # A single equality filter on the indexed priority column, so the errors are read with index range scans
+        # paginated on their primary key.
+        return self.parser_errors.filter(priority=ParserErrorPriorityChoices.CRITICAL)
 
-        # All cat1/4 errors
-        error_type_query = Q(error_type=ParserErrorCategoryChoices.PRE_CHECK) | Q(
-            error_type=ParserErrorCategoryChoices.CASE_CONSISTENCY
-        )
-        filtered_errors = self.parser_errors.filter(error_type_query)
-
-        for fields in PRIORITIZED_CAT2:
-            filtered_errors = filtered_errors.union(
-                self.parser_errors.filter(
-                    field_name__in=fields,
-                    error_type=ParserErrorCategoryChoices.FIELD_VALUE,
-                )
-            )
-
-        for fields in PRIORITIZED_CAT3:
-            filtered_errors = filtered_errors.union(
-                self.parser_errors.filter(
-                    fields_json__friendly_name__has_keys=fields,
-                    error_type=ParserErrorCategoryChoices.VALUE_CONSISTENCY,
-                )
-            )
-
-        return filtered_errors
+    def generate(self):
+        """Classify errors stored without a priority and generate the report."""
+        # E.g. errors written by the Go parser or before the priority column was backfilled.
+        set_error_priorities(self.parser_errors.filter(priority=None))
+        return super().generate()
 
     def get_row_generator(self):
         """Get row generator for error report."""
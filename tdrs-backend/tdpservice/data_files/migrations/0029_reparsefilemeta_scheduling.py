@@ -0,0 +1,42 @@
+# Generated by Django 5.2.14 on 2026-10-18 21:31
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Now
+
+
+def set_queued_at(apps, schema_editor):
+    """Mark the files of earlier reparses as released so the scheduler doesn't queue them again.
+
+    Earlier reparses queued all their files at once. Unfinished files still being parsed count as in flight until
+    they finish, and ones that never finished stop counting once they were started longer ago than
+    `REPARSE_FILE_WINDOW`.
+    """
+    ReparseFileMeta = apps.get_model("data_files", "ReparseFileMeta")
+    ReparseFileMeta.objects.filter(queued_at=None).update(
+        queued_at=Coalesce("started_at", Now())
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("data_files", "0028_alter_datafile_state_alter_shadowdatafile_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reparsefilemeta",
+            name="num_records_in_file",
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name="reparsefilemeta",
+            name="queued_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name="reparsefilemeta",
+            name="seconds_per_record",
+            field=models.FloatField(null=True),
+        ),
+        migrations.RunPython(set_queued_at, migrations.RunPython.noop),
+    ]
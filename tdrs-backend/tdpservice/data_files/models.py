@@ -91,6 +91,13 @@ class ReparseFileMeta(models.Model):
     num_records_created = models.PositiveIntegerField(default=0)
     cat_4_errors_generated = models.PositiveIntegerField(default=0)
 
+    # Set when the reparse scheduler releases the file to the parser.
+    queued_at = models.DateTimeField(auto_now_add=False, null=True)
+    # Lines in the file, from its last summary until the file is reparsed. Files are released smallest first.
+    num_records_in_file = models.PositiveIntegerField(null=True)
+    # Observed parse time, used to estimate when the rest of the reparse finishes.
+    seconds_per_record = models.FloatField(null=True)
+
 
 class DataFile(FileRecord):
     """Represents a version of a data file."""
@@ -13,3 +13,10 @@ class ParserErrorCategoryChoices(models.TextChoices):
     SECTION_CONSISTENCY = "5", _("Section consistency")
     HISTORICAL_CONSISTENCY = "6", _("Historical consistency")
     RECORD_PRE_CHECK = "7", _("Record pre-check")
+
+
+class ParserErrorPriorityChoices(models.IntegerChoices):
+    """Enum of ParserError priority, i.e. the error report sheet listing the error."""
+
+    CRITICAL = 1, _("Critical")
+    STANDARD = 2, _("Standard")
@@ -38,3 +38,82 @@ def file_download(self, key, path, version_id):
 
         f = open(path, "rb")
         return f
+
+
+class S3MultipartUploadFile:
+    """Writable file object uploading what is written to it to s3 in parts.
+
+    At most one part, i.e. `part_size` bytes plus the last write, is held in memory. The upload is completed when the
+    file is closed and aborted instead when the `with` block it's used in raises.
+    """
+
+    def __init__(self, client, bucket, key, part_size):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.buffer = bytearray()
+        self.parts = []
+        self.closed = False
+        self.upload_id = client.create_multipart_upload(Bucket=bucket, Key=key)[
+            "UploadId"
+        ]
+
+    def __enter__(self):
+        """Return the file."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Complete the upload, or abort it if the block raised."""
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _upload_part(self):
+        """Upload the buffered bytes as the next part."""
+        part_number = len(self.parts) + 1
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=bytes(self.buffer),
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        self.buffer.clear()
+
+    def write(self, data):
+        """Buffer the data and upload a part once `part_size` bytes are buffered."""
+        self.buffer += data
+        if len(self.buffer) >= self.part_size:
+            self._upload_part()
+        return len(data)
+
+    def flush(self):
+        """Parts are only uploaded once they're full."""
+        pass
+
+    def close(self):
+        """Upload the remaining bytes and complete the upload."""
+        if self.closed:
+            return
+        # A multipart upload needs at least one part, even if it's empty.
+        if self.buffer or not self.parts:
+            self._upload_part()
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+        self.closed = True
+
+    def abort(self):
+        """Abort the upload, discarding the uploaded parts."""
+        if self.closed:
+            return
+        self.client.abort_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+        )
+        self.closed = True
@@ -3,16 +3,23 @@
 import logging
 from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth.models import Group
+from django.core.cache import caches
 from django.db.models import Count, Q
 from django.utils import timezone
 
 from celery import shared_task
 
+from tdpservice.data_files.error_reports import (
+    ErrorReportFactory,
+    get_error_set_version,
+)
 from tdpservice.data_files.models import DataFile
 from tdpservice.data_files.submission_lifecycle import revert_reparse_request
 from tdpservice.email.helpers.data_file import send_stuck_file_email
 from tdpservice.parsers.models import DataFileSummary
+from tdpservice.scheduling.parser_task import set_error_report
 from tdpservice.search_indexes.reparse import (
     ReparseDestructiveCleanupStarted,
     clean_reparse,
@@ -131,3 +138,56 @@ def reparse_files(file_ids, original_states=None):
                     data_file.id,
                 )
         raise
+
+
+def is_error_report_current(summary, version):
+    """Return whether the summary's stored error report was generated from the error set `version`."""
+    # Reports stored before versions were recorded were generated once parsing had finished, i.e. from the final
+    # error set.
+    return bool(summary.error_report) and summary.error_report_version in (
+        None,
+        version,
+    )
+
+
+def get_error_report_cache():
+    """Return the cache shared by the web and celery workers that holds the error report locks and failures."""
+    return caches["error-reports"]
+
+
+def get_error_report_lock_key(data_file_id, version):
+    """Return the cache key of the lock held while the error report of the error set `version` is generated."""
+    return f"error_report:{data_file_id}:{version}"
+
+
+def get_error_report_failed_key(data_file_id, version):
+    """Return the cache key set when generating the error report of the error set `version` failed."""
+    return f"error_report_failed:{data_file_id}:{version}"
+
+
+@shared_task
+def generate_error_report(data_file_id):
+    """Generate and store the error report of a datafile unless the stored report is current."""
+    data_file = DataFile.objects.select_related("summary").get(id=data_file_id)
+    summary = data_file.summary
+    version = get_error_set_version(data_file)
+    cache = get_error_report_cache()
+    try:
+        if is_error_report_current(summary, version):
+            return
+
+        logger.info(f"Generating error report for datafile {data_file_id}.")
+        error_report = ErrorReportFactory.get_error_report_generator(
+            data_file
+        ).generate()
+        set_error_report(summary, error_report, version)
+    except Exception:
+        # Set before the lock is released so a poll in between doesn't queue the generation again.
+        cache.set(
+            get_error_report_failed_key(data_file_id, version),
+            True,
+            timeout=settings.ERROR_REPORT_LOCK_TIMEOUT,
+        )
+        raise
+    finally:
+        cache.delete(get_error_report_lock_key(data_file_id, version))
@@ -3,6 +3,7 @@
 import io
 import os
 
+from django.core.cache import caches
 from django.test import override_settings
 
 import openpyxl
@@ -12,14 +13,21 @@
 
 from tdpservice.core.models import FeatureFlag
 from tdpservice.data_files.enums import SubmissionState
+from tdpservice.data_files.error_reports import get_error_set_version
 from tdpservice.data_files.models import DataFile, ShadowDataFile
 from tdpservice.data_files.serializers import DataFileSerializer
 from tdpservice.data_files.submission_lifecycle import InvalidTransition
+from tdpservice.data_files.tasks import (
+    generate_error_report,
+    get_error_report_cache,
+    get_error_report_lock_key,
+)
 from tdpservice.parsers import util
 from tdpservice.parsers.factory import ParserFactory
 from tdpservice.parsers.models import ParserError
 from tdpservice.parsers.test.factories import DataFileSummaryFactory
 from tdpservice.security.models import ClamAVFileScan
+from tdpservice.settings.common import Common
 
 
 @pytest.mark.usefixtures("db")
@@ -40,6 +48,22 @@ def user(self):
         """
         raise NotImplementedError()
 
+    @pytest.fixture(autouse=True)
+    def generate_error_reports_inline(self, mocker, settings):
+        """Run queued error report generation in the request like an eager celery worker."""
+        settings.CACHES = {
+            **settings.CACHES,
+            "error-reports": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "error-reports-test",
+            },
+        }
+        get_error_report_cache().clear()
+        return mocker.patch(
+            "tdpservice.data_files.views.generate_error_report.delay",
+            side_effect=generate_error_report,
+        )
+
     @pytest.fixture
     def test_datafile(self, stt_user, stt):
         """Fixture for small_incorrect_file_cross_validator."""
@@ -505,6 +529,99 @@ def test_download_error_report_file_for_own_stt_no_fields_json(
         assert response.status_code == status.HTTP_200_OK
         self.assert_error_report_file_content_matches_without_friendly_names(response)
 
+    def test_download_error_report_pending(
+        self, api_client, test_datafile, dfs, generate_error_reports_inline
+    ):
+        """Test that the error report is queued once and polled until it is generated."""
+        dfs.datafile = test_datafile
+        dfs.save()
+        parser = ParserFactory.get_instance(
+            datafile=test_datafile,
+            dfs=dfs,
+            section=test_datafile.section,
+            program_type=test_datafile.program_type,
+        )
+        parser.parse_and_validate()
+        generate_error_reports_inline.side_effect = None
+
+        for _ in range(2):
+            response = self.download_error_report_file(api_client, test_datafile.id)
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            assert response["Retry-After"] == "5"
+        generate_error_reports_inline.assert_called_once_with(test_datafile.id)
+
+        generate_error_report(test_datafile.id)
+        response = self.download_error_report_file(api_client, test_datafile.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        self.assert_error_report_tanf_file_content_matches_with_friendly_names(response)
+
+    def test_download_error_report_failed(
+        self, api_client, test_datafile, dfs, generate_error_reports_inline, mocker
+    ):
+        """Test that a failed generation releases its lock and is reported instead of polled forever."""
+        dfs.datafile = test_datafile
+        dfs.save()
+        parser = ParserFactory.get_instance(
+            datafile=test_datafile,
+            dfs=dfs,
+            section=test_datafile.section,
+            program_type=test_datafile.program_type,
+        )
+        parser.parse_and_validate()
+        generate_error_reports_inline.side_effect = None
+        version = get_error_set_version(test_datafile)
+
+        lock_key = get_error_report_lock_key(test_datafile.id, version)
+
+        response = self.download_error_report_file(api_client, test_datafile.id)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        # The lock is taken in the cache shared with the celery workers, not the web worker's own cache.
+        assert get_error_report_cache().get(lock_key)
+        assert caches["default"].get(lock_key) is None
+
+        mocker.patch(
+            "tdpservice.data_files.tasks.ErrorReportFactory.get_error_report_generator",
+            side_effect=RuntimeError("generation failed"),
+        )
+        with pytest.raises(RuntimeError):
+            generate_error_report(test_datafile.id)
+        assert get_error_report_cache().get(lock_key) is None
+
+        response = self.download_error_report_file(api_client, test_datafile.id)
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert response.data == {"status": "failed"}
+
+        # The failure is reported once and the next download queues the generation again.
+        response = self.download_error_report_file(api_client, test_datafile.id)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert generate_error_reports_inline.call_count == 2
+
+    def test_download_error_report_regenerated_when_errors_change(
+        self, api_client, test_datafile, dfs, generate_error_reports_inline
+    ):
+        """Test that a cached error report is served until the datafile's errors change."""
+        dfs.datafile = test_datafile
+        dfs.save()
+        parser = ParserFactory.get_instance(
+            datafile=test_datafile,
+            dfs=dfs,
+            section=test_datafile.section,
+            program_type=test_datafile.program_type,
+        )
+        parser.parse_and_validate()
+
+        self.download_error_report_file(api_client, test_datafile.id)
+        response = self.download_error_report_file(api_client, test_datafile.id)
+        assert response.status_code == status.HTTP_200_OK
+        assert generate_error_reports_inline.call_count == 1
+
+        ParserError.objects.filter(file=test_datafile).first().delete()
+        response = self.download_error_report_file(api_client, test_datafile.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert generate_error_reports_inline.call_count == 2
+
     def test_download_data_file_file_rejected_for_other_stt(
         self, api_client, data_file_data, other_stt, user
     ):
@@ -1005,6 +1122,15 @@ def multi_year_data_file_data(user, stt):
     ]
 
 
+def test_error_report_cache_is_shared_between_workers():
+    """Test that error report locks and failures are kept where both the web and celery workers see them."""
+    assert get_error_report_cache() is caches["error-reports"]
+    assert (
+        Common.CACHES["error-reports"]["BACKEND"]
+        == "django.core.cache.backends.redis.RedisCache"
+    )
+
+
 @pytest.mark.django_db
 def test_list_data_file_years(api_client, data_analyst):
     """Test list of years for which there exist a data file as a data analyst."""
@@ -1,17 +1,15 @@
 """Tests for generated data file error report workbooks."""
 
-from io import BytesIO
-
 from openpyxl import load_workbook
 import pytest
+import xlsxwriter
 
-from tdpservice.data_files.error_reports import ActiveClosedErrorReport
+from tdpservice.data_files.error_reports import ActiveClosedErrorReport, ColumnAutofit
 from tdpservice.data_files.models import DataFile
 from tdpservice.data_files.test.factories import DataFileFactory
 from tdpservice.data_files.parser_error_choices import ParserErrorCategoryChoices
 from tdpservice.parsers.test.factories import ParserErrorFactory
 
-
 KNOWLEDGE_CENTER_URL = (
     "https://tdp-project-updates.app.cloud.gov/knowledge-center/"
     "viewing-error-reports.html"
@@ -40,7 +38,7 @@ def active_case_error_report_workbook():
     )
 
     output = ActiveClosedErrorReport(datafile).generate()
-    return load_workbook(BytesIO(output.getvalue()))
+    return load_workbook(output)
 
 
 @pytest.mark.django_db
@@ -166,3 +164,72 @@ def test_tanf_error_report_readme_layout_and_representative_styles(
     assert readme["B8"].border.bottom.style == "thin"
     assert readme["A5"].font.underline == "single"
     assert readme["A5"].font.color.rgb == "FF0070C0"
+
+
+@pytest.mark.django_db
+def test_critical_errors_are_paginated_by_pk(settings):
+    """Prioritized errors spanning several batches should be written once each, in primary key order."""
+    settings.BULK_CREATE_BATCH_SIZE = 3
+    datafile = DataFileFactory(
+        section=DataFile.Section.ACTIVE_CASE_DATA,
+        program_type=DataFile.ProgramType.TANF,
+    )
+    fields_json = {"friendly_name": {"SSN": "Social Security Number"}}
+    prioritized = []
+    for row_number in range(1, 11):
+        prioritized.append(
+            ParserErrorFactory(
+                file=datafile,
+                row_number=row_number,
+                error_type=ParserErrorCategoryChoices.CASE_CONSISTENCY,
+                fields_json=fields_json,
+            )
+        )
+        # Neither unprioritized nor deprecated errors are critical.
+        ParserErrorFactory(
+            file=datafile,
+            row_number=100 + row_number,
+            field_name="SSN",
+            error_type=ParserErrorCategoryChoices.FIELD_VALUE,
+            fields_json=fields_json,
+        )
+        ParserErrorFactory(
+            file=datafile,
+            row_number=200 + row_number,
+            error_type=ParserErrorCategoryChoices.PRE_CHECK,
+            fields_json=fields_json,
+            deprecated=True,
+        )
+
+    workbook = load_workbook(ActiveClosedErrorReport(datafile).generate())
+    critical = workbook["Critical"]
+
+    assert [row[7] for row in critical.iter_rows(min_row=2, values_only=True)] == [
+        error.row_number for error in prioritized
+    ]
+    assert sum(1 for _ in workbook["Summary"].iter_rows(min_row=2)) == 2
+
+
+def test_column_autofit_matches_worksheet_autofit(tmp_path):
+    """Tracked column widths should match xlsxwriter's autofit."""
+    rows = [
+        ("Case Number", "Year", "Error Message", "Row Number"),
+        ("11111127148", "2025", "A much longer error message", 42),
+        (None, "", "Two\nlines", 123456),
+    ]
+    workbook = xlsxwriter.Workbook(str(tmp_path / "report.xlsx"))
+    autofitted = workbook.add_worksheet()
+    tracked = workbook.add_worksheet()
+    autofit = ColumnAutofit()
+    for row_idx, row in enumerate(rows):
+        autofitted.write_row(row_idx, 0, row)
+        tracked.write_row(row_idx, 0, row)
+        autofit.add_row(0, row)
+
+    autofitted.autofit()
+    autofit.apply(tracked)
+
+    assert {col: info[0] for col, info in tracked.col_info.items()} == {
+        col: info[0] for col, info in autofitted.col_info.items()
+    }
+    workbook.close()
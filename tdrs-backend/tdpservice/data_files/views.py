@@ -21,7 +21,7 @@
 
 from tdpservice.core.utils import get_feature_flag
 from tdpservice.data_files.enums import SubmissionState
-from tdpservice.data_files.error_reports import ErrorReportFactory
+from tdpservice.data_files.error_reports import get_error_set_version
 from tdpservice.data_files.models import (
     DataFile,
     ReparseFileMeta,
@@ -33,10 +33,16 @@
     complete_datafile_av_scan,
     transition_datafile,
 )
+from tdpservice.data_files.tasks import (
+    generate_error_report,
+    get_error_report_cache,
+    get_error_report_failed_key,
+    get_error_report_lock_key,
+    is_error_report_current,
+)
 from tdpservice.log_handler import S3FileHandler
 from tdpservice.parsers.models import ParserError
 from tdpservice.scheduling import parser_task
-from tdpservice.scheduling.parser_task import set_error_report
 from tdpservice.security.clients import ClamAVClient
 from tdpservice.security.models import ClamAVFileScan
 from tdpservice.users.permissions import DataFilePermissions, IsApprovedPermission
@@ -355,18 +361,41 @@ def download(self, request, pk=None):
 
     @action(methods=["get"], detail=True)
     def download_error_report(self, request, pk=None):
-        """Generate and return the parsing error report xlsx."""
+        """Return the parsing error report xlsx.
+
+        Reports are generated in the background when they don't exist yet or the file's errors have changed since they
+        were generated. Until the report is ready the response is `202 Accepted` with a `Retry-After` header and the
+        client polls this endpoint again. If the generation fails the response is `500 Internal Server Error` once, and
+        the next request queues it again.
+        """
         datafile = self.get_object()
+        summary = datafile.summary
+        version = get_error_set_version(datafile)
+
+        if not is_error_report_current(summary, version):
+            cache = get_error_report_cache()
+            failed_key = get_error_report_failed_key(datafile.pk, version)
+            if cache.get(failed_key):
+                cache.delete(failed_key)
+                return Response(
+                    {"status": "failed"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
 
-        if not datafile.summary.error_report:
-            error_report_generator = ErrorReportFactory.get_error_report_generator(
-                datafile
-            )
-            error_report = error_report_generator.generate()
-            set_error_report(datafile.summary, error_report)
-            datafile = self.get_object()  # reload to get the newly added file
+            # Only one generation is queued per datafile and error set until it finishes or the lock expires.
+            lock_key = get_error_report_lock_key(datafile.pk, version)
+            if cache.add(lock_key, True, timeout=settings.ERROR_REPORT_LOCK_TIMEOUT):
+                generate_error_report.delay(datafile.pk)
+                summary.refresh_from_db()
+
+            if not is_error_report_current(summary, version):
+                return Response(
+                    {"status": "pending"},
+                    status=status.HTTP_202_ACCEPTED,
+                    headers={"Retry-After": str(settings.ERROR_REPORT_RETRY_AFTER)},
+                )
 
-        return FileResponse(datafile.summary.error_report, "report.xlsx")
+        return FileResponse(summary.error_report, "report.xlsx")
 
 
 class GetYearList(APIView):
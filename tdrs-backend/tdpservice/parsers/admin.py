@@ -14,6 +14,7 @@ class ParserErrorAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
         "row_number",
         "field_name",
         "error_type",
+        "priority",
         "error_message",
     ]
 
@@ -27,6 +28,7 @@ class ParserErrorAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
         "case_number",
         "error_message",
         "error_type",
+        "priority",
         "fields_json",
         "values_json",
     ]
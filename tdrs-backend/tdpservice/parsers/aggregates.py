@@ -1,15 +1,92 @@
 """Aggregate methods for the parsers."""
 
-from django.db.models import Q as Query
+import logging
+from collections import Counter
+
+from django.db import connections, router
+from django.db.models import Count
 
 from tdpservice.parsers.models import ParserError, ParserErrorCategoryChoices
 from tdpservice.parsers.schema_defs.utils import ProgramManager
 from tdpservice.parsers.util import (
     fiscal_to_calendar,
+    get_record_value_by_field_name,
     month_to_int,
+    open_temp_store,
     transform_to_months,
 )
 
+logger = logging.getLogger(__name__)
+
+# Errors of these types mean the row's records were not accepted.
+REJECTED_ERROR_TYPES = frozenset(
+    {
+        ParserErrorCategoryChoices.PRE_CHECK,
+        ParserErrorCategoryChoices.RECORD_PRE_CHECK,
+        ParserErrorCategoryChoices.CASE_CONSISTENCY,
+    }
+)
+
+
+def _get_case_key(rpt_month_year, case_number):
+    """Return a case's `(rpt_month_year, case_number)` with the types the values have in the database."""
+    return (
+        ParserError._meta.get_field("rpt_month_year").to_python(rpt_month_year),
+        ParserError._meta.get_field("case_number").to_python(case_number),
+    )
+
+
+def get_months(df):
+    """Return the short month names and RPT_MONTH_YEARs of the datafile's reporting period, e.g. ('Jan', 202101)."""
+    # from datafile year/quarter, generate short month names for each month in quarter ala 'Jan', 'Feb', 'Mar'
+    calendar_year, calendar_qtr = fiscal_to_calendar(df.year, df.quarter)
+    return [
+        (month, int(f"{calendar_year}{month_to_int(month)}"))
+        for month in transform_to_months(calendar_qtr)
+    ]
+
+
+def _count_cases_by_month(df, record_models, parser_error_model, rpt_month_years):
+    """Return `{rpt_month_year: (total_cases, cases_with_errors)}` for the datafile's serialized cases.
+
+    A case is a distinct `(CASE_NUMBER, RPT_MONTH_YEAR)` pair across all record models, i.e. it can span T1, T2, T3,
+    etc. A case has errors if a non-deprecated error of the file has the same case number and month. Cases are
+    counted in a single grouped query so no case numbers are loaded into memory.
+    """
+    connection = connections[router.db_for_read(parser_error_model)]
+    quote_name = connection.ops.quote_name
+
+    def column(model, name):
+        return quote_name(model._meta.get_field(name).column)
+
+    cases = []
+    params = []
+    for model in record_models:
+        cases.append(
+            f"SELECT {column(model, 'CASE_NUMBER')} AS case_number, "
+            f"{column(model, 'RPT_MONTH_YEAR')} AS rpt_month_year "
+            f"FROM {quote_name(model._meta.db_table)} "
+            f"WHERE {column(model, 'datafile')} = %s AND {column(model, 'RPT_MONTH_YEAR')} = ANY(%s)"
+        )
+        params += [df.pk, rpt_month_years]
+    # UNION removes cases repeated across record models. Cases without a case number are counted once per month and
+    # never have errors, since null never equals null.
+    sql = (
+        f"WITH cases AS ({' UNION '.join(cases)}) "
+        "SELECT cases.rpt_month_year, COUNT(*), COUNT(*) FILTER (WHERE EXISTS ("
+        f"SELECT 1 FROM {quote_name(parser_error_model._meta.db_table)} AS e "
+        f"WHERE e.{column(parser_error_model, 'file')} = %s "
+        f"AND NOT e.{column(parser_error_model, 'deprecated')} "
+        f"AND e.{column(parser_error_model, 'case_number')} = cases.case_number "
+        f"AND e.{column(parser_error_model, 'rpt_month_year')} = cases.rpt_month_year"
+        ")) FROM cases GROUP BY cases.rpt_month_year"
+    )
+    params.append(df.pk)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {rmy: (total, with_errors) for rmy, total, with_errors in cursor}
+
 
 def case_aggregates_by_month(
     df,
@@ -20,23 +97,15 @@ def case_aggregates_by_month(
 ):
     """Return case aggregates by month."""
     program_type = str(df.program_type)
-
-    # from datafile year/quarter, generate short month names for each month in quarter ala 'Jan', 'Feb', 'Mar'
-    calendar_year, calendar_qtr = fiscal_to_calendar(df.year, df.quarter)
-    month_list = transform_to_months(calendar_qtr)
+    months = get_months(df)
 
     schemas = ProgramManager.get_schemas(program_type, df.section, df.is_program_audit)
 
     aggregate_data = {"months": [], "rejected": 0}
     all_errors = parser_error_model.objects.filter(file=df, deprecated=False)
 
-    rpt_month_years = []
-    for month in month_list:
-        month_int = month_to_int(month)
-        rpt_month_years.append(int(f"{calendar_year}{month_int}"))
-
     if dfs_status == "Rejected":
-        for month in month_list:
+        for month, _ in months:
             aggregate_data["months"].append(
                 {
                     "accepted_with_errors": "N/A",
@@ -45,65 +114,27 @@ def case_aggregates_by_month(
                 }
             )
     else:
-        # Collect all unique case numbers per month across all record types (e.g. T1, T2, T3).
-        # A case can span multiple record types, so we union them into a single set per month.
-        # Only cases that were successfully parsed and saved to the model are included here.
-        case_numbers_by_month = {rmy: set() for rmy in rpt_month_years}
-        for schema in schemas.values():
-            schema = schema[0]
-            record_model = record_model_resolver(schema.model)
-            records = (
-                record_model.objects.filter(
-                    datafile=df, RPT_MONTH_YEAR__in=rpt_month_years
-                )
-                .values_list("CASE_NUMBER", "RPT_MONTH_YEAR")
-                .distinct()
+        record_models = list(
+            dict.fromkeys(
+                record_model_resolver(schema[0].model) for schema in schemas.values()
             )
-            for case_number, rmy in records:
-                case_numbers_by_month[rmy].add(case_number)
-
-        # Find which of those case numbers have errors, grouped by month.
-        # We query errors once using the full set of case numbers across all months, then
-        # bucket the results by rpt_month_year so each error is attributed to the correct month.
-        # Note: this does bring all distinct case numbers for each month into memory. If we ever get files with a huge
-        # number of cases, we could get OOM. If that happens we can move to a raw SQL query to union all the tables.
-        all_case_numbers = set().union(*case_numbers_by_month.values())
-        error_cases_by_month = {rmy: set() for rmy in rpt_month_years}
-        error_records = (
-            all_errors.filter(
-                case_number__in=all_case_numbers, rpt_month_year__in=rpt_month_years
-            )
-            .values_list("case_number", "rpt_month_year")
-            .distinct()
         )
-        for case_number, rmy in error_records:
-            error_cases_by_month[rmy].add(case_number)
-
-        # Compute per-month aggregates.
-        for month, rmy in zip(month_list, rpt_month_years):
-            total = len(case_numbers_by_month[rmy])
-            # Intersect to exclude rejected records that generated cat1/cat4 errors since they aren't serialized
-            cases_with_errors = len(
-                error_cases_by_month[rmy] & case_numbers_by_month[rmy]
-            )
-            accepted = total - cases_with_errors
+        counts_by_month = _count_cases_by_month(
+            df, record_models, parser_error_model, [rmy for _, rmy in months]
+        )
 
+        for month, rmy in months:
+            total, cases_with_errors = counts_by_month.get(rmy, (0, 0))
             aggregate_data["months"].append(
                 {
                     "month": month,
-                    "accepted_without_errors": accepted,
+                    "accepted_without_errors": total - cases_with_errors,
                     "accepted_with_errors": cases_with_errors,
                 }
             )
 
-    error_type_query = (
-        Query(error_type=ParserErrorCategoryChoices.PRE_CHECK)
-        | Query(error_type=ParserErrorCategoryChoices.RECORD_PRE_CHECK)
-        | Query(error_type=ParserErrorCategoryChoices.CASE_CONSISTENCY)
-    )
-
     aggregate_data["rejected"] = (
-        all_errors.filter(error_type_query)
+        all_errors.filter(error_type__in=REJECTED_ERROR_TYPES)
         .distinct("row_number")
         .exclude(row_number=0)
         .count()
@@ -114,30 +145,215 @@ def case_aggregates_by_month(
 
 def total_errors_by_month(df, dfs_status, *, parser_error_model=ParserError):
     """Return total errors for each month in the reporting period."""
-    calendar_year, calendar_qtr = fiscal_to_calendar(df.year, df.quarter)
-    month_list = transform_to_months(calendar_qtr)
+    months = get_months(df)
+    if dfs_status == "Rejected":
+        return {
+            "months": [{"month": month, "total_errors": "N/A"} for month, _ in months]
+        }
+
+    # One grouped count for the whole quarter; months without errors are missing from the result.
+    counts_by_month = dict(
+        parser_error_model.objects.filter(
+            file=df,
+            deprecated=False,
+            rpt_month_year__in=[rmy for _, rmy in months],
+        )
+        .order_by()
+        .values("rpt_month_year")
+        .annotate(total=Count("id"))
+        .values_list("rpt_month_year", "total")
+    )
+    return {
+        "months": [
+            {"month": month, "total_errors": counts_by_month.get(rmy, 0)}
+            for month, rmy in months
+        ]
+    }
 
-    total_errors_data = {"months": []}
 
+def fra_total_errors(df, parser_error_model=ParserError):
+    """Return total errors for the file."""
     errors = parser_error_model.objects.all().filter(file=df, deprecated=False)
+    return {"total_errors": errors.count()}
 
-    for month in month_list:
-        if dfs_status == "Rejected":
-            total_errors_data["months"].append({"month": month, "total_errors": "N/A"})
-            continue
 
-        month_int = month_to_int(month)
-        rpt_month_year = int(f"{calendar_year}{month_int}")
+class ParseAggregates:
+    """Case and error counters kept by a parser for the records and errors it writes.
 
-        error_count = errors.filter(rpt_month_year=rpt_month_year).count()
-        total_errors_data["months"].append(
-            {"month": month, "total_errors": error_count}
+    The counters mirror what `case_aggregates_by_month`, `total_errors_by_month`, `fra_total_errors` and the
+    summary status compute from the database, so summarizing a file parsed in this process needs no aggregation
+    queries. The distinct cases, cases with errors and rejected rows grow with the file, so they are kept in a
+    temporary store, see `open_temp_store`.
+    """
+
+    def __init__(self):
+        self.db = open_temp_store()
+        # Cases without a case number are stored with an empty blob, which never equals a text case number, so they
+        # are counted once per month like the database does. Cases without a month are never counted.
+        self.db.execute(
+            "CREATE TABLE cases (rpt_month_year INTEGER, case_number TEXT, "
+            "PRIMARY KEY (rpt_month_year, case_number)) WITHOUT ROWID"
+        )
+        self.db.execute(
+            "CREATE TABLE error_cases (rpt_month_year INTEGER, case_number TEXT, "
+            "PRIMARY KEY (rpt_month_year, case_number)) WITHOUT ROWID"
         )
+        self.db.execute("CREATE TABLE rejected_rows (row_number INTEGER PRIMARY KEY)")
+        # Records of a case are added one after the other, so only the first record of each case is stored.
+        self._last_case = None
+        self.clear_errors()
 
-    return total_errors_data
+    def close(self):
+        """Close the counters' temporary store."""
+        self.db.close()
 
+    def __del__(self):
+        """Close the counters' temporary store when destructed."""
+        try:
+            self.close()
+        except Exception:
+            logger.exception(
+                "Encountered exception while closing the parse aggregates."
+            )
 
-def fra_total_errors(df, parser_error_model=ParserError):
-    """Return total errors for the file."""
-    errors = parser_error_model.objects.all().filter(file=df, deprecated=False)
-    return {"total_errors": errors.count()}
+    @staticmethod
+    def _get_stored_case_key(rpt_month_year, case_number):
+        """Return the key a case is stored with, None for cases without a month."""
+        rpt_month_year, case_number = _get_case_key(rpt_month_year, case_number)
+        if rpt_month_year is None:
+            return None
+        return (rpt_month_year, b"" if case_number is None else case_number)
+
+    def add_record(self, record):
+        """Count the case of a record that will be serialized."""
+        case = self._get_stored_case_key(
+            get_record_value_by_field_name(record, "RPT_MONTH_YEAR"),
+            get_record_value_by_field_name(record, "CASE_NUMBER"),
+        )
+        if case is None or case == self._last_case:
+            return
+        self._last_case = case
+        self.db.execute("INSERT OR IGNORE INTO cases VALUES (?, ?)", case)
+
+    def remove_cases(self, case_ids):
+        """Stop counting cases whose records were deleted."""
+        self._last_case = None
+        cases = (
+            self._get_stored_case_key(
+                case_id.get("RPT_MONTH_YEAR"), case_id["CASE_NUMBER"]
+            )
+            for case_id in case_ids
+            if "CASE_NUMBER" in case_id
+        )
+        self.db.executemany(
+            "DELETE FROM cases WHERE rpt_month_year = ? AND case_number = ?",
+            (case for case in cases if case is not None),
+        )
+
+    def clear_records(self):
+        """Stop counting all cases, e.g. when the created records are rolled back."""
+        self._last_case = None
+        self.db.execute("DELETE FROM cases")
+
+    def add_errors(self, errors):
+        """Count written errors."""
+        error_cases = []
+        rejected_rows = []
+        for error in errors:
+            if error.deprecated:
+                continue
+            rpt_month_year, case_number = _get_case_key(
+                error.rpt_month_year, error.case_number
+            )
+            self.num_errors += 1
+            self.error_type_counts[error.error_type] += 1
+            self.errors_by_month[rpt_month_year] += 1
+            # Like SQL, errors without a case number or month never match a case.
+            if case_number is not None and rpt_month_year is not None:
+                error_cases.append((rpt_month_year, case_number))
+            if error.error_type in REJECTED_ERROR_TYPES and error.row_number != 0:
+                rejected_rows.append((error.row_number,))
+        self.db.executemany(
+            "INSERT OR IGNORE INTO error_cases VALUES (?, ?)", error_cases
+        )
+        self.db.executemany(
+            "INSERT OR IGNORE INTO rejected_rows VALUES (?)", rejected_rows
+        )
+
+    def clear_errors(self):
+        """Stop counting all errors, e.g. when the created errors are rolled back."""
+        self.num_errors = 0
+        self.error_type_counts = Counter()
+        self.errors_by_month = Counter()
+        self.db.execute("DELETE FROM error_cases")
+        self.db.execute("DELETE FROM rejected_rows")
+
+    def get_error_counts(self):
+        """Return the error counts used to determine a summary's status."""
+        return {
+            "total": self.num_errors,
+            "precheck": self.error_type_counts[ParserErrorCategoryChoices.PRE_CHECK],
+            "record_precheck": self.error_type_counts[
+                ParserErrorCategoryChoices.RECORD_PRE_CHECK
+            ],
+            "case_consistency": self.error_type_counts[
+                ParserErrorCategoryChoices.CASE_CONSISTENCY
+            ],
+        }
+
+    def case_aggregates_by_month(self, df, dfs_status):
+        """Return case aggregates by month."""
+        (num_rejected,) = self.db.execute(
+            "SELECT COUNT(*) FROM rejected_rows"
+        ).fetchone()
+        aggregate_data = {"months": [], "rejected": num_rejected}
+        if dfs_status == "Rejected":
+            for month, _ in get_months(df):
+                aggregate_data["months"].append(
+                    {
+                        "accepted_with_errors": "N/A",
+                        "accepted_without_errors": "N/A",
+                        "month": month,
+                    }
+                )
+            return aggregate_data
+
+        totals = dict(
+            self.db.execute(
+                "SELECT rpt_month_year, COUNT(*) FROM cases GROUP BY rpt_month_year"
+            )
+        )
+        with_errors = dict(
+            self.db.execute(
+                "SELECT rpt_month_year, COUNT(*) FROM cases "
+                "JOIN error_cases USING (rpt_month_year, case_number) GROUP BY rpt_month_year"
+            )
+        )
+        for month, rmy in get_months(df):
+            aggregate_data["months"].append(
+                {
+                    "month": month,
+                    "accepted_without_errors": totals.get(rmy, 0)
+                    - with_errors.get(rmy, 0),
+                    "accepted_with_errors": with_errors.get(rmy, 0),
+                }
+            )
+        return aggregate_data
+
+    def total_errors_by_month(self, df, dfs_status):
+        """Return total errors for each month in the reporting period."""
+        return {
+            "months": [
+                {
+                    "month": month,
+                    "total_errors": (
+                        "N/A" if dfs_status == "Rejected" else self.errors_by_month[rmy]
+                    ),
+                }
+                for month, rmy in get_months(df)
+            ]
+        }
+
+    def fra_total_errors(self):
+        """Return total errors for the file."""
+        return {"total_errors": self.num_errors}
@@ -1,5 +1,6 @@
 """Class definition for Category Four validator."""
 
+import itertools
 import logging
 import warnings
 from datetime import datetime
@@ -7,10 +8,19 @@
 from django.conf import settings
 
 from tdpservice.data_files.models import DataFile
+from tdpservice.parsers.constants import (
+    INVALID_SSN_AREA_NUMBERS,
+    INVALID_SSN_GROUP_NUMBERS,
+    INVALID_SSN_SERIAL_NUMBERS,
+    SSN_AREA_NUMBER_POSITION,
+    SSN_GROUP_NUMBER_POSITION,
+    SSN_SERIAL_NUMBER_POSITION,
+)
 from tdpservice.parsers.dataclasses import ValidationErrorArgs
 from tdpservice.parsers.error_generator import ErrorGeneratorArgs
 from tdpservice.parsers.schema_defs.utils import ProgramManager
 from tdpservice.parsers.util import FrozenDict
+from tdpservice.parsers.validators import category2
 from tdpservice.parsers.validators.category3 import format_error_context
 from tdpservice.stts.models import STT
 
@@ -19,6 +29,29 @@
 logger = logging.getLogger(__name__)
 
 
+def get_funded_ssn_validator():
+    """Return the validator for the SSN of a federally funded recipient."""
+    return category2.ssnAllOf(
+        category2.isNumber(),
+        category2.intHasLength(9),
+        *[
+            category2.valueNotAt(SSN_AREA_NUMBER_POSITION, area_num)
+            for area_num in INVALID_SSN_AREA_NUMBERS
+        ],
+        *[
+            category2.valueNotAt(SSN_GROUP_NUMBER_POSITION, group_num)
+            for group_num in INVALID_SSN_GROUP_NUMBERS
+        ],
+        *[
+            category2.valueNotAt(SSN_SERIAL_NUMBER_POSITION, serial_num)
+            for serial_num in INVALID_SSN_SERIAL_NUMBERS
+        ],
+        error_message=(
+            "Federally funded recipients must have a valid Social Security number."
+        ),
+    )
+
+
 class CaseConsistencyValidator:
     """Caches records of the same case and month to perform category four validation while actively parsing."""
 
@@ -30,9 +63,11 @@ def __init__(self, header, program_type, stt_type, generate_error):
         # linearly with the number of records in the file because the validator never encounters a new/different case
         # number. Therefore, it continues storing records for the case, never validates until the very end, and could
         # cause an OOM error. To remedy this, we know that a valid case will never have more than X records in it. Thus,
-        # if we breach X records in the case, we indicate a failure and remove the whole case from the DB.
+        # if we breach X records in the case, we indicate a failure and remove the whole case from the DB. The rest of
+        # a rejected case is never cached, so no more than X records are ever held.
         self.sorted_cases = dict()
         self.num_records_in_case = 0
+        self.case_is_rejected = False
         ######
 
         self.current_rpt_month_year = None
@@ -52,10 +87,31 @@ def __init__(self, header, program_type, stt_type, generate_error):
         self.s2s = None
         self.num_errors = 0
 
+        # Models and error messages only depend on the program type, section and schema, so they're resolved once.
+        self.models = dict()
+        self.messages = dict()
+
+        # The SSNs of recipients in programs with T1 and T2 records are validated while their case is cached. Whether
+        # a case is federally funded depends on every T1 with its CASE_NUMBER in the file, so failures are kept until
+        # the file is parsed.
+        section_schemas = ProgramManager.get_schemas(self.program_type, self.section) or {}
+        self.funded_ssn_validator = (
+            get_funded_ssn_validator()
+            if self.section == "A" and {"T1", "T2"} <= section_schemas.keys()
+            else None
+        )
+        self.funded_cases = set()
+        self.invalid_funded_ssns = list()
+
     def __get_model(self, model_str):
         """Return a model for the current program type/section given the model"s string name."""
-        schemas = ProgramManager.get_schema(self.program_type, self.section, model_str)
-        return schemas[0].model
+        model = self.models.get(model_str)
+        if model is None:
+            schemas = ProgramManager.get_schema(
+                self.program_type, self.section, model_str
+            )
+            model = self.models[model_str] = schemas[0].model
+        return model
 
     def __get_error_context(self, field_name, schema):
         if schema is None:
@@ -69,6 +125,24 @@ def __get_error_context(self, field_name, schema):
         )
         return format_error_context(error_args)
 
+    def __get_message(self, key, build_message):
+        """Return the error message cached under `key`, building it with `build_message` the first time."""
+        message = self.messages.get(key)
+        if message is None:
+            message = self.messages[key] = build_message()
+        return message
+
+    def __get_related_records_msg(self, schema, model_name, related_model_names):
+        """Return the error message for a record of `schema` without a related record in its case."""
+        return self.__get_message(
+            ("related_records", schema, model_name, related_model_names),
+            lambda: (
+                f"Every {model_name} record should have at least one corresponding {related_model_names} "
+                f"record with the same {self.__get_error_context('RPT_MONTH_YEAR', schema)} and "
+                f"{self.__get_error_context('CASE_NUMBER', schema)}."
+            ),
+        )
+
     def __generate_and_add_error(self, schema, record, line_num, msg, deprecated=False):
         """Generate a ParserError and add it to the `generated_errors` list."""
         generator_args = ErrorGeneratorArgs(
@@ -142,6 +216,10 @@ def add_record(self, record, schema, line_number, case_has_errors):
                 self.has_validated = False
                 case_id_to_remove = self.current_case_id
                 self.num_records_in_case = 0
+                self.case_is_rejected = False
+            elif self.case_is_rejected:
+                # The whole case is removed already, the rest of its records are neither cached nor validated.
+                return False, case_id_to_remove, current_case_id
             else:
                 self.case_has_errors = (
                     self.case_has_errors if self.case_has_errors else case_has_errors
@@ -161,8 +239,9 @@ def add_record(self, record, schema, line_number, case_has_errors):
                             "associated with this case have been rejected."
                         ),
                     )
-                    self.clear_structs((record, schema, line_number))
+                    self.clear_structs()
                     self.num_records_in_case = 0
+                    self.case_is_rejected = True
                     return True, self.current_case_id, current_case_id
 
         self.current_case_id = current_case_id
@@ -203,6 +282,8 @@ def __validate(self):
 
     def __validate_section1(self):
         """Perform TANF Section 1 category four validation on all cached records."""
+        if self.funded_ssn_validator is not None:
+            self.__validate_funded_ssns()
         self.__validate_s1_records_are_related()
 
     def __validate_section2(self):
@@ -215,8 +296,10 @@ def __has_family_affil(self, records, passed):
         context = ""
         is_records = len(records) > 0
         if is_records and not passed:
-            context = (
-                self.__get_error_context("FAMILY_AFFILIATION", records[0][1]) + "==1"
+            schema = records[0][1]
+            context = self.__get_message(
+                ("family_affiliation", schema),
+                lambda: self.__get_error_context("FAMILY_AFFILIATION", schema) + "==1",
             )
             for record, schema, line_num in records:
                 family_affiliation = getattr(record, "FAMILY_AFFILIATION")
@@ -247,18 +330,68 @@ def __validate_family_affiliation(
 
         if not passed:
             for record, schema, line_num in t1s:
-                rpt_context = (
-                    f"{self.__get_error_context('RPT_MONTH_YEAR', schema)} and "
-                )
-                case_context = (
-                    f"{self.__get_error_context('CASE_NUMBER', schema)}, where "
+                case_context = self.__get_message(
+                    ("same_case_where", schema),
+                    lambda: (
+                        f"{self.__get_error_context('RPT_MONTH_YEAR', schema)} and "
+                        f"{self.__get_error_context('CASE_NUMBER', schema)}, where "
+                    ),
                 )
-                error_msg += rpt_context + case_context + final_context
+                error_msg += case_context + final_context
                 self.__generate_and_add_error(
                     schema, record, line_num=line_num, msg=error_msg
                 )
                 self.num_errors += 1
 
+    def __validate_funded_ssns(self):
+        """Track whether the case is federally funded and keep the T2 records with an invalid SSN.
+
+        Not a category four failure, the errors are generated by `get_invalid_funded_ssns` once the file is parsed.
+        """
+        # Records are picked by record type rather than model so program audit files are checked too.
+        cached_records = itertools.chain.from_iterable(self.sorted_cases.values())
+        for record, schema, line_num in cached_records:
+            if schema.record_type == "T1":
+                if getattr(record, "FUNDING_STREAM", None) == 1:
+                    self.funded_cases.add(self._get_case_id(record))
+                continue
+
+            ssn = getattr(record, "SSN", None)
+            if (
+                schema.record_type != "T2"
+                or getattr(record, "FAMILY_AFFILIATION", None) != 1
+                or not ssn
+            ):
+                continue
+            field = schema.get_field_by_name("SSN")
+            eargs = ValidationErrorArgs(
+                value=ssn,
+                row_schema=schema,
+                friendly_name=field.friendly_name,
+                item_num=field.item,
+            )
+            result = self.funded_ssn_validator(ssn, eargs)
+            if not result.valid:
+                self.invalid_funded_ssns.append((record, schema, result))
+
+    def get_invalid_funded_ssns(self, removed_cases):
+        """Return the (record, schema, result) of every federally funded recipient with an invalid SSN.
+
+        A recipient is federally funded if any T1 with the same CASE_NUMBER has FUNDING_STREAM == 1, whatever the
+        RPT_MONTH_YEAR. Records of the removed cases are never stored, so they neither count nor get errors.
+        """
+        funded_case_numbers = {
+            case["CASE_NUMBER"]
+            for case in self.funded_cases
+            if case not in removed_cases and case["CASE_NUMBER"] is not None
+        }
+        return [
+            (record, schema, result)
+            for record, schema, result in self.invalid_funded_ssns
+            if record.CASE_NUMBER in funded_case_numbers
+            and self._get_case_id(record) not in removed_cases
+        ]
+
     def __get_s1_triplets_and_names(self):
         if self.s1s is None:
             t1_model_name = "M1" if self.is_ssp else "T1"
@@ -309,11 +442,8 @@ def __validate_s1_records_are_related(self):
                         schema,
                         record,
                         line_num=line_num,
-                        msg=(
-                            f"Every {t1_model_name} record should have at least one "
-                            f"corresponding {t2_model_name} or {t3_model_name} record "
-                            f"with the same {self.__get_error_context('RPT_MONTH_YEAR', schema)} and "
-                            f"{self.__get_error_context('CASE_NUMBER', schema)}."
+                        msg=self.__get_related_records_msg(
+                            schema, t1_model_name, f"{t2_model_name} or {t3_model_name}"
                         ),
                     )
                     self.num_errors += 1
@@ -338,10 +468,8 @@ def __validate_s1_records_are_related(self):
                     schema,
                     record,
                     line_num=line_num,
-                    msg=(
-                        f"Every {t2_model_name} record should have at least one corresponding "
-                        f"{t1_model_name} record with the same {self.__get_error_context('RPT_MONTH_YEAR', schema)} "
-                        f"and {self.__get_error_context('CASE_NUMBER', schema)}."
+                    msg=self.__get_related_records_msg(
+                        schema, t2_model_name, t1_model_name
                     ),
                 )
                 self.num_errors += 1
@@ -351,10 +479,8 @@ def __validate_s1_records_are_related(self):
                     schema,
                     record,
                     line_num=line_num,
-                    msg=(
-                        f"Every {t3_model_name} record should have at least one corresponding "
-                        f"{t1_model_name} record with the same {self.__get_error_context('RPT_MONTH_YEAR', schema)} "
-                        f"and {self.__get_error_context('CASE_NUMBER', schema)}."
+                    msg=self.__get_related_records_msg(
+                        schema, t3_model_name, t1_model_name
                     ),
                 )
                 self.num_errors += 1
@@ -437,27 +563,36 @@ def __validate_s2_records_are_related(self):
                 t4_record, t4_schema, line_num = t4
                 closure_reason = getattr(t4_record, "CLOSURE_REASON")
 
+                t5_schema = t5s[0][1] if t5s else None
+
                 if closure_reason == "01":
                     self.__validate_case_closure_employment(
                         t4,
                         t5s,
-                        (
-                            f"At least one person on the case must have "
-                            f"{self.__get_error_context('EMPLOYMENT_STATUS', t5s[0][1] if t5s else None)} = 1:"
-                            f"Yes in the same {self.__get_error_context('RPT_MONTH_YEAR', t4_schema)} since "
-                            f"{self.__get_error_context('CLOSURE_REASON', t4_schema)} = 1:Employment/excess earnings."
+                        self.__get_message(
+                            ("closure_employment", t4_schema, t5_schema),
+                            lambda: (
+                                f"At least one person on the case must have "
+                                f"{self.__get_error_context('EMPLOYMENT_STATUS', t5_schema)} = 1:"
+                                f"Yes in the same {self.__get_error_context('RPT_MONTH_YEAR', t4_schema)} since "
+                                f"{self.__get_error_context('CLOSURE_REASON', t4_schema)} = 1:Employment/excess "
+                                "earnings."
+                            ),
                         ),
                     )
                 elif closure_reason == "03" and not self.is_ssp:
                     self.__validate_case_closure_ftl(
                         t4,
                         t5s,
-                        (
-                            "At least one person who is head-of-household or "
-                            "spouse of head-of-household on case must have "
-                            f"{self.__get_error_context('COUNTABLE_MONTH_FED_TIME', t5s[0][1] if t5s else None)} >= 60 "
-                            f"since {self.__get_error_context('CLOSURE_REASON', t4_schema)} = 03: "
-                            "federal 5 year time limit."
+                        self.__get_message(
+                            ("closure_ftl", t4_schema, t5_schema),
+                            lambda: (
+                                "At least one person who is head-of-household or "
+                                "spouse of head-of-household on case must have "
+                                f"{self.__get_error_context('COUNTABLE_MONTH_FED_TIME', t5_schema)} >= 60 "
+                                f"since {self.__get_error_context('CLOSURE_REASON', t4_schema)} = 03: "
+                                "federal 5 year time limit."
+                            ),
                         ),
                     )
             if len(t5s) == 0:
@@ -466,10 +601,8 @@ def __validate_s2_records_are_related(self):
                         schema,
                         record,
                         line_num=line_num,
-                        msg=(
-                            f"Every {t4_model_name} record should have at least one corresponding "
-                            f"{t5_model_name} record with the same {self.__get_error_context('RPT_MONTH_YEAR', schema)}"
-                            f" and {self.__get_error_context('CASE_NUMBER', schema)}."
+                        msg=self.__get_related_records_msg(
+                            schema, t4_model_name, t5_model_name
                         ),
                     )
                     self.num_errors += 1
@@ -482,10 +615,8 @@ def __validate_s2_records_are_related(self):
                     schema,
                     record,
                     line_num=line_num,
-                    msg=(
-                        f"Every {t5_model_name} record should have at least one corresponding "
-                        f"{t4_model_name} record with the same {self.__get_error_context('RPT_MONTH_YEAR', schema)} "
-                        f"and {self.__get_error_context('CASE_NUMBER', schema)}."
+                    msg=self.__get_related_records_msg(
+                        schema, t5_model_name, t4_model_name
                     ),
                 )
                 self.num_errors += 1
@@ -505,14 +636,16 @@ def __validate_t5_atd_and_ssi(self):
         is_state = self.stt_type == STT.EntityType.STATE
         is_territory = self.stt_type == STT.EntityType.TERRITORY
 
+        rpt_date = None
         for record, schema, line_num in t5s:
             rec_atd = getattr(record, "REC_AID_TOTALLY_DISABLED")
             rec_ssi = getattr(record, "REC_SSI")
             family_affiliation = getattr(record, "FAMILY_AFFILIATION")
             dob = getattr(record, "DATE_OF_BIRTH")
 
-            rpt_month_year_dd = f"{self.current_rpt_month_year}01"
-            rpt_date = datetime.strptime(rpt_month_year_dd, "%Y%m%d")
+            if rpt_date is None:
+                rpt_month_year_dd = f"{self.current_rpt_month_year}01"
+                rpt_date = datetime.strptime(rpt_month_year_dd, "%Y%m%d")
             dob_date = datetime.strptime(dob, "%Y%m%d")
             is_adult = get_years_apart(rpt_date, dob_date) >= 19
 
@@ -521,9 +654,12 @@ def __validate_t5_atd_and_ssi(self):
                     schema,
                     record,
                     line_num=line_num,
-                    msg=(
-                        f"{t5_model_name} Adults in territories must have a valid "
-                        f"value for {self.__get_error_context('REC_AID_TOTALLY_DISABLED', schema)}."
+                    msg=self.__get_message(
+                        ("territory_adult_atd", schema),
+                        lambda: (
+                            f"{t5_model_name} Adults in territories must have a valid "
+                            f"value for {self.__get_error_context('REC_AID_TOTALLY_DISABLED', schema)}."
+                        ),
                     ),
                     deprecated=True,
                 )
@@ -532,9 +668,12 @@ def __validate_t5_atd_and_ssi(self):
                     schema,
                     record,
                     line_num=line_num,
-                    msg=(
-                        f"{t5_model_name} People in states should not have a value "
-                        f"of 1 for {self.__get_error_context('REC_AID_TOTALLY_DISABLED', schema)}."
+                    msg=self.__get_message(
+                        ("state_atd", schema),
+                        lambda: (
+                            f"{t5_model_name} People in states should not have a value "
+                            f"of 1 for {self.__get_error_context('REC_AID_TOTALLY_DISABLED', schema)}."
+                        ),
                     ),
                     deprecated=True,
                 )
@@ -544,9 +683,12 @@ def __validate_t5_atd_and_ssi(self):
                     schema,
                     record,
                     line_num=line_num,
-                    msg=(
-                        f"{t5_model_name} People in territories must have value = 2:No for "
-                        f"{self.__get_error_context('REC_SSI', schema)}."
+                    msg=self.__get_message(
+                        ("territory_ssi", schema),
+                        lambda: (
+                            f"{t5_model_name} People in territories must have value = 2:No for "
+                            f"{self.__get_error_context('REC_SSI', schema)}."
+                        ),
                     ),
                     deprecated=True,
                 )
@@ -555,9 +697,12 @@ def __validate_t5_atd_and_ssi(self):
                     schema,
                     record,
                     line_num=line_num,
-                    msg=(
-                        f"{t5_model_name} People in states must have a valid value for "
-                        f"{self.__get_error_context('REC_SSI', schema)}."
+                    msg=self.__get_message(
+                        ("state_ssi", schema),
+                        lambda: (
+                            f"{t5_model_name} People in states must have a valid value for "
+                            f"{self.__get_error_context('REC_SSI', schema)}."
+                        ),
                     ),
                     deprecated=True,
                 )
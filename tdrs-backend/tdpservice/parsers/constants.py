@@ -4,6 +4,8 @@
 
 HEADER_POSITION = Position(0, 6)
 TRAILER_POSITION = Position(0, 7)
+# RPT_MONTH_YEAR and CASE_NUMBER of TANF/SSP/Tribal records.
+CASE_ID_POSITION = Position(2, 19)
 
 SSN_AREA_NUMBER_POSITION = slice(0, 3)
 SSN_GROUP_NUMBER_POSITION = slice(3, 5)
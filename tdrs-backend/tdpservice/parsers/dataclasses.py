@@ -99,6 +99,39 @@ def __ne__(self, value):
         return not self.__eq__(value)
 
 
+class BufferRow(RawRow):
+    """Row referencing a line of an ASCII encoded buffer, e.g. a memory mapped file.
+
+    Nothing is decoded up front. `value_at` only decodes the bytes of the requested position and `data` decodes the
+    whole line the first time it is accessed.
+    """
+
+    def __init__(self, buffer, start, end, raw_len, row_num, record_type):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self.raw_len = raw_len
+        self.decoded_len = end - start
+        self.row_num = row_num
+        self.record_type = record_type
+        self._data = None
+
+    @property
+    def data(self):
+        """Return the decoded line."""
+        if self._data is None:
+            self._data = self.buffer[self.start : self.end].decode()
+        return self._data
+
+    def value_at(self, position: Position):
+        """Get value at position, decoding only the bytes it covers."""
+        if self._data is not None:
+            return self._data[position.start : position.end]
+        start = self.start + min(position.start, self.decoded_len)
+        end = self.start + min(position.end, self.decoded_len)
+        return self.buffer[start:end].decode()
+
+
 @dataclass(eq=False)
 class TupleRow(RawRow):
     """Row class for Tuple based raw data."""
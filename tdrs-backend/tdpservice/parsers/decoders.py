@@ -1,19 +1,29 @@
 """Decoder and utility classes."""
 
+import codecs
 import csv
+import io
+import itertools
 import logging
+import mmap
 import os
+import re
+import tempfile
 from abc import ABC, abstractmethod
 from enum import IntEnum, auto
 
 import chardet
 import puremagic
+from django.conf import settings
 from openpyxl import load_workbook
 
-from tdpservice.parsers.dataclasses import RawRow, TupleRow
+from tdpservice.parsers.constants import HEADER_POSITION, TRAILER_POSITION
+from tdpservice.parsers.dataclasses import BufferRow, Position, RawRow, TupleRow
 
 logger = logging.getLogger(__name__)
 
+RECORD_TYPE_POSITION = Position(0, 2)
+
 
 class Decoder(IntEnum):
     """Enum class for decoder types."""
@@ -91,24 +101,152 @@ def decode(self):
             )
 
 
-class CsvDecoder(BaseDecoder):
-    """Decoder for csv files."""
+class MmapUtf8Decoder(Utf8Decoder):
+    """Decoder for UTF-8 files that memory maps the file instead of reading and decoding it line by line.
+
+    Line boundaries are found with a single regex scan over the mapped file using the same universal newlines as
+    iterating over a Django `File`. ASCII files, i.e. virtually every TANF/SSP/Tribal submission, yield `BufferRow`s
+    which only decode the substrings that are accessed.
+    """
+
+    LINE_ENDING = re.compile(rb"\r\n?|\n")
+    ASCII_CHECK_CHUNK_SIZE = 1024 * 1024
 
     def __init__(self, raw_file):
         super().__init__(raw_file)
-        self.local_file = None
-        self.csv_file = None
-        self._open_as_csv()
+        self._local_file = None
+        self.buffer = self._map_file()
+        self.is_ascii = all(
+            self.buffer[i : i + self.ASCII_CHECK_CHUNK_SIZE].isascii()
+            for i in range(0, len(self.buffer), self.ASCII_CHECK_CHUNK_SIZE)
+        )
+
+    def _get_fileno(self):
+        """Return a file descriptor holding the complete file or None if the file isn't backed by one."""
+        try:
+            fileno = self.raw_file.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return None
+        # Storage backends may spool the file to disk lazily, make sure everything has been written.
+        if os.fstat(fileno).st_size != len(self.raw_file):
+            return None
+        return fileno
+
+    def _map_file(self):
+        """Memory map the file, or a local temporary copy if it isn't backed by a file descriptor."""
+        if not len(self.raw_file):
+            return b""
+
+        fileno = self._get_fileno()
+        if fileno is None:
+            self._local_file = tempfile.TemporaryFile()
+            for chunk in self.raw_file.chunks():
+                self._local_file.write(chunk)
+            self._local_file.flush()
+            fileno = self._local_file.fileno()
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+    def get_header(self):
+        """Get the first line in the file. Assumed to be the header."""
+        end = self.buffer.find(b"\n")
+        end = len(self.buffer) if end == -1 else end + 1
+        raw_data = self.buffer[:end].decode().strip()
+        return RawRow(
+            data=raw_data,
+            raw_len=len(raw_data),
+            decoded_len=len(raw_data),
+            row_num=self.current_row_num,
+            record_type="HEADER",
+        )
+
+    def _make_row(self, start, end, raw_len):
+        """Return the row for the line spanning `start` to `end` in the buffer."""
+        if self.is_ascii:
+            row = BufferRow(
+                self.buffer, start, end, raw_len, self.current_row_num, None
+            )
+            row.record_type = self.get_record_type(row)
+            return row
+
+        raw_data = self.buffer[start:end].decode()
+        return RawRow(
+            data=raw_data,
+            raw_len=raw_len,
+            decoded_len=len(raw_data),
+            row_num=self.current_row_num,
+            record_type=self.get_record_type(raw_data),
+        )
+
+    def get_record_type(self, raw_data):
+        """Get the record type based on the raw data."""
+        if isinstance(raw_data, BufferRow):
+            if raw_data.value_at(HEADER_POSITION) == "HEADER":
+                return "HEADER"
+            elif raw_data.value_at(TRAILER_POSITION) == "TRAILER":
+                return "TRAILER"
+            return raw_data.value_at(RECORD_TYPE_POSITION)
+        return super().get_record_type(raw_data)
+
+    def decode(self):
+        """Decode and yield each row."""
+        start = 0
+        for line_ending in self.LINE_ENDING.finditer(self.buffer):
+            self.current_row_num += 1
+            end = line_ending.end()
+            yield self._make_row(start, line_ending.start(), end - start)
+            start = end
+
+        if start < len(self.buffer):
+            self.current_row_num += 1
+            yield self._make_row(start, len(self.buffer), len(self.buffer) - start)
 
-    def _open_as_csv(self):
-        """Read binary csv to local storage and reopen in text mode."""
-        name = self.raw_file.name.split("/")[-1]
-        with open(f"/tmp/{name}", "wb") as file:
-            for line in self.raw_file:
-                file.write(line)
+    def close(self):
+        """Unmap the file and delete its local copy, if any."""
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        if self._local_file is not None:
+            self._local_file.close()
 
-        self.local_file = open(f"/tmp/{name}", "rt")
-        self.csv_file = csv.reader(self.local_file)
+    def __del__(self):
+        """Unmap the file and delete its local copy when destructed."""
+        try:
+            self.close()
+        except Exception:
+            logger.exception("Encountered exception while closing the mapped file.")
+
+
+class CsvDecoder(BaseDecoder):
+    """Decoder for csv files.
+
+    Rows are read straight from the (storage backed) file, decoding its chunks incrementally with universal newlines
+    as a file opened in text mode would.
+    """
+
+    def __init__(self, raw_file, encoding="utf-8"):
+        super().__init__(raw_file)
+        self.encoding = encoding
+
+    def _iter_lines(self):
+        """Decode the file a chunk at a time and yield each line with its newline translated to a line feed."""
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(self.encoding)(), translate=True
+        )
+        decoded_chunks = itertools.chain(
+            (decoder.decode(chunk) for chunk in self.raw_file.chunks()),
+            [decoder.decode(b"", final=True)],
+        )
+        pending = ""
+        for text in decoded_chunks:
+            *lines, pending = (pending + text).split("\n")
+            for line in lines:
+                yield line + "\n"
+        if pending:
+            yield pending
+
+    @property
+    def csv_file(self):
+        """Return a csv reader over the file, starting from its first line."""
+        return csv.reader(self._iter_lines())
 
     def get_record_type(self, raw_data):
         """Get the record type based on the raw data."""
@@ -121,8 +259,6 @@ def get_header(self):
         for line in self.csv_file:
             raw_data = line
             break
-        # Very important to move pointer back to the begining since invoking the generator does not do it for us.
-        self.local_file.seek(0)
         length = len(raw_data)
         return TupleRow(
             data=tuple(raw_data),
@@ -152,25 +288,33 @@ def decode(self):
                 record_type=record_type,
             )
 
-    def __del__(self):
-        """Close and delete the file when destructed."""
-        try:
-            self.local_file.close()
-            if os.path.exists(self.local_file.name):
-                os.remove(self.local_file.name)
-                assert os.path.exists(self.local_file.name) is False
-        except Exception:
-            logger.exception(
-                "Encountered exception while closing and deleting file instance."
-            )
-
 
 class XlsxDecoder(BaseDecoder):
-    """Decoder for xlsx files."""
+    """Decoder for xlsx files.
+
+    The workbook is opened in read-only mode so rows are streamed from the worksheet's XML instead of loading every
+    cell of the workbook into memory.
+    """
 
     def __init__(self, raw_file):
         super().__init__(raw_file)
-        self.work_book = load_workbook(raw_file, data_only=True)
+        self.work_book = load_workbook(raw_file, read_only=True, data_only=True)
+        self.work_sheet = self.work_book.worksheets[0]
+        self.max_column = self._get_max_column()
+
+    def _get_max_column(self):
+        """Return the width every row is padded to, matching a fully loaded worksheet."""
+        if self.work_sheet.max_column is not None:
+            return self.work_sheet.max_column
+        # Some writers omit the worksheet's dimensions. Rows are ragged without them, so find the widest one.
+        return max(
+            (len(row) for row in self.work_sheet.iter_rows(values_only=True)),
+            default=None,
+        )
+
+    def _iter_rows(self):
+        """Stream the rows of the first worksheet as tuples of values."""
+        return self.work_sheet.iter_rows(max_col=self.max_column, values_only=True)
 
     def get_record_type(self, raw_data):
         """Get the record type based on the raw data."""
@@ -179,7 +323,7 @@ def get_record_type(self, raw_data):
 
     def get_header(self):
         """Get the first line in the file. Assumed to be the header."""
-        for raw_data in self.work_book.worksheets[0].iter_rows(values_only=True):
+        for raw_data in self._iter_rows():
             length = len(raw_data)
             return TupleRow(
                 data=raw_data,
@@ -191,7 +335,7 @@ def get_header(self):
 
     def decode(self):
         """Decode and yield each row."""
-        for raw_data in self.work_book.worksheets[0].iter_rows(values_only=True):
+        for raw_data in self._iter_rows():
             self.current_row_num += 1
             if (
                 not len(raw_data)
@@ -209,6 +353,13 @@ def decode(self):
                 record_type=record_type,
             )
 
+    def __del__(self):
+        """Close the workbook's archive when destructed."""
+        try:
+            self.work_book.close()
+        except Exception:
+            logger.exception("Encountered exception while closing workbook.")
+
 
 class DecoderFactory:
     """Factory class to get/instantiate parsers."""
@@ -273,9 +424,12 @@ def get_instance(cls, raw_file):
         decoder = cls.get_suggested_decoder(raw_file)
         match decoder:
             case Decoder.UTF8:
+                if settings.USE_MMAP_DECODER:
+                    return MmapUtf8Decoder(raw_file)
                 return Utf8Decoder(raw_file)
             case Decoder.CSV:
-                return CsvDecoder(raw_file)
+                # CSV is only suggested for ASCII and UTF-8 files, and ASCII is a subset of UTF-8.
+                return CsvDecoder(raw_file, encoding="utf-8")
             case Decoder.XLSX:
                 return XlsxDecoder(raw_file)
             case Decoder.UNKNOWN:
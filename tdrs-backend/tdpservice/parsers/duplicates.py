@@ -0,0 +1,237 @@
+"""Duplicate detection for records streamed through the parsers."""
+
+import copy
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, List
+
+from django.core.exceptions import ValidationError
+
+from tdpservice.parsers.util import open_temp_store, record_matches_query
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DuplicateGroup:
+    """A group of records sharing the same duplicate key, ordered by line number."""
+
+    schema: object  # RowSchema causes circular import
+    record_type: str | None
+    first_line_number: int
+    offending_records: List[Any]
+
+
+def _to_db_value(field, value):
+    """Coerce a value to the type the model field stores, leaving values the field can't convert as they are."""
+    try:
+        return field.to_python(value)
+    except ValidationError:
+        return value
+
+
+def _to_db_values(record):
+    """Return a copy of the record with its field values coerced to the types they have when loaded from the database.
+
+    Parsed values are not always of the model field's type, e.g. numeric items stored in character columns. The
+    record itself keeps its parsed values, its unflushed errors and rows are built from it when they are written.
+    """
+    db_record = copy.copy(record)
+    for field in record._meta.concrete_fields:
+        setattr(
+            db_record,
+            field.attname,
+            _to_db_value(field, getattr(record, field.attname)),
+        )
+    return db_record
+
+
+class _IndexEntry:
+    """A record seen more than once by the index.
+
+    First occurrences are tracked by line number and sequence number only, later records keep a reference to the
+    record itself to build their errors.
+    """
+
+    __slots__ = ("line_number", "seq", "record")
+
+    def __init__(self, line_number, seq, record=None):
+        self.line_number = line_number
+        self.seq = seq
+        self.record = record
+
+
+class _KeyIndex:
+    """Maps a digest of a record's key fields to the entries that share it.
+
+    The first occurrence of every key is stored in the SQLite database shared by the indexes of a `DuplicateIndex`,
+    only keys seen more than once are kept in memory.
+    """
+
+    def __init__(self, db, index_id, schema, fields, exclude=None):
+        self.db = db
+        self.index_id = index_id
+        self.schema = schema
+        self.fields = fields
+        self.model_fields = [schema.model._meta.get_field(name) for name in fields]
+        self.exclude = exclude
+        self.collisions = dict()
+
+    def _digest(self, record):
+        # Hash the values as they are stored in the database so the keys match grouping the stored records.
+        key = tuple(
+            _to_db_value(field, getattr(record, field.attname))
+            for field in self.model_fields
+        )
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+
+    def add(self, record, line_number, seq):
+        """Index the record and return whether it collides with a record from a different line."""
+        if self.exclude is not None and self.exclude(record):
+            return False
+
+        digest = self._digest(record)
+        entries = self.collisions.get(digest)
+        if entries is None:
+            cursor = self.db.execute(
+                "INSERT OR IGNORE INTO first_occurrences VALUES (?, ?, ?, ?)",
+                (self.index_id, digest, line_number, seq),
+            )
+            if cursor.rowcount:
+                return False
+            first_line_number, first_seq = self.db.execute(
+                "SELECT line_number, seq FROM first_occurrences WHERE index_id = ? AND digest = ?",
+                (self.index_id, digest),
+            ).fetchone()
+            entries = self.collisions[digest] = [
+                _IndexEntry(first_line_number, first_seq)
+            ]
+        entries.append(_IndexEntry(line_number, seq, record))
+        return any(entry.line_number != line_number for entry in entries)
+
+    def groups(self, ignored_seqs=frozenset()):
+        """Yield the entries of every key shared by records on more than one line."""
+        for entries in self.collisions.values():
+            entries = [entry for entry in entries if entry.seq not in ignored_seqs]
+            if len({entry.line_number for entry in entries}) > 1:
+                yield sorted(entries, key=lambda entry: (entry.line_number, entry.seq))
+
+
+class DuplicateIndex:
+    """Hash index of record content used to find exact and partial duplicates while records are parsed.
+
+    Each record contributes a fixed size digest of its exact key and, when partial duplicates are tracked, of its
+    partial key. The digests are stored in a private temporary SQLite database, see `open_temp_store`, so memory stays
+    bounded however many records the file has. Groups are only materialized once parsing has finished so that the
+    result matches grouping every record in the database: partial duplicates are evaluated after exact duplicate
+    groups have been removed.
+    """
+
+    def __init__(self, track_partial_dups=True, exact_dup_exclusion=None):
+        self.track_partial_dups = track_partial_dups
+        self.exact_dup_exclusion = exact_dup_exclusion
+        self.exact_indexes = dict()
+        self.partial_indexes = dict()
+        self.num_records = 0
+        self._exact_dup_seqs = None
+
+        self.db = open_temp_store()
+        self.db.execute(
+            "CREATE TABLE first_occurrences (index_id INTEGER, digest BLOB, line_number INTEGER, seq INTEGER, "
+            "PRIMARY KEY (index_id, digest)) WITHOUT ROWID"
+        )
+
+    def close(self):
+        """Close the index's database, deleting its temporary file."""
+        self.db.close()
+
+    def __del__(self):
+        """Close the index's database when destructed."""
+        try:
+            self.close()
+        except Exception:
+            logger.exception("Encountered exception while closing the duplicate index.")
+
+    def _get_indexes(self, schema):
+        """Return the exact and partial indexes for the schema's model, creating them if needed."""
+        model = schema.model
+        if model not in self.exact_indexes:
+            fields = [f.name for f in schema.fields if f.name != "BLANK"]
+            self.exact_indexes[model] = _KeyIndex(
+                self.db,
+                len(self.exact_indexes) + len(self.partial_indexes),
+                schema,
+                fields,
+                exclude=self.exact_dup_exclusion,
+            )
+            if self.track_partial_dups:
+                exclusion_query = schema.partial_dup_exclusion_query
+                self.partial_indexes[model] = _KeyIndex(
+                    self.db,
+                    len(self.exact_indexes) + len(self.partial_indexes),
+                    schema,
+                    schema.get_partial_dup_fields(),
+                    exclude=(
+                        (lambda r: record_matches_query(r, exclusion_query))
+                        if exclusion_query is not None
+                        else None
+                    ),
+                )
+        return self.exact_indexes[model], self.partial_indexes.get(model)
+
+    def add(self, record, schema):
+        """Index the record and return whether it is a duplicate of a record on a previous line.
+
+        `schema` must be the first schema registered for the record's type; its fields define the duplicate keys
+        for every record of that model.
+        """
+        exact_index, partial_index = self._get_indexes(schema)
+        self.num_records += 1
+        is_exact_dup = exact_index.add(record, record.line_number, self.num_records)
+        is_partial_dup = partial_index is not None and partial_index.add(
+            record, record.line_number, self.num_records
+        )
+        return is_exact_dup or is_partial_dup
+
+    def _to_groups(self, index, entries_list):
+        for entries in entries_list:
+            first, *offending = entries
+            offending_records = [_to_db_values(entry.record) for entry in offending]
+            yield DuplicateGroup(
+                schema=index.schema,
+                record_type=(
+                    getattr(offending_records[0], "RecordType", None)
+                    if "RecordType" in index.fields
+                    else None
+                ),
+                first_line_number=first.line_number,
+                offending_records=offending_records,
+            )
+
+    def exact_duplicates(self):
+        """Yield a `DuplicateGroup` for every set of exact duplicate records."""
+        for index in self.exact_indexes.values():
+            yield from self._to_groups(index, index.groups())
+
+    def _get_exact_dup_seqs(self):
+        if self._exact_dup_seqs is None:
+            self._exact_dup_seqs = {
+                entry.seq
+                for index in self.exact_indexes.values()
+                for entries in index.groups()
+                for entry in entries
+            }
+        return self._exact_dup_seqs
+
+    def partial_duplicates(self, ignore_exact_duplicates=True):
+        """Yield a `DuplicateGroup` for every set of partial duplicate records.
+
+        When `ignore_exact_duplicates` is set, records belonging to an exact duplicate group are not considered since
+        they are removed before partial duplicates are evaluated.
+        """
+        ignored_seqs = (
+            self._get_exact_dup_seqs() if ignore_exact_duplicates else frozenset()
+        )
+        for index in self.partial_indexes.values():
+            yield from self._to_groups(index, index.groups(ignored_seqs))
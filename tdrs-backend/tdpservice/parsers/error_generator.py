@@ -1,12 +1,14 @@
 """Class for generating all types of ParserErrors."""
 
 from enum import Enum
+from typing import Any, NamedTuple
 
 from django.contrib.contenttypes.models import ContentType
 
 from tdpservice.data_files.parser_error_choices import ParserErrorCategoryChoices
 
 from .dataclasses import ErrorGeneratorArgs
+from .error_priority import get_error_priority
 from .models import ParserError
 
 
@@ -26,11 +28,118 @@ class ErrorGeneratorType(Enum):
     DYNAMIC_ROW_CASE_CONSISTENCY = "dynamic_row_case_consistency"
 
 
+def generate_fields_json(fields):
+    """Generate fields JSON."""
+    fields_json = {
+        "friendly_name": {
+            getattr(f, "name", ""): getattr(f, "friendly_name", "") for f in fields
+        },
+        "item_numbers": {
+            getattr(f, "name", ""): getattr(f, "item", "") for f in fields
+        },
+    }
+    return fields_json
+
+
+def get_field_names(fields):
+    """Return the names of the fields as they're keyed in the fields JSON."""
+    if fields is None:
+        return frozenset()
+    return frozenset(getattr(f, "name", "") for f in fields)
+
+
+def generate_values_json(fields, record):
+    """Generate values JSON."""
+    values_json = {}
+    for field in fields:
+        name = getattr(field, "name", "")
+        value = (
+            getattr(record, name, None)
+            if type(record) is not dict
+            else record.get(name, None)
+        )
+        values_json[name] = value
+    return values_json
+
+
+class DeferredParserError(NamedTuple):
+    """Compact, unsaved ParserError whose JSON columns are only built when the error is written."""
+
+    file: Any
+    row_number: int | None
+    column_number: str
+    item_number: str
+    field_name: str
+    rpt_month_year: int | None
+    case_number: str | None
+    error_message: str
+    error_type: str
+    content_type: Any
+    object_id: Any
+    deprecated: bool
+    json_fields: Any
+    value_fields: Any
+    record: Any
+
+    @property
+    def file_id(self):
+        """Return the primary key of the error's file."""
+        return getattr(self.file, "pk", None)
+
+    @property
+    def content_type_id(self):
+        """Return the primary key of the error's content type."""
+        return getattr(self.content_type, "pk", None)
+
+    @property
+    def priority(self):
+        """Compute the error's priority."""
+        return get_error_priority(
+            self.error_type, self.field_name, get_field_names(self.json_fields)
+        )
+
+    @property
+    def fields_json(self):
+        """Build the fields JSON."""
+        if self.json_fields is None:
+            return {}
+        return generate_fields_json(self.json_fields)
+
+    @property
+    def values_json(self):
+        """Build the values JSON."""
+        if self.value_fields is None:
+            return {}
+        return generate_values_json(self.value_fields, self.record)
+
+    def to_model(self, parser_error_model=ParserError):
+        """Return an unsaved `parser_error_model` instance equivalent to this error."""
+        return parser_error_model(
+            file_id=self.file_id,
+            row_number=self.row_number,
+            column_number=self.column_number,
+            item_number=self.item_number,
+            field_name=self.field_name,
+            rpt_month_year=self.rpt_month_year,
+            case_number=self.case_number,
+            error_message=self.error_message,
+            error_type=self.error_type,
+            content_type_id=self.content_type_id,
+            object_id=self.object_id,
+            fields_json=self.fields_json,
+            values_json=self.values_json,
+            deprecated=self.deprecated,
+            priority=self.priority,
+        )
+
+
 class ErrorGeneratorFactory:
     """Factory for generating all types of ParserErrors."""
 
-    def __init__(self, datafile):
+    def __init__(self, datafile, deferred=False):
         self.datafile = datafile
+        # When deferred, generators return `DeferredParserError` tuples instead of `ParserError` instances.
+        self.deferred = deferred
 
     def get_generator(self, generator_type: ErrorGeneratorType, row_number: int):
         """Return a generator given a category type."""
@@ -60,30 +169,45 @@ def get_generator(self, generator_type: ErrorGeneratorType, row_number: int):
             case _:
                 raise ValueError(f"Invalid error category: {generator_type}")
 
-    def _generate_fields_json(self, fields):
-        """Generate fields JSON."""
-        fields_json = {
-            "friendly_name": {
-                getattr(f, "name", ""): getattr(f, "friendly_name", "") for f in fields
-            },
-            "item_numbers": {
-                getattr(f, "name", ""): getattr(f, "item", "") for f in fields
-            },
-        }
-        return fields_json
-
-    def _generate_values_json(self, fields, record):
-        """Generate values JSON."""
-        values_json = {}
-        for field in fields:
-            name = getattr(field, "name", "")
-            value = (
-                getattr(record, name, None)
-                if type(record) is not dict
-                else record.get(name, None)
+    def _create_error(
+        self,
+        json_fields,
+        value_fields,
+        record,
+        content_type=None,
+        object_id=None,
+        **kwargs,
+    ):
+        """Create the error, building `fields_json`/`values_json` now unless the factory is deferred."""
+        if self.deferred:
+            return DeferredParserError(
+                file=self.datafile,
+                content_type=content_type,
+                object_id=object_id,
+                json_fields=json_fields,
+                value_fields=value_fields,
+                record=record,
+                **kwargs,
             )
-            values_json[name] = value
-        return values_json
+        return ParserError(
+            file=self.datafile,
+            content_type=content_type,
+            object_id=object_id,
+            fields_json=(
+                generate_fields_json(json_fields) if json_fields is not None else {}
+            ),
+            values_json=(
+                generate_values_json(value_fields, record)
+                if value_fields is not None
+                else {}
+            ),
+            priority=get_error_priority(
+                kwargs.get("error_type"),
+                kwargs.get("field_name"),
+                get_field_names(json_fields),
+            ),
+            **kwargs,
+        )
 
     def create_generate_case_consistency_error(self, row_number):
         """Create a case consistency error generator."""
@@ -91,10 +215,10 @@ def create_generate_case_consistency_error(self, row_number):
         def generate_case_consistency_error(generator_args: ErrorGeneratorArgs):
             field = generator_args.schema.record_type
             record = generator_args.record
-            fields_json = self._generate_fields_json(generator_args.fields)
-            values_json = self._generate_values_json(generator_args.fields, record)
-            return ParserError(
-                file=self.datafile,
+            return self._create_error(
+                json_fields=generator_args.fields,
+                value_fields=generator_args.fields,
+                record=record,
                 row_number=row_number,
                 column_number=getattr(field, "item", ""),
                 item_number=getattr(field, "item", ""),
@@ -105,8 +229,6 @@ def generate_case_consistency_error(generator_args: ErrorGeneratorArgs):
                 error_type=ParserErrorCategoryChoices.CASE_CONSISTENCY,
                 content_type=None,
                 object_id=None,
-                fields_json=fields_json,
-                values_json=values_json,
                 deprecated=generator_args.deprecated,
             )
 
@@ -119,10 +241,10 @@ def generate_precheck_error(generator_args: ErrorGeneratorArgs):
             """Generate a precheck error."""
             field = generator_args.schema.record_type
             record = generator_args.record
-            fields_json = self._generate_fields_json(generator_args.fields)
-            values_json = self._generate_values_json(generator_args.fields, record)
-            return ParserError(
-                file=self.datafile,
+            return self._create_error(
+                json_fields=generator_args.fields,
+                value_fields=generator_args.fields,
+                record=record,
                 row_number=row_number,
                 column_number=getattr(field, "item", ""),
                 item_number=getattr(field, "item", ""),
@@ -133,8 +255,6 @@ def generate_precheck_error(generator_args: ErrorGeneratorArgs):
                 error_type=ParserErrorCategoryChoices.PRE_CHECK,
                 content_type=None,
                 object_id=None,
-                fields_json=fields_json,
-                values_json=values_json,
                 deprecated=generator_args.deprecated,
             )
 
@@ -147,10 +267,10 @@ def generate_record_precheck_error(generator_args: ErrorGeneratorArgs):
             """Generate a record precheck error."""
             field = generator_args.schema.record_type
             record = generator_args.record
-            fields_json = self._generate_fields_json(generator_args.fields)
-            values_json = self._generate_values_json(generator_args.fields, record)
-            return ParserError(
-                file=self.datafile,
+            return self._create_error(
+                json_fields=generator_args.fields,
+                value_fields=generator_args.fields,
+                record=record,
                 row_number=row_number,
                 column_number=getattr(field, "item", ""),
                 item_number=getattr(field, "item", ""),
@@ -161,8 +281,6 @@ def generate_record_precheck_error(generator_args: ErrorGeneratorArgs):
                 error_type=ParserErrorCategoryChoices.RECORD_PRE_CHECK,
                 content_type=None,
                 object_id=None,
-                fields_json=fields_json,
-                values_json=values_json,
                 deprecated=generator_args.deprecated,
             )
 
@@ -175,10 +293,10 @@ def generate_field_value_error(generator_args: ErrorGeneratorArgs):
             """Generate a field value error."""
             field = generator_args.offending_field
             record = generator_args.record
-            fields_json = self._generate_fields_json([field])
-            values_json = self._generate_values_json([field], record)
-            return ParserError(
-                file=self.datafile,
+            return self._create_error(
+                json_fields=[field],
+                value_fields=[field],
+                record=record,
                 row_number=row_number,
                 column_number=getattr(field, "item", ""),
                 item_number=getattr(field, "item", ""),
@@ -191,8 +309,6 @@ def generate_field_value_error(generator_args: ErrorGeneratorArgs):
                     model=generator_args.schema.model
                 ),
                 object_id=record.id,
-                fields_json=fields_json,
-                values_json=values_json,
                 deprecated=generator_args.deprecated,
             )
 
@@ -205,10 +321,10 @@ def generate_header_field_value_error(generator_args: ErrorGeneratorArgs):
             """Generate a field value error."""
             field = generator_args.offending_field
             record = generator_args.record
-            fields_json = self._generate_fields_json([field])
-            values_json = self._generate_values_json([field], record)
-            return ParserError(
-                file=self.datafile,
+            return self._create_error(
+                json_fields=[field],
+                value_fields=[field],
+                record=record,
                 row_number=row_number,
                 column_number=getattr(field, "item", ""),
                 item_number=getattr(field, "item", ""),
@@ -217,8 +333,6 @@ def generate_header_field_value_error(generator_args: ErrorGeneratorArgs):
                 case_number=getattr(record, "CASE_NUMBER", None),
                 error_message=generator_args.error_message,
                 error_type=ParserErrorCategoryChoices.FIELD_VALUE,
-                fields_json=fields_json,
-                values_json=values_json,
                 deprecated=generator_args.deprecated,
             )
 
@@ -231,10 +345,10 @@ def generate_value_consistency_error(generator_args: ErrorGeneratorArgs):
             """Generate a value consistency error."""
             field = generator_args.fields[-1]
             record = generator_args.record
-            fields_json = self._generate_fields_json(generator_args.fields)
-            values_json = self._generate_values_json(generator_args.fields, record)
-            return ParserError(
-                file=self.datafile,
+            return self._create_error(
+                json_fields=generator_args.fields,
+                value_fields=generator_args.fields,
+                record=record,
                 row_number=row_number,
                 column_number=getattr(field, "item", ""),
                 item_number=getattr(field, "item", ""),
@@ -247,8 +361,6 @@ def generate_value_consistency_error(generator_args: ErrorGeneratorArgs):
                     model=generator_args.schema.model
                 ),
                 object_id=record.id,
-                fields_json=fields_json,
-                values_json=values_json,
                 deprecated=generator_args.deprecated,
             )
 
@@ -261,10 +373,10 @@ def generate_fra_parser_error(generator_args: ErrorGeneratorArgs):
             """Generate a FRA parser error."""
             field = generator_args.offending_field
             record = generator_args.record
-            fields_json = self._generate_fields_json([field])
-            values_json = self._generate_values_json(generator_args.fields, record)
-            return ParserError(
-                file=self.datafile,
+            return self._create_error(
+                json_fields=[field],
+                value_fields=generator_args.fields,
+                record=record,
                 row_number=row_number,
                 column_number=getattr(field, "item", ""),
                 item_number=getattr(field, "item", ""),
@@ -275,8 +387,6 @@ def generate_fra_parser_error(generator_args: ErrorGeneratorArgs):
                 error_type=ParserErrorCategoryChoices.CASE_CONSISTENCY,
                 content_type=None,
                 object_id=None,
-                fields_json=fields_json,
-                values_json=values_json,
                 deprecated=generator_args.deprecated,
             )
 
@@ -287,8 +397,10 @@ def create_generate_message_only_precheck_error(self, row_number):
 
         def generate_message_only_precheck_error(generator_args: ErrorGeneratorArgs):
             """Generate a no records precheck error."""
-            return ParserError(
-                file=self.datafile,
+            return self._create_error(
+                json_fields=None,
+                value_fields=None,
+                record=None,
                 row_number=row_number,
                 column_number="",
                 item_number="",
@@ -299,8 +411,6 @@ def generate_message_only_precheck_error(generator_args: ErrorGeneratorArgs):
                 error_type=ParserErrorCategoryChoices.PRE_CHECK,
                 content_type=None,
                 object_id=None,
-                fields_json={},
-                values_json={},
                 deprecated=generator_args.deprecated,
             )
 
@@ -313,8 +423,10 @@ def generate_message_only_record_precheck_error(
             generator_args: ErrorGeneratorArgs,
         ):
             """Generate a no records precheck error."""
-            return ParserError(
-                file=self.datafile,
+            return self._create_error(
+                json_fields=None,
+                value_fields=None,
+                record=None,
                 row_number=row_number,
                 column_number="",
                 item_number="",
@@ -325,8 +437,6 @@ def generate_message_only_record_precheck_error(
                 error_type=ParserErrorCategoryChoices.RECORD_PRE_CHECK,
                 content_type=None,
                 object_id=None,
-                fields_json={},
-                values_json={},
                 deprecated=generator_args.deprecated,
             )
 
@@ -340,10 +450,10 @@ def generate_dynamic_row_case_consistency_error(
         ):
             field = generator_args.schema.record_type
             record = generator_args.record
-            fields_json = self._generate_fields_json(generator_args.fields)
-            values_json = self._generate_values_json(generator_args.fields, record)
-            return ParserError(
-                file=self.datafile,
+            return self._create_error(
+                json_fields=generator_args.fields,
+                value_fields=generator_args.fields,
+                record=record,
                 row_number=generator_args.row_number,
                 column_number=getattr(field, "item", ""),
                 item_number=getattr(field, "item", ""),
@@ -354,8 +464,6 @@ def generate_dynamic_row_case_consistency_error(
                 error_type=ParserErrorCategoryChoices.CASE_CONSISTENCY,
                 content_type=None,
                 object_id=None,
-                fields_json=fields_json,
-                values_json=values_json,
                 deprecated=generator_args.deprecated,
             )
 
@@ -0,0 +1,85 @@
+"""Classify ParserErrors into the priority buckets of the error reports."""
+
+from functools import reduce
+from operator import or_
+
+from django.db.models import Case, Q, Value, When
+
+from tdpservice.data_files.parser_error_choices import (
+    ParserErrorCategoryChoices,
+    ParserErrorPriorityChoices,
+)
+
+# Cat 1 and 4 errors are always critical.
+CRITICAL_ERROR_TYPES = frozenset(
+    {ParserErrorCategoryChoices.PRE_CHECK, ParserErrorCategoryChoices.CASE_CONSISTENCY}
+)
+
+# Cat 2 errors on these fields are critical.
+CRITICAL_FIELD_VALUE_FIELDS = frozenset(
+    {"FAMILY_AFFILIATION", "CITIZENSHIP_STATUS", "CLOSURE_REASON"}
+)
+
+# Cat 3 errors involving all fields of one of these groups are critical.
+CRITICAL_VALUE_CONSISTENCY_FIELDS = (
+    ("WORK_ELIGIBLE_INDICATOR", "SSN"),
+    ("FAMILY_AFFILIATION", "CITIZENSHIP_STATUS"),
+    (
+        "AMT_FOOD_STAMP_ASSISTANCE",
+        "AMT_SUB_CC",
+        "CASH_AMOUNT",
+        "CC_AMOUNT",
+        "TRANSP_AMOUNT",
+    ),
+    ("FAMILY_AFFILIATION", "PARENT_MINOR_CHILD"),
+    ("FAMILY_AFFILIATION", "EDUCATION_LEVEL"),
+    ("FAMILY_AFFILIATION", "WORK_ELIGIBLE_INDICATOR"),
+    ("CITIZENSHIP_STATUS", "WORK_ELIGIBLE_INDICATOR"),
+    ("FUNDING_STREAM", "FAMILY_AFFILIATION", "SSN"),
+)
+
+
+def get_error_priority(error_type, field_name, field_names):
+    """Return the priority of an error given its type, field name and the names of the fields in `fields_json`."""
+    if error_type in CRITICAL_ERROR_TYPES:
+        return ParserErrorPriorityChoices.CRITICAL
+    if (
+        error_type == ParserErrorCategoryChoices.FIELD_VALUE
+        and field_name in CRITICAL_FIELD_VALUE_FIELDS
+    ):
+        return ParserErrorPriorityChoices.CRITICAL
+    if error_type == ParserErrorCategoryChoices.VALUE_CONSISTENCY and any(
+        field_names.issuperset(fields) for fields in CRITICAL_VALUE_CONSISTENCY_FIELDS
+    ):
+        return ParserErrorPriorityChoices.CRITICAL
+    return ParserErrorPriorityChoices.STANDARD
+
+
+def get_error_priority_expression():
+    """Return a database expression computing the same priority as `get_error_priority`."""
+    critical = reduce(
+        or_,
+        [
+            Q(error_type__in=CRITICAL_ERROR_TYPES),
+            Q(
+                error_type=ParserErrorCategoryChoices.FIELD_VALUE,
+                field_name__in=CRITICAL_FIELD_VALUE_FIELDS,
+            ),
+            *(
+                Q(
+                    error_type=ParserErrorCategoryChoices.VALUE_CONSISTENCY,
+                    fields_json__friendly_name__has_keys=fields,
+                )
+                for fields in CRITICAL_VALUE_CONSISTENCY_FIELDS
+            ),
+        ],
+    )
+    return Case(
+        When(critical, then=Value(ParserErrorPriorityChoices.CRITICAL)),
+        default=Value(ParserErrorPriorityChoices.STANDARD),
+    )
+
+
+def set_error_priorities(queryset):
+    """Compute and store the priority of every error in the queryset and return the number of errors updated."""
+    return queryset.update(priority=get_error_priority_expression())
@@ -0,0 +1,136 @@
+"""Compiled row extractors used by row schemas to parse rows into records."""
+
+import logging
+from enum import IntEnum, auto
+
+from tdpservice.parsers.dataclasses import FieldType, RawRow
+from tdpservice.parsers.fields import TransformField
+from tdpservice.parsers.validators.util import get_empty_values
+
+logger = logging.getLogger(__name__)
+
+
+class _Conversion(IntEnum):
+    """How a raw field value is converted, resolved once per field."""
+
+    INTEGER = auto()
+    STRING = auto()
+    TRANSFORM = auto()
+    UNKNOWN = auto()
+
+
+def _get_conversion(field):
+    """Return the conversion `Field.parse_value` applies to the field's raw value."""
+    if isinstance(field, TransformField):
+        return _Conversion.TRANSFORM
+    match field.type:
+        case FieldType.NUMERIC:
+            return _Conversion.INTEGER
+        case FieldType.ALPHA_NUMERIC:
+            return _Conversion.STRING
+        case _:
+            return _Conversion.UNKNOWN
+
+
+class RowExtractor:
+    """Parses rows for a schema's fields and model, equivalent to calling `Field.parse_value` for every field.
+
+    Everything that only depends on the schema, i.e. positions, lengths, empty value sentinels, conversions and the
+    model's field names, is resolved once when the extractor is created. Parsing a row is then a single pass over
+    the fields followed by one model construction.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.specs = []
+        for field in fields:
+            length = len(field.position)
+            self.specs.append(
+                (
+                    field.name,
+                    field.position,
+                    length,
+                    get_empty_values(length),
+                    _get_conversion(field),
+                    field,
+                )
+            )
+
+        self.is_dict = model is dict
+        # Values for names that aren't model fields, e.g. BLANK, are set as plain attributes like before.
+        meta = getattr(model, "_meta", None)
+        self.model_field_names = (
+            None if meta is None else frozenset(f.name for f in meta.concrete_fields)
+        )
+
+    def extract(self, row: RawRow):
+        """Return a dict of the parsed, non-null values of the row keyed on field name."""
+        values = dict()
+        # `RawRow.value_at` is a plain slice of its string; other row types slice their own way.
+        data = row.data if type(row) is RawRow else None
+        value_at = row.value_at
+
+        for name, position, length, empty_values, conversion, field in self.specs:
+            if data is not None:
+                value = data[position.start : position.end]
+            else:
+                value = value_at(position)
+
+            # The XLSX decoder returns typed data, not strictly strings.
+            if value is None or (
+                hasattr(value, "__len__")
+                and (len(value) < length or value in empty_values)
+            ):
+                continue
+
+            match conversion:
+                case _Conversion.INTEGER:
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        logger.error(f"Error parsing field {name} value to integer.")
+                        continue
+                case _Conversion.STRING:
+                    value = str(value)
+                case _Conversion.TRANSFORM:
+                    # Transform kwargs can change after the schema is prepared, e.g. `is_encrypted`.
+                    try:
+                        value = field.transform_func(value, **field.kwargs)
+                    except Exception:
+                        raise ValueError(
+                            f"Error transforming field value for field: {name}."
+                        )
+                    if value is None:
+                        continue
+                case _:
+                    logger.warning(f"Unknown field type: {field.type}.")
+                    continue
+
+            values[name] = value
+        return values
+
+    def parse_row(self, row: RawRow):
+        """Create a model for the row."""
+        values = self.extract(row)
+
+        if self.is_dict:
+            return values
+
+        if self.model_field_names is None:
+            record = self.model()
+            record.line_number = row.row_num
+            for name, value in values.items():
+                setattr(record, name, value)
+            return record
+
+        model_values = {
+            name: value
+            for name, value in values.items()
+            if name in self.model_field_names
+        }
+        record = self.model(line_number=row.row_num, **model_values)
+        if len(model_values) != len(values):
+            for name, value in values.items():
+                if name not in self.model_field_names:
+                    setattr(record, name, value)
+        return record
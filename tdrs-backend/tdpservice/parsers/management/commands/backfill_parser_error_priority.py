@@ -0,0 +1,66 @@
+"""Compute the priority of ParserErrors stored without one."""
+
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tdpservice.parsers.error_priority import set_error_priorities
+from tdpservice.parsers.models import ParserError, ShadowParserError
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_error_priorities(parser_error_model, batch_size):
+    """Set the priority of every error without one in batches of `batch_size` and return the number updated.
+
+    Each batch is its own short update over a primary key range, so the command can be interrupted and rerun and
+    doesn't hold locks on the whole table.
+    """
+    num_updated = 0
+    last_id = 0
+    while True:
+        ids = list(
+            parser_error_model.objects.filter(priority=None, id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return num_updated
+        num_updated += set_error_priorities(
+            parser_error_model.objects.filter(
+                priority=None, id__gte=ids[0], id__lte=ids[-1]
+            )
+        )
+        last_id = ids[-1]
+        logger.info(
+            f"Set the priority of {num_updated} {parser_error_model._meta.db_table} rows."
+        )
+
+
+class Command(BaseCommand):
+    """Command class."""
+
+    help = (
+        "Compute the priority of parser errors created before priorities were stored."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the management command."""
+        parser.add_argument(
+            "-b",
+            "--batch_size",
+            type=int,
+            default=settings.BULK_CREATE_BATCH_SIZE,
+            help="Number of errors updated per statement.",
+        )
+
+    def handle(self, *args, **options):
+        """Backfill the priority of the production and shadow parser errors."""
+        for parser_error_model in (ParserError, ShadowParserError):
+            num_updated = backfill_error_priorities(
+                parser_error_model, options["batch_size"]
+            )
+            logger.info(
+                f"Backfilled the priority of {num_updated} {parser_error_model._meta.db_table} rows."
+            )
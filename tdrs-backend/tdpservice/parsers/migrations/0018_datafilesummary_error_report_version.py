@@ -0,0 +1,23 @@
+# Generated by Django 5.2.14 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("parsers", "0017_shadowdatafilesummary_shadowparsererror"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datafilesummary",
+            name="error_report_version",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="shadowdatafilesummary",
+            name="error_report_version",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
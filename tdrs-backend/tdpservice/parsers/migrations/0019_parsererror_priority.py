@@ -0,0 +1,35 @@
+# Generated by Django 5.2.14 on 2026-10-18 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("data_files", "0028_alter_datafile_state_alter_shadowdatafile_state"),
+        ("parsers", "0018_datafilesummary_error_report_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="parsererror",
+            name="priority",
+            field=models.PositiveSmallIntegerField(
+                choices=[(1, "Critical"), (2, "Standard")], null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="shadowparsererror",
+            name="priority",
+            field=models.PositiveSmallIntegerField(
+                choices=[(1, "Critical"), (2, "Standard")], null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="parsererror",
+            index=models.Index(
+                fields=["file", "deprecated", "priority", "id"],
+                name="pe_file_depr_priority_idx",
+            ),
+        ),
+    ]
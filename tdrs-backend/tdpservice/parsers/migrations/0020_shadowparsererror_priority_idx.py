@@ -0,0 +1,22 @@
+# Generated by Django 5.2.14 on 2026-10-18 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("data_files", "0029_reparsefilemeta_scheduling"),
+        ("parsers", "0019_parsererror_priority"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="shadowparsererror",
+            index=models.Index(
+                fields=["file", "deprecated", "priority", "id"],
+                name="spe_file_depr_priority_idx",
+            ),
+        ),
+    ]
@@ -12,7 +12,10 @@
 from tdpservice.backends import DataFilesS3Storage
 from tdpservice.common.shadow_models import create_shadow_model
 from tdpservice.data_files.models import DataFile
-from tdpservice.data_files.parser_error_choices import ParserErrorCategoryChoices
+from tdpservice.data_files.parser_error_choices import (
+    ParserErrorCategoryChoices,
+    ParserErrorPriorityChoices,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +58,11 @@ class Meta:
                 fields=["file", "deprecated", "rpt_month_year"],
                 name="pe_file_deprecated_rpt_idx",
             ),
+            # Critical errors are read in primary key order by the error report.
+            models.Index(
+                fields=["file", "deprecated", "priority", "id"],
+                name="pe_file_depr_priority_idx",
+            ),
         ]
 
     id = models.AutoField(primary_key=True)
@@ -86,6 +94,12 @@ class Meta:
 
     deprecated = models.BooleanField(default=False)
 
+    # Set when the error is created, see `tdpservice.parsers.error_priority`. Null for errors written before the
+    # column existed until they are backfilled by the `backfill_parser_error_priority` command.
+    priority = models.PositiveSmallIntegerField(
+        choices=ParserErrorPriorityChoices.choices, null=True
+    )
+
     @property
     def rpt_month_name(self):
         """Return the month name."""
@@ -140,6 +154,8 @@ class Status(models.TextChoices):
         null=True,
         blank=True,
     )
+    # Version of the error set `error_report` was generated from, see `get_error_set_version`.
+    error_report_version = models.CharField(max_length=64, null=True, blank=True)
 
     case_aggregates = models.JSONField(null=True, blank=False)
 
@@ -230,6 +246,13 @@ def get_status(self):
             null=True,
         ),
     },
+    indexes=[
+        # Shadow error reports read their Critical errors the same way as ParserError's.
+        models.Index(
+            fields=["file", "deprecated", "priority", "id"],
+            name="spe_file_depr_priority_idx",
+        ),
+    ],
 )
 
 ShadowDataFileSummary = create_shadow_model(
@@ -0,0 +1,171 @@
+"""Parse and validate the rows of a datafile in a pool of worker processes."""
+
+import io
+import logging
+import multiprocessing
+import pickle
+from collections import deque
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+
+from tdpservice.parsers.constants import CASE_ID_POSITION
+from tdpservice.parsers.dataclasses import RawRow
+
+logger = logging.getLogger(__name__)
+
+# Set in the parent right before the pool is forked so that every worker inherits the prepared schemas.
+_worker_state = None
+
+
+def _get_schema_refs(datafile, schema_manager):
+    """Return the objects shared by the parent and its workers keyed on a name that is the same in both."""
+    refs = {"datafile": datafile}
+    for record_type, schemas in schema_manager.schema_map.items():
+        for i, schema in enumerate(schemas):
+            refs[("schema", record_type, i)] = schema
+            for j, field in enumerate(schema.fields):
+                refs[("field", record_type, i, j)] = field
+    return refs
+
+
+class _SchemaRefPickler(pickle.Pickler):
+    """Pickles schemas, fields and the datafile by reference.
+
+    Fields hold validator closures which can't be pickled and the parent needs its own schema objects back anyway.
+    """
+
+    def __init__(self, file, refs):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.keys_by_id = {id(obj): key for key, obj in refs.items()}
+
+    def persistent_id(self, obj):
+        """Return the reference key of shared objects."""
+        return self.keys_by_id.get(id(obj))
+
+
+class _SchemaRefUnpickler(pickle.Unpickler):
+    """Resolves references written by `_SchemaRefPickler` to the parent's objects."""
+
+    def __init__(self, file, refs):
+        super().__init__(file)
+        self.refs = refs
+
+    def persistent_load(self, key):
+        """Return the parent's object for the reference key."""
+        return self.refs[key]
+
+
+def _init_worker():
+    """Detach the worker from the database connections inherited from the parent."""
+    # Closing them would close the parent's sessions. Workers aren't expected to query the database; if they ever do
+    # they open their own connection.
+    for conn in connections.all(initialized_only=True):
+        conn.connection = None
+
+
+def _parse_chunk(rows):
+    """Parse and validate a chunk of rows and return the pickled `ManagerPVResult`s, `None` for file level rows."""
+    schema_manager, refs, is_file_level_record = _worker_state
+    results = []
+    for data, raw_len, row_num, record_type in rows:
+        row = RawRow(
+            data=data,
+            raw_len=raw_len,
+            decoded_len=len(data),
+            row_num=row_num,
+            record_type=record_type,
+        )
+        results.append(
+            None
+            if is_file_level_record(row)
+            else schema_manager.parse_and_validate(row)
+        )
+
+    buffer = io.BytesIO()
+    _SchemaRefPickler(buffer, refs).dump(results)
+    return buffer.getvalue()
+
+
+class ParallelRowParser:
+    """Distributes chunks of rows to a process pool and yields the results in file order.
+
+    Chunks are only split between cases, i.e. where RPT_MONTH_YEAR or CASE_NUMBER change. Only schema parsing and
+    validation happen in the workers. Everything that depends on previous rows, e.g. case consistency, duplicate
+    detection and writing to the database, stays in the parent. The output is the same as parsing serially.
+    """
+
+    def __init__(
+        self,
+        datafile,
+        schema_manager,
+        is_file_level_record,
+        num_processes,
+        chunk_size,
+    ):
+        self.schema_manager = schema_manager
+        self.is_file_level_record = is_file_level_record
+        self.num_processes = num_processes
+        self.chunk_size = chunk_size
+        # Bounds the number of rows held in memory while the parent consumes results.
+        self.max_pending_chunks = 2 * num_processes
+        self.refs = _get_schema_refs(datafile, schema_manager)
+        self.pool = None
+
+    def __enter__(self):
+        """Fork the worker pool and return `parse`."""
+        global _worker_state
+
+        # Error generators look up content types. Warm the cache so workers inherit it instead of querying.
+        ContentType.objects.get_for_models(
+            *{schemas[0].model for schemas in self.schema_manager.schema_map.values()}
+        )
+
+        _worker_state = (self.schema_manager, self.refs, self.is_file_level_record)
+        try:
+            self.pool = multiprocessing.get_context("fork").Pool(
+                self.num_processes, initializer=_init_worker
+            )
+        finally:
+            _worker_state = None
+        logger.info(f"Parsing with {self.num_processes} processes.")
+        return self.parse
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Stop the worker pool."""
+        self.pool.terminate()
+        self.pool.join()
+        self.pool = None
+
+    def _chunks(self, rows):
+        """Group rows into chunks of at least `chunk_size` rows that end on a case boundary."""
+        chunk = []
+        last_case_id = None
+        for row in rows:
+            case_id = row.value_at(CASE_ID_POSITION)
+            if len(chunk) >= self.chunk_size and case_id != last_case_id:
+                yield chunk
+                chunk = []
+            chunk.append(row)
+            last_case_id = case_id
+        if chunk:
+            yield chunk
+
+    def _get_results(self, chunk, async_result):
+        """Wait for the chunk's results and yield each row with its result."""
+        results = _SchemaRefUnpickler(io.BytesIO(async_result.get()), self.refs).load()
+        yield from zip(chunk, results)
+
+    def parse(self, rows):
+        """Yield each row with its `ManagerPVResult`, or `None` for header and trailer rows."""
+        pending = deque()
+        for chunk in self._chunks(rows):
+            payload = [
+                (row.data, row.raw_len, row.row_num, row.record_type) for row in chunk
+            ]
+            pending.append((chunk, self.pool.apply_async(_parse_chunk, (payload,))))
+            if len(pending) >= self.max_pending_chunks:
+                yield from self._get_results(*pending.popleft())
+
+        while pending:
+            yield from self._get_results(*pending.popleft())
@@ -5,10 +5,12 @@
 from abc import ABC, abstractmethod
 
 from django.conf import settings
-from django.db.models import Count, Q
+from django.db.models import Q
 from django.db.utils import DatabaseError
 
+from tdpservice.parsers.aggregates import ParseAggregates
 from tdpservice.parsers.decoders import DecoderFactory
+from tdpservice.parsers.duplicates import DuplicateIndex
 from tdpservice.parsers.error_generator import (
     ErrorGeneratorArgs,
     ErrorGeneratorFactory,
@@ -22,6 +24,11 @@
     Records,
     log_parser_exception,
 )
+from tdpservice.parsers.writers import (
+    ParserErrorWriterFactory,
+    RecordWriterFactory,
+    delete_rows_by_keys,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +36,21 @@
 class BaseParser(ABC):
     """Abstract base class for all parsers."""
 
+    # Whether duplicate records are kept out of the database. When False, only errors are generated for them.
+    remove_duplicate_records = True
+
     def __init__(self, datafile, dfs, section):
         super().__init__()
         self.datafile = datafile
-        self.error_generator_factory = ErrorGeneratorFactory(datafile)
+        self.record_writer = RecordWriterFactory.get_instance(
+            settings.BULK_CREATE_METHOD
+        )
+        self.error_writer = ParserErrorWriterFactory.get_instance(
+            settings.BULK_CREATE_METHOD
+        )
+        self.error_generator_factory = ErrorGeneratorFactory(
+            datafile, deferred=self.error_writer.deferred
+        )
         self.dfs = dfs
         self.section = section
         self.program_type = None
@@ -50,9 +68,17 @@ def __init__(self, datafile, dfs, section):
         self.unsaved_parser_errors = dict()
         self.num_errors = 0
 
+        # Case and error counters for the summary, kept up to date with what is written to the database.
+        self.aggregates = ParseAggregates()
+
         # Track cases that have already been serialized that need to be removed because of a case consistency error.
         self.serialized_cases = set()
 
+        # Detects duplicate records as they are parsed so that they never need to be serialized.
+        self.duplicate_index = DuplicateIndex(
+            track_partial_dups=self.is_active_or_closed
+        )
+
         # Initialized decoder.
         self._init_decoder()
 
@@ -98,7 +124,10 @@ def _init_schema_manager(self, program_type):
         # with "Tribal" since it's base program type would just be TANF.
         self.program_type = program_type
         self.schema_manager = SchemaManager(
-            self.datafile, self.program_type, self.section
+            self.datafile,
+            self.program_type,
+            self.section,
+            deferred_errors=self.error_writer.deferred,
         )
 
     def bulk_create_records(self, header_count, flush=False):
@@ -111,8 +140,7 @@ def bulk_create_records(self, header_count, flush=False):
             for model, records in self.unsaved_records.get_bulk_create_struct().items():
                 try:
                     num_expected_db_records += len(records)
-                    created_objs = model.objects.bulk_create(records)
-                    num_db_records_created += len(created_objs)
+                    num_db_records_created += self.record_writer.write(model, records)
                 except DatabaseError as e:
                     log_parser_exception(
                         self.datafile,
@@ -147,15 +175,11 @@ def bulk_create_errors(self, batch_size=5000, flush=False):
         """Bulk create unsaved_parser_errors."""
         if flush or (self.unsaved_parser_errors and self.num_errors >= batch_size):
             logger.debug("Bulk creating ParserErrors.")
-            num_created = len(
-                ParserError.objects.bulk_create(
-                    list(
-                        itertools.chain.from_iterable(
-                            self.unsaved_parser_errors.values()
-                        )
-                    )
-                )
+            errors = list(
+                itertools.chain.from_iterable(self.unsaved_parser_errors.values())
             )
+            num_created = self.error_writer.write(errors)
+            self.aggregates.add_errors(errors)
             logger.info(f"Created {num_created}/{self.num_errors} ParserErrors.")
             self.unsaved_parser_errors = dict()
             self.num_errors = 0
@@ -163,12 +187,14 @@ def bulk_create_errors(self, batch_size=5000, flush=False):
     def rollback_records(self):
         """Delete created records in the event of a failure."""
         logger.info("Rolling back created records.")
+        self.aggregates.clear_records()
         for model in self.unsaved_records.get_bulk_create_struct():
             try:
                 qset = model.objects.filter(datafile=self.datafile)
                 # WARNING: we can use `_raw_delete` in this case because our record models don't have cascading
                 # dependencies. If that ever changes, we should NOT use `_raw_delete`.
                 num_deleted = qset._raw_delete(qset.db)
+                self.dfs.total_number_of_records_created -= num_deleted
                 logger.debug(f"Deleted {num_deleted} records of type: {model}.")
             except DatabaseError as e:
                 log_parser_exception(
@@ -193,6 +219,7 @@ def rollback_parser_errors(self):
         """Delete created errors in the event of a failure."""
         try:
             logger.info("Rolling back created parser errors.")
+            self.aggregates.clear_errors()
             qset = ParserError.objects.filter(file=self.datafile)
             # WARNING: we can use `_raw_delete` in this case because our error models don't have cascading dependencies.
             # If that ever changes, we should NOT use `_raw_delete`.
@@ -244,16 +271,38 @@ def _delete_serialized_cases(self):
         """Delete all cases that have already been serialized to the DB with cat4 errors."""
         if len(self.serialized_cases):
             logger.info("Deleting records with cat4 errors.")
+            self.aggregates.remove_cases(self.serialized_cases)
             start_num = self.dfs.total_number_of_records_created
-            cases = Q()
+
+            # Case IDs are keyed on (RPT_MONTH_YEAR, CASE_NUMBER) or on RecordType depending on the section. Keys are
+            # deleted with a join against one array per field; the rare keys containing nulls need `IS NULL` matching.
+            keys_by_fields = dict()
+            null_cases = Q()
             for case in self.serialized_cases:
-                cases |= Q(**case)
+                if None in case.values():
+                    null_cases |= Q(**case)
+                else:
+                    field_names = tuple(sorted(case))
+                    keys_by_fields.setdefault(field_names, []).append(
+                        tuple(case[name] for name in field_names)
+                    )
+
             for schemas in self.schema_manager.schema_map.values():
-                schema = schemas[0]
-                num_deleted, _ = schema.model.objects.filter(
-                    cases, datafile=self.datafile
-                ).delete()
-                self.dfs.total_number_of_records_created -= num_deleted
+                model = schemas[0].model
+                model_field_names = {f.name for f in model._meta.concrete_fields}
+                for field_names, keys in keys_by_fields.items():
+                    if not model_field_names.issuperset(field_names):
+                        continue
+                    self.dfs.total_number_of_records_created -= delete_rows_by_keys(
+                        model, field_names, keys, datafile_id=self.datafile.pk
+                    )
+                if null_cases:
+                    qset = model.objects.filter(null_cases, datafile=self.datafile)
+                    # WARNING: we can use `_raw_delete` in this case because our record models don't have cascading
+                    # dependencies. If that ever changes, we should NOT use `_raw_delete`.
+                    self.dfs.total_number_of_records_created -= qset._raw_delete(
+                        qset.db
+                    )
             logger.info(
                 f"Deleted {start_num - self.dfs.total_number_of_records_created} records with cat4 errors."
             )
@@ -285,28 +334,21 @@ def _generate_partial_dup_error_msg(
                 err_msg += f"{item_and_name}, "
         return err_msg
 
-    def _generate_errors(
-        self,
-        first_record,
-        duplicate_records,
-        duplicate_vals,
-        schema,
-        generate_error_msg,
-    ):
-        """Generate and save an error for each of the provided duplicate values."""
+    def _generate_errors(self, duplicate_group, generate_error_msg):
+        """Generate and save an error for each offending record of the duplicate group."""
         duplicate_error_generator = self.error_generator_factory.get_generator(
             ErrorGeneratorType.DYNAMIC_ROW_CASE_CONSISTENCY, None
         )
-        for offending_record in duplicate_records[1:]:
-            record_type = duplicate_vals.get("RecordType", None)
+        schema = duplicate_group.schema
+        for offending_record in duplicate_group.offending_records:
             generator_args = ErrorGeneratorArgs(
                 record=offending_record,
                 schema=schema,
                 error_message=generate_error_msg(
                     schema,
-                    record_type,
+                    duplicate_group.record_type,
                     offending_record.line_number,
-                    first_record.line_number,
+                    duplicate_group.first_line_number,
                 ),
                 fields=schema.fields,
                 row_number=offending_record.line_number,
@@ -318,8 +360,9 @@ def _generate_errors(
             )
             self.bulk_create_errors()
 
-    def _delete_duplicates(self, record, duplicate_records):
-        """Delete the provided duplicates and update total records."""
+    def _delete_duplicates(self, duplicate_group):
+        """Mark the case of the provided duplicates for removal."""
+        record = duplicate_group.offending_records[0]
         case_id_to_delete = (
             FrozenDict(RecordType=record.RecordType)
             if not self.is_active_or_closed
@@ -329,87 +372,50 @@ def _delete_duplicates(self, record, duplicate_records):
             )
         )
 
-        # We add the case ID here because a case with a duplicate record must be purged in it's entirety.
+        # We add the case ID here because a case with a duplicate record must be purged in it's entirety. The offending
+        # records were never serialized and the rest of the case is removed with the other serialized cases.
         self.serialized_cases.add(case_id_to_delete)
-        num_deleted = duplicate_records._raw_delete(duplicate_records.db)
-        self.dfs.total_number_of_records_created -= num_deleted
 
-    def _generate_errors_and_delete_dups(
-        self, all_records, dup_queryset, schema, generate_error_msg
+    def _add_record(self, record, schema, case_id):
+        """Track the record for duplicate detection and queue it for creation unless it is a duplicate."""
+        is_duplicate = self.duplicate_index.add(record, schema)
+        if not is_duplicate or not self.remove_duplicate_records:
+            if self.unsaved_records.add_record(
+                case_id, (record, schema.model), record.line_number
+            ):
+                self.aggregates.add_record(record)
+
+    def _generate_dup_errors_and_delete_dups(
+        self, duplicate_groups, generate_error_msg
     ):
         """Generate duplicate errors per duplicate group and delete the duplicates."""
-        start_num = self.dfs.total_number_of_records_created
-        for duplicate_vals in dup_queryset[: settings.BULK_CREATE_BATCH_SIZE]:
-            duplicate_vals.pop("row_count", None)
-            duplicate_records = all_records.filter(**duplicate_vals).order_by(
-                "line_number"
-            )
-            record = duplicate_records.first()
-
-            self._generate_errors(
-                record, duplicate_records, duplicate_vals, schema, generate_error_msg
-            )
-            self._delete_duplicates(record, duplicate_records)
-        logger.info(
-            f"Deleted {start_num - self.dfs.total_number_of_records_created} duplicates."
-        )
+        num_groups = 0
+        for duplicate_group in duplicate_groups:
+            num_groups += 1
+            self._generate_errors(duplicate_group, generate_error_msg)
+            if self.remove_duplicate_records:
+                self._delete_duplicates(duplicate_group)
+        logger.info(f"Found {num_groups} groups of duplicate records.")
 
     def _delete_exact_dups(self):
-        """Delete exact duplicate records from the DB."""
+        """Generate errors for exact duplicate records and remove them."""
         logger.info("Deleting exact duplicates.")
-        for schemas in self.schema_manager.schema_map.values():
-            schema = schemas[0]
-
-            fields = [f.name for f in schema.fields if f.name != "BLANK"]
-            records = schema.model.objects.filter(datafile=self.datafile)
-
-            while True:
-                # We have to re-evaluate this query each time after we call _raw_delete because it changes the OFFSET
-                # that Postgres manages to help us slice the query set to avoid bringing the whole thing it into memory.
-                # This functions exactly the same as the Paginator but allows us to avoid the OFFSET problem it
-                # by caching the underlying query/DB state.
-                duplicates_vals = (
-                    records.values(*fields)
-                    .annotate(row_count=Count("line_number", distinct=True))
-                    .filter(row_count__gt=1)
-                )
-                if not duplicates_vals:
-                    break
-                self._generate_errors_and_delete_dups(
-                    records, duplicates_vals, schema, self._generate_exact_dup_error_msg
-                )
+        self._generate_dup_errors_and_delete_dups(
+            self.duplicate_index.exact_duplicates(),
+            self._generate_exact_dup_error_msg,
+        )
 
     def _delete_partial_dups(self):
-        """Delete partial duplicate records from the DB."""
+        """Generate errors for partial duplicate records and remove them."""
         # Partial duplicates are only relevant for active and closed case files
         if not self.is_active_or_closed:
             return
 
         logger.info("Deleting partial duplicates.")
-        for schemas in self.schema_manager.schema_map.values():
-            schema = schemas[0]
-            fields = schema.get_partial_dup_fields()
-            records = schema.model.objects.filter(datafile=self.datafile)
-
-            while True:
-                # We have to re-evaluate this query each time after we call _raw_delete because it changes the OFFSET
-                # that Postgres manages to help us slice the query set to avoid bringing the whole thing it into memory.
-                # This functions exactly the same as the Paginator but allows us to avoid the OFFSET problem it
-                # by caching the underlying query/DB state.
-                if schema.partial_dup_exclusion_query is not None:
-                    records = records.exclude(schema.partial_dup_exclusion_query)
-                partial_dups_values = (
-                    records.values(*fields)
-                    .annotate(row_count=Count("line_number", distinct=True))
-                    .filter(row_count__gt=1)
-                )
-
-                if not partial_dups_values:
-                    break
-
-                self._generate_errors_and_delete_dups(
-                    records,
-                    partial_dups_values,
-                    schema,
-                    self._generate_partial_dup_error_msg,
-                )
+        # Exact duplicates have already been removed unless duplicate records are kept.
+        self._generate_dup_errors_and_delete_dups(
+            self.duplicate_index.partial_duplicates(
+                ignore_exact_duplicates=self.remove_duplicate_records
+            ),
+            self._generate_partial_dup_error_msg,
+        )
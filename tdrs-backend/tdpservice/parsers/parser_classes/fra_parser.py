@@ -2,12 +2,10 @@
 
 import logging
 
-from django.db.models import Count
-
 from tdpservice.parsers.dataclasses import HeaderResult, Position
+from tdpservice.parsers.duplicates import DuplicateIndex
 from tdpservice.parsers.error_generator import (
     ErrorGeneratorArgs,
-    ErrorGeneratorFactory,
     ErrorGeneratorType,
 )
 from tdpservice.parsers.parser_classes.base_parser import BaseParser
@@ -24,10 +22,15 @@ class FRAParser(BaseParser):
 
     def __init__(self, datafile, dfs, section):
         super().__init__(datafile, dfs, section)
+        # Placeholder SSNs are allowed to repeat.
+        self.duplicate_index = DuplicateIndex(
+            track_partial_dups=False,
+            exact_dup_exclusion=lambda record: record.SSN == "999999999",
+        )
 
     def _create_header_error(self):
         """Create FRA header error and return invalid HeaderResult."""
-        generate_error = ErrorGeneratorFactory(self.datafile).get_generator(
+        generate_error = self.error_generator_factory.get_generator(
             ErrorGeneratorType.MSG_ONLY_PRECHECK, 1
         )
         generator_args = ErrorGeneratorArgs(
@@ -87,9 +90,7 @@ def parse_and_validate(self):
 
                 row_hash = hash(row)
                 if record_is_valid:
-                    self.unsaved_records.add_record(
-                        row_hash, (record, schema.model), self.current_row_num
-                    )
+                    self._add_record(record, schema, row_hash)
 
             self.bulk_create_records(1)
             self.bulk_create_errors()
@@ -126,26 +127,11 @@ def _generate_exact_dup_error_msg(
             f"{curr_line_number} is a duplicate of the record at line number {existing_line_number}."
         )
 
-    def _delete_exact_dups(self):
-        """Delete exact duplicate records from the DB."""
-        for schemas in self.schema_manager.schema_map.values():
-            schema = schemas[0]
-            fields = [f.name for f in schema.fields]
-            records = schema.model.objects.filter(datafile=self.datafile)
-
-            while True:
-                # We have to re-evaluate this query each time after we call _raw_delete because it changes the OFFSET
-                # that Postgres manages to help us slice the query set to avoid bringing the whole thing it into memory.
-                # This functions exactly the same as the Paginator but allows us to avoid the OFFSET problem it
-                # by caching the underlying query/DB state.
-                duplicate_vals = (
-                    records.exclude(SSN="999999999")
-                    .values(*fields)
-                    .annotate(row_count=Count("line_number", distinct=True))
-                    .filter(row_count__gt=1)
-                )
-                if not duplicate_vals:
-                    break
-                self._generate_errors_and_delete_dups(
-                    records, duplicate_vals, schema, self._generate_exact_dup_error_msg
-                )
+    def _delete_duplicates(self, duplicate_group):
+        """Delete the already serialized first occurrence of the provided duplicates and update total records."""
+        schema = duplicate_group.schema
+        first_records = schema.model.objects.filter(
+            datafile=self.datafile, line_number=duplicate_group.first_line_number
+        )
+        num_deleted = first_records._raw_delete(first_records.db)
+        self.dfs.total_number_of_records_created -= num_deleted
@@ -1,5 +1,6 @@
 """TANF/SSP/Tribal parser class."""
 
+import contextlib
 import logging
 
 from django.conf import settings
@@ -7,21 +8,13 @@
 from tdpservice.data_files.models import DataFile
 from tdpservice.parsers import schema_defs
 from tdpservice.parsers.case_consistency_validator import CaseConsistencyValidator
-from tdpservice.parsers.constants import (
-    HEADER_POSITION,
-    INVALID_SSN_AREA_NUMBERS,
-    INVALID_SSN_GROUP_NUMBERS,
-    INVALID_SSN_SERIAL_NUMBERS,
-    SSN_AREA_NUMBER_POSITION,
-    SSN_GROUP_NUMBER_POSITION,
-    SSN_SERIAL_NUMBER_POSITION,
-    TRAILER_POSITION,
-)
-from tdpservice.parsers.dataclasses import HeaderResult, ValidationErrorArgs
+from tdpservice.parsers.constants import HEADER_POSITION, TRAILER_POSITION
+from tdpservice.parsers.dataclasses import HeaderResult
 from tdpservice.parsers.error_generator import ErrorGeneratorArgs, ErrorGeneratorType
+from tdpservice.parsers.parallel import ParallelRowParser
 from tdpservice.parsers.parser_classes.base_parser import BaseParser
 from tdpservice.parsers.schema_defs.utils import ProgramManager
-from tdpservice.parsers.validators import category1, category2
+from tdpservice.parsers.validators import category1
 from tdpservice.parsers.validators.util import value_is_empty
 
 logger = logging.getLogger(__name__)
@@ -65,95 +58,94 @@ def parse_and_validate(self):
         file_length = len(self.datafile.file)
         offset = 0
         current_case_id = None
-        for row in self.decoder.decode():
-            offset += row.raw_length()
-            self.current_row = row
-            self.current_row_num = self.decoder.current_row_num
-
-            self.header_count += int(row.value_at_is(HEADER_POSITION, "HEADER"))
-            self.trailer_count += int(row.value_at_is(TRAILER_POSITION, "TRAILER"))
-            is_file_level_record = self.is_file_level_record(row)
-
-            is_last_line = offset == file_length
-            self.evaluate_trailer(is_last_line)
-
-            generate_error = self.error_generator_factory.get_generator(
-                ErrorGeneratorType.MSG_ONLY_PRECHECK,
-                self.current_row_num,
-            )
-
-            if self.header_count > 1:
-                logger.info(
-                    "Preparser Error -> Multiple headers found for file: "
-                    f"{self.datafile.id} on line: {self.current_row_num}."
-                )
-                generator_args = ErrorGeneratorArgs(
-                    record=None,
-                    schema=None,
-                    error_message="Multiple headers found.",
-                    fields=[],
+        with self._get_row_parser() as parse_rows:
+            for row, manager_result in parse_rows(self.decoder.decode()):
+                offset += row.raw_length()
+                self.current_row = row
+                self.current_row_num = row.row_num
+
+                self.header_count += int(row.value_at_is(HEADER_POSITION, "HEADER"))
+                self.trailer_count += int(row.value_at_is(TRAILER_POSITION, "TRAILER"))
+                is_file_level_record = self.is_file_level_record(row)
+
+                is_last_line = offset == file_length
+                self.evaluate_trailer(is_last_line)
+
+                generate_error = self.error_generator_factory.get_generator(
+                    ErrorGeneratorType.MSG_ONLY_PRECHECK,
+                    self.current_row_num,
                 )
-                err_obj = generate_error(generator_args=generator_args)
-                preparse_error = {self.current_row_num: [err_obj]}
-                self.unsaved_parser_errors = dict()
-                self.unsaved_parser_errors.update(preparse_error)
-                self.rollback_records()
-                self.rollback_parser_errors()
-                self.bulk_create_errors(flush=True)
-                return
-
-            if prev_sum != self.header_count + self.trailer_count:
-                prev_sum = self.header_count + self.trailer_count
-                continue
-
-            self.detail_rows_seen += int(not is_file_level_record)
-
-            manager_result = self.schema_manager.parse_and_validate(row)
-            records = manager_result.records
-            schemas = manager_result.schemas
-            num_records = len(records)
-
-            record_number = 0
-            for i in range(num_records):
-                r = records[i]
-                record_number += 1
-                record, record_is_valid, record_errors = r
-                if not record_is_valid:
-                    logger.debug(
-                        f"Record #{i} from line {self.current_row_num} is invalid."
-                    )
-                    self.unsaved_parser_errors.update(
-                        {f"{self.current_row_num}_{i}": record_errors}
-                    )
-                    self.num_errors += len(record_errors)
-                if record:
-                    schema = schemas[i]
-                    record.datafile = self.datafile
-                    record_has_errors = len(record_errors) > 0
-                    (
-                        should_remove,
-                        case_id_to_remove,
-                        current_case_id,
-                    ) = self.case_consistency_validator.add_record(
-                        record, schema, self.current_row_num, record_has_errors
+
+                if self.header_count > 1:
+                    logger.info(
+                        "Preparser Error -> Multiple headers found for file: "
+                        f"{self.datafile.id} on line: {self.current_row_num}."
                     )
-                    self.unsaved_records.add_record(
-                        current_case_id, (record, schema.model), self.current_row_num
+                    generator_args = ErrorGeneratorArgs(
+                        record=None,
+                        schema=None,
+                        error_message="Multiple headers found.",
+                        fields=[],
                     )
-                    self.add_case_to_remove(should_remove, case_id_to_remove)
-
-                    self.dfs.total_number_of_records_in_file += 1
-
-            # Add any generated cat4 errors to our error data structure & clear our caches errors list
-            cat4_errors = self.case_consistency_validator.get_generated_errors()
-            self.num_errors += len(cat4_errors)
-            self.unsaved_parser_errors[None] = (
-                self.unsaved_parser_errors.get(None, []) + cat4_errors
-            )
-            self.case_consistency_validator.clear_errors()
+                    err_obj = generate_error(generator_args=generator_args)
+                    preparse_error = {self.current_row_num: [err_obj]}
+                    self.unsaved_parser_errors = dict()
+                    self.unsaved_parser_errors.update(preparse_error)
+                    self.rollback_records()
+                    self.rollback_parser_errors()
+                    self.bulk_create_errors(flush=True)
+                    return
+
+                if prev_sum != self.header_count + self.trailer_count:
+                    prev_sum = self.header_count + self.trailer_count
+                    continue
+
+                self.detail_rows_seen += int(not is_file_level_record)
+
+                records = manager_result.records
+                schemas = manager_result.schemas
+                num_records = len(records)
+
+                record_number = 0
+                for i in range(num_records):
+                    r = records[i]
+                    record_number += 1
+                    record, record_is_valid, record_errors = r
+                    if not record_is_valid:
+                        logger.debug(
+                            f"Record #{i} from line {self.current_row_num} is invalid."
+                        )
+                        self.unsaved_parser_errors.update(
+                            {f"{self.current_row_num}_{i}": record_errors}
+                        )
+                        self.num_errors += len(record_errors)
+                    if record:
+                        schema = schemas[i]
+                        record.datafile = self.datafile
+                        record_has_errors = len(record_errors) > 0
+                        (
+                            should_remove,
+                            case_id_to_remove,
+                            current_case_id,
+                        ) = self.case_consistency_validator.add_record(
+                            record, schema, self.current_row_num, record_has_errors
+                        )
+                        # Duplicates are always keyed on the first schema of the record type.
+                        self._add_record(record, schemas[0], current_case_id)
+                        self.add_case_to_remove(should_remove, case_id_to_remove)
+
+                        self.dfs.total_number_of_records_in_file += 1
+
+                # Add any generated cat4 errors to our error data structure & clear our caches errors list
+                cat4_errors = self.case_consistency_validator.get_generated_errors()
+                self.num_errors += len(cat4_errors)
+                self.unsaved_parser_errors[None] = (
+                    self.unsaved_parser_errors.get(None, []) + cat4_errors
+                )
+                self.case_consistency_validator.clear_errors()
 
-            self.bulk_create_records(self.header_count)
-            self.bulk_create_errors()
+                self.bulk_create_records(self.header_count)
+                self.bulk_create_errors()
 
         if self.header_count == 0:
             logger.info(
@@ -220,13 +212,33 @@ def parse_and_validate(self):
 
         return
 
+    def _parse_rows(self, rows):
+        """Yield each row with its `ManagerPVResult`, or `None` for header and trailer rows."""
+        for row in rows:
+            if self.is_file_level_record(row):
+                yield row, None
+            else:
+                yield row, self.schema_manager.parse_and_validate(row)
+
+    def _get_row_parser(self):
+        """Return a context manager providing the function used to parse and validate the file's rows."""
+        if settings.PARSER_NUM_PROCESSES > 1:
+            return ParallelRowParser(
+                self.datafile,
+                self.schema_manager,
+                self.is_file_level_record,
+                num_processes=settings.PARSER_NUM_PROCESSES,
+                chunk_size=settings.PARSER_CHUNK_SIZE,
+            )
+        return contextlib.nullcontext(self._parse_rows)
+
     def _validate_header(self):
         """Validate header and header fields."""
         # parse & validate header
         header_row = self.decoder.get_header()
         header_row.row_num = 1
         header_schema = self.header_schema
-        header_schema.prepare(self.datafile)
+        header_schema.prepare(self.datafile, deferred_errors=self.error_writer.deferred)
         header, header_is_valid, header_errors = header_schema.parse_and_validate(
             header_row
         )
@@ -395,7 +407,9 @@ def evaluate_trailer(self, is_last_line):
             self._generate_trailer_errors(errors)
         if is_trailer_row or is_last_line:
             trailer_schema = self.trailer_schema
-            trailer_schema.prepare(self.datafile)
+            trailer_schema.prepare(
+                self.datafile, deferred_errors=self.error_writer.deferred
+            )
             (
                 record,
                 trailer_is_valid,
@@ -460,93 +474,42 @@ def is_valid_zero_record_submission(self):
             and self.detail_rows_seen == 0
         )
 
-    def _generate_funded_ssn_errors(self, t2_schema, t2_records, t1_schema):
-        """Inner function to validate and generate errors."""
-        validator = category2.ssnAllOf(
-            category2.isNumber(),
-            category2.intHasLength(9),
-            *[
-                category2.valueNotAt(SSN_AREA_NUMBER_POSITION, area_num)
-                for area_num in INVALID_SSN_AREA_NUMBERS
-            ],
-            *[
-                category2.valueNotAt(SSN_GROUP_NUMBER_POSITION, group_num)
-                for group_num in INVALID_SSN_GROUP_NUMBERS
-            ],
-            *[
-                category2.valueNotAt(SSN_SERIAL_NUMBER_POSITION, serial_num)
-                for serial_num in INVALID_SSN_SERIAL_NUMBERS
-            ],
-            error_message=(
-                "Federally funded recipients must have a valid Social Security number."
-            ),
+    def generate_funded_ssn_errors(self):
+        """Generate errors for the invalid SSNs of federally funded recipients found by the case consistency validator."""
+        invalid_funded_ssns = self.case_consistency_validator.get_invalid_funded_ssns(
+            self.serialized_cases
         )
+        if not invalid_funded_ssns:
+            return
 
+        t1_schema = next(
+            schemas[0]
+            for schemas in self.schema_manager.schema_map.values()
+            if schemas[0].record_type == "T1"
+        )
         t1_fields = [t1_schema.get_field_by_name(name) for name in ("FUNDING_STREAM",)]
-        t2_fields = [
-            t2_schema.get_field_by_name(name) for name in ("FAMILY_AFFILIATION", "SSN")
-        ]
-        fields = t1_fields + t2_fields
-        # Validate SSN for each T2 record
-        for t2_record in t2_records.iterator(
-            chunk_size=settings.BULK_CREATE_BATCH_SIZE
-        ):
-            ssn = getattr(t2_record, "SSN", None)
-            if ssn:
-                eargs = ValidationErrorArgs(
-                    value=ssn,
-                    row_schema=t2_schema,
-                    friendly_name=fields[-1].friendly_name,
-                    item_num=fields[-1].item,
-                )
-                result = validator(ssn, eargs)
-                if not result.valid:
-                    error_generator = self.error_generator_factory.get_generator(
-                        ErrorGeneratorType.VALUE_CONSISTENCY, t2_record.line_number
-                    )
-                    generator_args = ErrorGeneratorArgs(
-                        record=t2_record,
-                        schema=t2_schema,
-                        error_message=result.error_message,
-                        offending_field=fields[-1],
-                        fields=fields,
-                        deprecated=result.deprecated,
-                        row_number=t2_record.line_number,
-                    )
-                    if "funded_recipient_ssn" not in self.unsaved_parser_errors:
-                        self.unsaved_parser_errors["funded_recipient_ssn"] = []
-                    self.unsaved_parser_errors["funded_recipient_ssn"].append(
-                        error_generator(generator_args=generator_args)
-                    )
-                    self.num_errors += 1
-                    self.bulk_create_errors()
-
-    def generate_funded_ssn_errors(self):
-        """Generate SSN validation errors for T1/T2 records with specific funding stream and family affiliation."""
-        if self.section == DataFile.Section.ACTIVE_CASE_DATA:
-            t1_schema = None
-            t2_schema = None
-            for schemas in self.schema_manager.schema_map.values():
-                schema = schemas[0]
-                if schema.record_type == "T1":
-                    t1_schema = schema
-                elif schema.record_type == "T2":
-                    t2_schema = schema
-
-            if not t1_schema or not t2_schema:
-                return
-
-            # Get T1 records with FUNDING_STREAM = 1
-            t1_records = t1_schema.model.objects.filter(
-                datafile=self.datafile, FUNDING_STREAM=1
+        for t2_record, t2_schema, result in invalid_funded_ssns:
+            t2_fields = [
+                t2_schema.get_field_by_name(name)
+                for name in ("FAMILY_AFFILIATION", "SSN")
+            ]
+            fields = t1_fields + t2_fields
+            error_generator = self.error_generator_factory.get_generator(
+                ErrorGeneratorType.VALUE_CONSISTENCY, t2_record.line_number
             )
-
-            # Get T2 records with FAMILY_AFFILIATION = 1 that belong to the same cases as T1 records
-            t1_case_numbers = t1_records.values_list("CASE_NUMBER", flat=True)
-            t2_records = t2_schema.model.objects.filter(
-                datafile=self.datafile,
-                FAMILY_AFFILIATION=1,
-                CASE_NUMBER__in=t1_case_numbers,
+            generator_args = ErrorGeneratorArgs(
+                record=t2_record,
+                schema=t2_schema,
+                error_message=result.error_message,
+                offending_field=fields[-1],
+                fields=fields,
+                deprecated=result.deprecated,
+                row_number=t2_record.line_number,
             )
-
-            self._generate_funded_ssn_errors(t2_schema, t2_records, t1_schema)
+            if "funded_recipient_ssn" not in self.unsaved_parser_errors:
+                self.unsaved_parser_errors["funded_recipient_ssn"] = []
+            self.unsaved_parser_errors["funded_recipient_ssn"].append(
+                error_generator(generator_args=generator_args)
+            )
+            self.num_errors += 1
+            self.bulk_create_errors()
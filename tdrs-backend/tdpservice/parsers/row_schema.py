@@ -1,5 +1,6 @@
 """Row schema for datafile."""
 
+import functools
 import logging
 from abc import ABC, abstractmethod
 
@@ -10,6 +11,7 @@
     ValidationErrorArgs,
 )
 from tdpservice.parsers.error_generator import ErrorGeneratorFactory, ErrorGeneratorType
+from tdpservice.parsers.extractors import RowExtractor
 from tdpservice.parsers.fields import Field
 from tdpservice.parsers.util import get_record_value_by_field_name
 from tdpservice.parsers.validators.category2 import format_error_context
@@ -34,6 +36,8 @@ def __init__(
         self.record_type = record_type
         self.model = model
         self.fields = list() if not fields else fields
+        # Compiled from `fields` the first time a row is parsed.
+        self._extractor = None
         self.datafile = None
         self.error_generator_factory = None
         self.partial_dup_exclusion_query = partial_dup_exclusion_query
@@ -53,30 +57,21 @@ def parse_and_validate(self, row: RawRow) -> SchemaResult:
 
     def parse_row(self, row: RawRow):
         """Create a model for the row based on the schema."""
-        record = self.model()
+        if self._extractor is None:
+            self._extractor = RowExtractor(self.model, self.fields)
+        return self._extractor.parse_row(row)
 
-        if not isinstance(record, dict):
-            record.line_number = row.row_num
-
-        for field in self.fields:
-            value = field.parse_value(row)
-
-            if value is not None:
-                if isinstance(record, dict):
-                    record[field.name] = value
-                else:
-                    setattr(record, field.name, value)
-
-        return record
-
-    def prepare(self, datafile):
+    def prepare(self, datafile, deferred_errors=False):
         """Prepare schema to validate."""
         self.datafile = datafile
-        self.error_generator_factory = ErrorGeneratorFactory(self.datafile)
+        self.error_generator_factory = ErrorGeneratorFactory(
+            self.datafile, deferred=deferred_errors
+        )
 
     def _add_field(self, item, name, length, position, type):
         """Add a field to the schema."""
         self.fields.append(Field(item, name, type, position))
+        self._extractor = None
 
     def add_fields(self, fields: list):
         """Add multiple fields to the schema."""
@@ -99,7 +94,9 @@ def run_field_validators(self, record, row_number):
 
         for field in self.fields:
             value = get_record_value_by_field_name(record, field.name)
-            eargs = ValidationErrorArgs(
+            # Error args are only built if a validator fails.
+            eargs = functools.partial(
+                ValidationErrorArgs,
                 value=value,
                 row_schema=self,
                 friendly_name=field.friendly_name,
@@ -135,7 +132,7 @@ def run_field_validators(self, record, row_number):
                     record=record,
                     schema=self,
                     error_message=(
-                        f"{format_error_context(eargs)} "
+                        f"{format_error_context(eargs())} "
                         "field is required but a value was not provided."
                     ),
                     offending_field=field,
@@ -160,33 +157,36 @@ def run_preparsing_validators(self, row: RawRow, record):
             row_number=row.row_num,
         )
 
-        for validator in self.preparsing_validators:
-            eargs = ValidationErrorArgs(
-                value=row,
-                row_schema=self,
-                friendly_name=field.friendly_name if field else "record type",
-                item_num=field.item if field else "0",
-            )
+        eargs = ValidationErrorArgs(
+            value=row,
+            row_schema=self,
+            friendly_name=field.friendly_name if field else "record type",
+            item_num=field.item if field else "0",
+        )
+        is_quiet_preparser_errors = None
 
+        for validator in self.preparsing_validators:
             result = validator(row, eargs)
             is_valid = False if not result.valid else is_valid
 
-            is_quiet_preparser_errors = (
-                self.quiet_preparser_errors
-                if type(self.quiet_preparser_errors) is bool
-                else self.quiet_preparser_errors(row)
-            )
+            if not result.error_message:
+                continue
 
-            generator_args = ErrorGeneratorArgs(
-                record=record,
-                schema=self,
-                error_message=result.error_message,
-                offending_field=field,
-                fields=self.fields,
-                deprecated=result.deprecated,
-            )
-
-            if result.error_message and not is_quiet_preparser_errors:
+            if is_quiet_preparser_errors is None:
+                is_quiet_preparser_errors = (
+                    self.quiet_preparser_errors
+                    if type(self.quiet_preparser_errors) is bool
+                    else self.quiet_preparser_errors(row)
+                )
+            if not is_quiet_preparser_errors:
+                generator_args = ErrorGeneratorArgs(
+                    record=record,
+                    schema=self,
+                    error_message=result.error_message,
+                    offending_field=field,
+                    fields=self.fields,
+                    deprecated=result.deprecated,
+                )
                 errors.append(generate_error(generator_args=generator_args))
         return is_valid, errors
 
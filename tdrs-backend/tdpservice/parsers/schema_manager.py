@@ -17,9 +17,12 @@
 class SchemaManager:
     """Manages all RowSchema's based on a file's program type and section."""
 
-    def __init__(self, datafile, program_type, section):
+    def __init__(self, datafile, program_type, section, deferred_errors=False):
         self.datafile = datafile
-        self.error_generator_factory = ErrorGeneratorFactory(self.datafile)
+        self.deferred_errors = deferred_errors
+        self.error_generator_factory = ErrorGeneratorFactory(
+            self.datafile, deferred=deferred_errors
+        )
         self.program_type = program_type
         self.section = section
         self.is_program_audit = datafile.is_program_audit
@@ -33,7 +36,7 @@ def _init_schema_map(self):
         )
         for schemas in self.schema_map.values():
             for schema in schemas:
-                schema.prepare(self.datafile)
+                schema.prepare(self.datafile, deferred_errors=self.deferred_errors)
 
     def parse_and_validate(self, row):
         """Run `parse_and_validate` for each schema provided and bubble up errors."""
@@ -0,0 +1,132 @@
+"""Test that the parsers' aggregate counters match the aggregates queried from the database."""
+
+import pytest
+
+from tdpservice.parsers import aggregates
+from tdpservice.data_files.test.factories import DataFileFactory
+from tdpservice.parsers.models import ParserError, ParserErrorCategoryChoices
+from tdpservice.parsers.test.factories import ParserErrorFactory
+from tdpservice.parsers.test.helpers import parse_datafile
+
+
+def get_db_error_counts(datafile):
+    """Return the summary error counts of the datafile from the database."""
+    errors = ParserError.objects.filter(file=datafile, deprecated=False)
+    return {
+        "total": errors.count(),
+        "precheck": errors.filter(
+            error_type=ParserErrorCategoryChoices.PRE_CHECK
+        ).count(),
+        "record_precheck": errors.filter(
+            error_type=ParserErrorCategoryChoices.RECORD_PRE_CHECK
+        ).count(),
+        "case_consistency": errors.filter(
+            error_type=ParserErrorCategoryChoices.CASE_CONSISTENCY
+        ).count(),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("writer", ["orm", "copy"])
+@pytest.mark.parametrize(
+    "file_fixture",
+    [
+        "big_file",
+        "case_aggregates_edge_case",
+        "bad_test_file",
+        "bad_file_missing_header",
+        "big_s1_rollback_file",
+        "small_ssp_section1_datafile",
+        "tribal_section_1_inconsistency_file",
+        "tanf_section2_file",
+        "ssp_section2_file",
+    ],
+)
+def test_case_aggregates_match_db(request, dfs, settings, writer, file_fixture):
+    """Test counted case aggregates against the database for files with cat4 errors, duplicates and rollbacks."""
+    settings.BULK_CREATE_METHOD = writer
+    datafile = request.getfixturevalue(file_fixture)
+    parser = parse_datafile(dfs, datafile)
+
+    assert parser.aggregates.get_error_counts() == get_db_error_counts(datafile)
+    for status in ("Accepted with Errors", "Rejected"):
+        assert parser.aggregates.case_aggregates_by_month(
+            datafile, status
+        ) == aggregates.case_aggregates_by_month(datafile, status)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "file_fixture",
+    ["tanf_section3_file", "tanf_section4_file", "bad_tanf_section4_file"],
+)
+def test_total_errors_match_db(request, dfs, file_fixture):
+    """Test counted error totals against the database."""
+    datafile = request.getfixturevalue(file_fixture)
+    parser = parse_datafile(dfs, datafile)
+
+    assert parser.aggregates.get_error_counts() == get_db_error_counts(datafile)
+    for status in ("Accepted with Errors", "Rejected"):
+        assert parser.aggregates.total_errors_by_month(
+            datafile, status
+        ) == aggregates.total_errors_by_month(datafile, status)
+    assert parser.aggregates.fra_total_errors() == aggregates.fra_total_errors(datafile)
+
+
+@pytest.mark.django_db
+def test_total_errors_by_month_single_query(django_assert_num_queries):
+    """Test that the month breakdown is counted in one query and includes months without errors."""
+    datafile = DataFileFactory(year=2021, quarter="Q1")
+    ParserErrorFactory.create_batch(2, file=datafile, rpt_month_year=202010)
+    ParserErrorFactory(file=datafile, rpt_month_year=202012)
+    ParserErrorFactory(file=datafile, rpt_month_year=202012, deprecated=True)
+    ParserErrorFactory(file=datafile, rpt_month_year=202101)
+    ParserErrorFactory(rpt_month_year=202011)
+
+    with django_assert_num_queries(1):
+        result = aggregates.total_errors_by_month(datafile, "Accepted with Errors")
+    assert result == {
+        "months": [
+            {"month": "Oct", "total_errors": 2},
+            {"month": "Nov", "total_errors": 0},
+            {"month": "Dec", "total_errors": 1},
+        ]
+    }
+
+
+def test_parse_aggregates_count_distinct_cases():
+    """Test that cases are counted once per month however their records arrive and stop counting when removed."""
+    datafile = DataFileFactory.build(year=2021, quarter="Q1")
+    parse_aggregates = aggregates.ParseAggregates()
+    for rpt_month_year, case_number in [
+        (202010, "1"),
+        (202010, "1"),
+        (202010, "2"),
+        (202010, "1"),
+        (202011, 1),
+        (202011, None),
+        (202011, None),
+        (None, "3"),
+    ]:
+        parse_aggregates.add_record(
+            {"RPT_MONTH_YEAR": rpt_month_year, "CASE_NUMBER": case_number}
+        )
+    parse_aggregates.add_errors(
+        [
+            ParserError(rpt_month_year=202010, case_number="2", row_number=4),
+            ParserError(rpt_month_year=202011, case_number="1", row_number=5),
+            ParserError(rpt_month_year=202011, case_number=None, row_number=6),
+        ]
+    )
+    parse_aggregates.remove_cases([{"RPT_MONTH_YEAR": "202010", "CASE_NUMBER": "1"}])
+
+    assert parse_aggregates.case_aggregates_by_month(
+        datafile, "Accepted with Errors"
+    ) == {
+        "months": [
+            {"month": "Oct", "accepted_without_errors": 0, "accepted_with_errors": 1},
+            {"month": "Nov", "accepted_without_errors": 1, "accepted_with_errors": 1},
+            {"month": "Dec", "accepted_without_errors": 0, "accepted_with_errors": 0},
+        ],
+        "rejected": 0,
+    }
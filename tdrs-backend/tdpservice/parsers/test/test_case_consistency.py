@@ -1749,3 +1749,135 @@ def test_max_records_per_case_exceeded(
             "(Child + Adult) records within a given reporting month and year. All records "
             "associated with this case have been rejected."
         )
+
+        # The rest of the rejected case is neither cached nor validated again.
+        case_consistency_validator.clear_errors()
+        for _ in range(settings.MAX_NUMBER_RECORDS_PER_CASE + 1):
+            line_number += 1
+            has_errors, _, _ = case_consistency_validator.add_record(
+                T2Factory.build(RPT_MONTH_YEAR=202010, CASE_NUMBER="123"),
+                t2_schema,
+                line_number,
+                False,
+            )
+            assert has_errors is False
+        assert case_consistency_validator.sorted_cases == {}
+        assert case_consistency_validator.validate() == 0
+        assert case_consistency_validator.get_generated_errors() == []
+
+        # A new case is cached as usual.
+        line_number += 1
+        case_consistency_validator.add_record(
+            T1Factory.build(RPT_MONTH_YEAR=202010, CASE_NUMBER="456"),
+            t1_schema,
+            line_number,
+            False,
+        )
+        assert case_consistency_validator.case_is_rejected is False
+        assert len(case_consistency_validator.sorted_cases) == 1
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize(
+        "header,T1Stuff,T2Stuff,stt_type",
+        [
+            (
+                {"type": "A", "program_type": "TAN", "year": 2020, "quarter": "4"},
+                (factories.TanfT1Factory, schema_defs.tanf.t1[0]),
+                (factories.TanfT2Factory, schema_defs.tanf.t2[0]),
+                STT.EntityType.STATE,
+            ),
+            (
+                {
+                    "type": "A",
+                    "program_type": "TRIBAL",
+                    "year": 2020,
+                    "quarter": "4",
+                },
+                (factories.TribalTanfT1Factory, schema_defs.tribal_tanf.t1[0]),
+                (factories.TribalTanfT2Factory, schema_defs.tribal_tanf.t2[0]),
+                STT.EntityType.TRIBE,
+            ),
+        ],
+    )
+    def test_invalid_funded_ssns(
+        self, small_correct_file, header, T1Stuff, T2Stuff, stt_type
+    ):
+        """Test that invalid SSNs are kept for recipients of cases funded in any month that aren't removed."""
+        case_consistency_validator = CaseConsistencyValidator(
+            header,
+            header["program_type"],
+            stt_type,
+            ErrorGeneratorFactory(small_correct_file).get_generator(
+                ErrorGeneratorType.DYNAMIC_ROW_CASE_CONSISTENCY, None
+            ),
+        )
+        (T1Factory, t1_schema) = T1Stuff
+        (T2Factory, t2_schema) = T2Stuff
+
+        records = [
+            # Case 1 is only federally funded in its second month.
+            (
+                T1Factory.build(
+                    RPT_MONTH_YEAR=202010, CASE_NUMBER="1", FUNDING_STREAM=2
+                ),
+                t1_schema,
+            ),
+            (
+                T2Factory.build(
+                    RPT_MONTH_YEAR=202010, CASE_NUMBER="1", SSN="000000000"
+                ),
+                t2_schema,
+            ),
+            (
+                T1Factory.build(
+                    RPT_MONTH_YEAR=202011, CASE_NUMBER="1", FUNDING_STREAM=1
+                ),
+                t1_schema,
+            ),
+            (
+                T2Factory.build(
+                    RPT_MONTH_YEAR=202011, CASE_NUMBER="1", SSN="123456789"
+                ),
+                t2_schema,
+            ),
+            # Case 2 isn't federally funded.
+            (
+                T1Factory.build(
+                    RPT_MONTH_YEAR=202010, CASE_NUMBER="2", FUNDING_STREAM=2
+                ),
+                t1_schema,
+            ),
+            (
+                T2Factory.build(
+                    RPT_MONTH_YEAR=202010, CASE_NUMBER="2", SSN="000000000"
+                ),
+                t2_schema,
+            ),
+            # Case 3 is federally funded but removed.
+            (
+                T1Factory.build(
+                    RPT_MONTH_YEAR=202010, CASE_NUMBER="3", FUNDING_STREAM=1
+                ),
+                t1_schema,
+            ),
+            (
+                T2Factory.build(
+                    RPT_MONTH_YEAR=202010, CASE_NUMBER="3", SSN="000000000"
+                ),
+                t2_schema,
+            ),
+        ]
+        for line_number, (record, schema) in enumerate(records, start=1):
+            case_consistency_validator.add_record(record, schema, line_number, False)
+        case_consistency_validator.validate()
+
+        invalid_funded_ssns = case_consistency_validator.get_invalid_funded_ssns(
+            {util.FrozenDict(RPT_MONTH_YEAR=202010, CASE_NUMBER="3")}
+        )
+
+        assert [record for record, _, _ in invalid_funded_ssns] == [records[1][0]]
+        _, schema, result = invalid_funded_ssns[0]
+        assert schema is t2_schema
+        assert result.error_message == (
+            "Federally funded recipients must have a valid Social Security number."
+        )
@@ -1,11 +1,19 @@
 """Test the implementation of the decoders with realistic datafiles."""
 
+import csv
+import io
+import re
+import zipfile
+
 import pytest
+from django.core.files import File
+from openpyxl import Workbook, load_workbook
 
-from tdpservice.parsers.dataclasses import RawRow, TupleRow
+from tdpservice.parsers.dataclasses import BufferRow, Position, RawRow, TupleRow
 from tdpservice.parsers.decoders import (
     CsvDecoder,
     DecoderFactory,
+    MmapUtf8Decoder,
     Utf8Decoder,
     XlsxDecoder,
 )
@@ -91,3 +99,149 @@ def test_file_offset(self, small_correct_file):
             decoded_length += len(row)
         assert raw_length == len(small_correct_file.file)
         assert decoded_length != raw_length
+
+
+def row_values(decoder):
+    """Return the comparable attributes of every decoded row."""
+    return [
+        (row.data, row.raw_length(), len(row), row.row_num, row.record_type)
+        for row in decoder.decode()
+    ]
+
+
+class TestMmapUtf8Decoder:
+    """Tests for the memory mapped UTF-8 decoder."""
+
+    @pytest.mark.django_db
+    def test_factory_returns_mmap_decoder(self, small_correct_file, settings):
+        """Test the mmap decoder is selected when enabled."""
+        settings.USE_MMAP_DECODER = True
+        decoder = DecoderFactory.get_instance(small_correct_file.file)
+        assert isinstance(decoder, MmapUtf8Decoder)
+        header_row = next(decoder.decode())
+        assert isinstance(header_row, BufferRow)
+        assert header_row.data == "HEADER20204A06   TAN1 D"
+
+    @pytest.mark.django_db
+    def test_rows_match_utf8_decoder(self, small_correct_file):
+        """Test the mmap decoder yields the same rows, header and row numbers as the UTF-8 decoder."""
+        expected_decoder = Utf8Decoder(small_correct_file.file)
+        expected_header = expected_decoder.get_header()
+        expected = row_values(expected_decoder)
+
+        decoder = MmapUtf8Decoder(small_correct_file.file)
+        assert decoder._local_file is None
+        header = decoder.get_header()
+        assert (header.data, header.raw_len, header.row_num) == (
+            expected_header.data,
+            expected_header.raw_len,
+            expected_header.row_num,
+        )
+        assert row_values(decoder) == expected
+        assert decoder.current_row_num == expected_decoder.current_row_num
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            b"HEADER20204A06   TAN1 D\r\nT1202010\r\nTRAILER0000001",
+            b"HEADER20204A06   TAN1 D\nT1202010\rT2202010\r\n\nTRAILER0000001\n",
+            "HEADER20204A06   TAN1 D\nT1202010 caf\u00e9\nTRAILER\n".encode(),
+            b"",
+        ],
+    )
+    def test_line_endings_and_fallback_copy(self, content):
+        """Test files without a file descriptor are copied locally and split like the UTF-8 decoder."""
+        expected = row_values(Utf8Decoder(File(io.BytesIO(content), name="file.txt")))
+        decoder = MmapUtf8Decoder(File(io.BytesIO(content), name="file.txt"))
+        assert row_values(decoder) == expected
+        assert sum(len(r) for r in expected) <= len(content)
+
+        decoder.close()
+        if content:
+            assert decoder.buffer.closed
+            assert decoder._local_file.closed
+
+    def test_buffer_row_value_at(self):
+        """Test positions are sliced lazily and clamped to the line."""
+        buffer = b"XXT1202010\nZZ"
+        row = BufferRow(buffer, 2, 10, 9, 1, "T1")
+        assert row.value_at(Position(0, 2)) == "T1"
+        assert row.value_at(Position(6, 12)) == "10"
+        assert row.value_at(Position(20, 22)) == ""
+        assert row._data is None
+        assert row.data == "T1202010"
+        assert row[2:8] == "202010"
+        assert row == RawRow("T1202010", 9, 8, 1, "T1")
+
+
+def xlsx_file(rows, keep_dimensions=True):
+    """Return an in-memory xlsx file with `rows` in its first worksheet."""
+    work_book = Workbook()
+    for row in rows:
+        work_book.active.append(row)
+    output = io.BytesIO()
+    work_book.save(output)
+    if keep_dimensions:
+        output.seek(0)
+        return File(output, name="file.xlsx")
+
+    # Rewrite the archive without the worksheet's <dimension> element.
+    stripped = io.BytesIO()
+    with zipfile.ZipFile(output) as src, zipfile.ZipFile(stripped, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename.startswith("xl/worksheets/"):
+                data = re.sub(rb"<dimension[^>]*/>", b"", data)
+            dst.writestr(item, data)
+    stripped.seek(0)
+    return File(stripped, name="file.xlsx")
+
+
+@pytest.mark.parametrize("keep_dimensions", [True, False])
+def test_xlsx_decoder_matches_loaded_workbook(keep_dimensions):
+    """Test streamed rows are padded and numbered like a fully loaded worksheet."""
+    rows = [
+        ("202401", "946412419"),
+        (None, None),
+        ("# comment",),
+        (202402, 946412420, None, "extra"),
+        (None,),
+        ("202403",),
+    ]
+    file = xlsx_file(rows, keep_dimensions)
+    loaded = load_workbook(file, data_only=True).worksheets[0]
+    expected = list(loaded.iter_rows(values_only=True))
+
+    decoder = XlsxDecoder(file)
+    assert decoder.get_header().data == expected[0]
+    decoded = [(row.row_num, row.data) for row in decoder.decode()]
+    assert decoded == [
+        (i + 1, row)
+        for i, row in enumerate(expected)
+        if any(row) and not str(row[0]).startswith("#")
+    ]
+    assert all(len(row) == loaded.max_column for _, row in decoded)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"202401,946412419\r\n202402,946412420\r\n",
+        b"202401,946412419\n,\n# comment\n202402,946412420",
+        b'"202401","multi\r\nline"\r202402,946412420\r',
+        # A multi-byte character split across the chunk boundary.
+        b"a" * (File.DEFAULT_CHUNK_SIZE - 1) + "\u00e9,1\n2,3\n".encode(),
+    ],
+)
+def test_csv_decoder_streams_from_file(content):
+    """Test csv rows match reading the file in text mode without copying it locally."""
+    expected = list(csv.reader(io.TextIOWrapper(io.BytesIO(content), encoding="utf-8")))
+
+    decoder = CsvDecoder(File(io.BytesIO(content), name="fra.csv"), encoding="utf-8")
+    assert list(decoder.get_header().data) == expected[0]
+    decoded = [(row.row_num, list(row.data)) for row in decoder.decode()]
+    assert decoded == [
+        (i + 1, row)
+        for i, row in enumerate(expected)
+        if any(row) and not row[0].startswith("#")
+    ]
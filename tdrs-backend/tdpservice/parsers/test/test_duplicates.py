@@ -0,0 +1,155 @@
+"""Test the in-memory duplicate detection used by the parsers."""
+
+import pytest
+from django.db.models import Q
+
+from tdpservice.parsers import schema_defs
+from tdpservice.parsers.duplicates import DuplicateIndex
+from tdpservice.parsers.test import factories
+from tdpservice.parsers.util import record_matches_query
+
+
+@pytest.fixture
+def t2_schema():
+    """Return the first TANF T2 schema."""
+    return schema_defs.tanf.t2[0]
+
+
+def build_t2(line_number, **kwargs):
+    """Build an unsaved T2 record on the given line."""
+    return factories.TanfT2Factory.build(line_number=line_number, **kwargs)
+
+
+@pytest.mark.django_db
+def test_exact_duplicates(t2_schema):
+    """Test that exact duplicates are grouped with the first record's line number."""
+    index = DuplicateIndex(track_partial_dups=False)
+    assert index.add(build_t2(1), t2_schema) is False
+    assert index.add(build_t2(2, SSN="2"), t2_schema) is False
+    assert index.add(build_t2(3), t2_schema) is True
+    assert index.add(build_t2(4), t2_schema) is True
+
+    groups = list(index.exact_duplicates())
+    assert len(groups) == 1
+    group = groups[0]
+    assert group.record_type == "T2"
+    assert group.first_line_number == 1
+    assert [r.line_number for r in group.offending_records] == [3, 4]
+    assert list(index.partial_duplicates()) == []
+
+
+@pytest.mark.django_db
+def test_same_line_records_are_not_duplicates(t2_schema):
+    """Test that identical records from the same line are not considered duplicates."""
+    index = DuplicateIndex()
+    assert index.add(build_t2(1), t2_schema) is False
+    assert index.add(build_t2(1), t2_schema) is False
+
+    assert list(index.exact_duplicates()) == []
+    assert list(index.partial_duplicates()) == []
+
+
+@pytest.mark.django_db
+def test_partial_duplicates(t2_schema):
+    """Test partial duplicates are found after exact duplicate groups are removed."""
+    index = DuplicateIndex()
+    index.add(build_t2(1), t2_schema)
+    index.add(build_t2(2), t2_schema)
+    index.add(build_t2(3, CASE_NUMBER="2"), t2_schema)
+    index.add(build_t2(4, CASE_NUMBER="2", EDUCATION_LEVEL="99"), t2_schema)
+
+    exact = list(index.exact_duplicates())
+    assert [(g.first_line_number, len(g.offending_records)) for g in exact] == [(1, 1)]
+
+    partial = list(index.partial_duplicates())
+    assert len(partial) == 1
+    assert partial[0].first_line_number == 3
+    assert [r.line_number for r in partial[0].offending_records] == [4]
+
+    # When exact duplicates are kept, they are also partial duplicates.
+    partial = list(index.partial_duplicates(ignore_exact_duplicates=False))
+    assert sorted(g.first_line_number for g in partial) == [1, 3]
+
+
+@pytest.mark.django_db
+def test_partial_dup_exclusion_query(t2_schema):
+    """Test that records matching the schema's exclusion query are never partial duplicates."""
+    index = DuplicateIndex()
+    index.add(build_t2(1, FAMILY_AFFILIATION=5), t2_schema)
+    assert index.add(build_t2(2, FAMILY_AFFILIATION=5, SSN="2"), t2_schema) is False
+
+    assert list(index.partial_duplicates()) == []
+
+
+@pytest.mark.django_db
+def test_exact_dup_exclusion(t2_schema):
+    """Test that excluded records are never exact duplicates."""
+    index = DuplicateIndex(
+        track_partial_dups=False,
+        exact_dup_exclusion=lambda record: record.SSN == "999999999",
+    )
+    index.add(build_t2(1, SSN="999999999"), t2_schema)
+    assert index.add(build_t2(2, SSN="999999999"), t2_schema) is False
+
+    assert list(index.exact_duplicates()) == []
+
+
+@pytest.mark.django_db
+def test_offending_records_have_db_types(t2_schema):
+    """Test that offending records hold the values they would have if loaded from the database."""
+    index = DuplicateIndex(track_partial_dups=False)
+    index.add(build_t2(1, EDUCATION_LEVEL=12), t2_schema)
+    index.add(build_t2(2, EDUCATION_LEVEL=12), t2_schema)
+
+    group = next(index.exact_duplicates())
+    assert group.offending_records[0].EDUCATION_LEVEL == "12"
+
+
+@pytest.mark.django_db
+def test_keys_use_db_types(t2_schema):
+    """Test that records are duplicates when their values are equal once stored in the database."""
+    index = DuplicateIndex(track_partial_dups=False)
+    index.add(build_t2(1, EDUCATION_LEVEL=12), t2_schema)
+    assert index.add(build_t2(2, EDUCATION_LEVEL="12"), t2_schema) is True
+
+
+@pytest.mark.django_db
+def test_offending_records_keep_parsed_values(t2_schema):
+    """Test that grouping coerces copies of the offending records and leaves the parsed records untouched."""
+    index = DuplicateIndex(track_partial_dups=False)
+    index.add(build_t2(1, EDUCATION_LEVEL=12, FAMILY_AFFILIATION="x"), t2_schema)
+    record = build_t2(2, EDUCATION_LEVEL=12, FAMILY_AFFILIATION="x")
+    index.add(record, t2_schema)
+
+    (group,) = index.exact_duplicates()
+    (offending_record,) = group.offending_records
+
+    assert offending_record is not record
+    assert offending_record.line_number == 2
+    assert offending_record.EDUCATION_LEVEL == "12"
+    # Values the field can't convert are kept as parsed.
+    assert offending_record.FAMILY_AFFILIATION == "x"
+    assert record.EDUCATION_LEVEL == 12
+
+
+@pytest.mark.parametrize(
+    "query,record,expected",
+    [
+        (Q(FAMILY_AFFILIATION__in=(3, 5)), {"FAMILY_AFFILIATION": 3}, True),
+        (Q(FAMILY_AFFILIATION__in=(3, 5)), {"FAMILY_AFFILIATION": 1}, False),
+        (Q(FAMILY_AFFILIATION__in=(3, 5)), {"FAMILY_AFFILIATION": None}, False),
+        (Q(SSN="1"), {"SSN": "1"}, True),
+        (~Q(SSN="1"), {"SSN": "1"}, False),
+        (Q(SSN="1") | Q(SSN="2"), {"SSN": "2"}, True),
+        (Q(SSN="1") & Q(CASE_NUMBER="2"), {"SSN": "1", "CASE_NUMBER": "3"}, False),
+    ],
+)
+def test_record_matches_query(query, record, expected):
+    """Test in-memory evaluation of simple Q objects."""
+    assert record_matches_query(record, query) is expected
+
+
+def test_record_matches_query_unsupported_lookup():
+    """Test that unsupported lookups raise."""
+    with pytest.raises(ValueError):
+        record_matches_query({"SSN": "1"}, Q(SSN__startswith="1"))
@@ -0,0 +1,91 @@
+"""Test the classification of ParserErrors into priorities."""
+
+from django.core.management import call_command
+
+import pytest
+
+from tdpservice.data_files.parser_error_choices import (
+    ParserErrorCategoryChoices,
+    ParserErrorPriorityChoices,
+)
+from tdpservice.parsers.error_priority import (
+    get_error_priority,
+    get_error_priority_expression,
+)
+from tdpservice.parsers.models import ParserError
+from tdpservice.parsers.test.factories import ParserErrorFactory
+from tdpservice.parsers.test.helpers import parse_datafile
+
+
+@pytest.mark.parametrize(
+    "error_type,field_name,field_names,priority",
+    [
+        (ParserErrorCategoryChoices.PRE_CHECK, None, set(), "CRITICAL"),
+        (ParserErrorCategoryChoices.CASE_CONSISTENCY, None, set(), "CRITICAL"),
+        (ParserErrorCategoryChoices.RECORD_PRE_CHECK, None, set(), "STANDARD"),
+        ("2", "CLOSURE_REASON", {"CLOSURE_REASON"}, "CRITICAL"),
+        ("2", "SSN", {"SSN"}, "STANDARD"),
+        ("3", None, {"WORK_ELIGIBLE_INDICATOR", "SSN", "RPT_MONTH_YEAR"}, "CRITICAL"),
+        ("3", None, {"WORK_ELIGIBLE_INDICATOR"}, "STANDARD"),
+        ("2", "CITIZENSHIP_STATUS", {"FAMILY_AFFILIATION", "SSN"}, "CRITICAL"),
+    ],
+)
+def test_get_error_priority(error_type, field_name, field_names, priority):
+    """Test the priority of errors by type and fields."""
+    assert get_error_priority(
+        error_type, field_name, frozenset(field_names)
+    ) == getattr(ParserErrorPriorityChoices, priority)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("writer", ["orm", "copy"])
+@pytest.mark.parametrize(
+    "file_fixture",
+    [
+        "big_file",
+        "bad_test_file",
+        "small_ssp_section1_datafile",
+        "tribal_section_1_inconsistency_file",
+        "tanf_section2_file",
+    ],
+)
+def test_stored_priority_matches_db_expression(
+    request, dfs, settings, writer, file_fixture
+):
+    """Test that the priority stored at creation is the priority the backfill computes."""
+    settings.BULK_CREATE_METHOD = writer
+    datafile = request.getfixturevalue(file_fixture)
+    parse_datafile(dfs, datafile)
+
+    errors = ParserError.objects.filter(file=datafile).annotate(
+        computed_priority=get_error_priority_expression()
+    )
+    assert errors.exists()
+    for error in errors:
+        assert error.priority == error.computed_priority
+
+
+@pytest.mark.django_db
+def test_backfill_parser_error_priority(settings):
+    """Test that the command sets the priority of errors stored without one across batches."""
+    settings.BULK_CREATE_BATCH_SIZE = 2
+    critical = ParserErrorFactory.create_batch(
+        3, error_type=ParserErrorCategoryChoices.PRE_CHECK
+    )
+    standard = ParserErrorFactory.create_batch(
+        2, error_type=ParserErrorCategoryChoices.FIELD_VALUE, field_name="SSN"
+    )
+    assert not ParserError.objects.exclude(priority=None).exists()
+
+    call_command("backfill_parser_error_priority")
+
+    assert set(
+        ParserError.objects.filter(
+            priority=ParserErrorPriorityChoices.CRITICAL
+        ).values_list("id", flat=True)
+    ) == {error.id for error in critical}
+    assert set(
+        ParserError.objects.filter(
+            priority=ParserErrorPriorityChoices.STANDARD
+        ).values_list("id", flat=True)
+    ) == {error.id for error in standard}
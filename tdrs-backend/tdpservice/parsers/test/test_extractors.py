@@ -0,0 +1,148 @@
+"""Test that compiled row extractors parse rows exactly like their fields do."""
+
+from pathlib import Path
+
+import pytest
+
+from tdpservice.parsers import schema_defs
+from tdpservice.parsers.dataclasses import BufferRow, FieldType, RawRow
+from tdpservice.parsers.extractors import RowExtractor
+from tdpservice.parsers.fields import Field, TransformField
+
+DATA_DIR = Path(__file__).parent.joinpath("data")
+
+SCHEMAS = {
+    "T1": schema_defs.tanf.t1,
+    "T2": schema_defs.tanf.t2,
+    "T3": schema_defs.tanf.t3,
+    "M1": schema_defs.ssp.m1,
+    "M2": schema_defs.ssp.m2,
+    "M3": schema_defs.ssp.m3,
+}
+
+
+def parse_by_field(schema, row):
+    """Parse the row one field at a time, the way `RowSchema.parse_row` used to."""
+    values = dict()
+    for field in schema.fields:
+        value = field.parse_value(row)
+        if value is not None:
+            values[field.name] = value
+    return values
+
+
+def make_rows(line, row_num=1):
+    """Return the line as a `RawRow` and as a `BufferRow`."""
+    raw = line.encode()
+    return [
+        RawRow(
+            data=line,
+            raw_len=len(raw),
+            decoded_len=len(line),
+            row_num=row_num,
+            record_type=line[:2],
+        ),
+        BufferRow(raw, 0, len(raw), len(raw), row_num, line[:2]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "filename",
+    ["small_tanf_section1.txt", "small_ssp_section1.txt", "tanf_section1_blanks.txt"],
+)
+def test_extractor_matches_fields(filename):
+    """Test that every schema parses fixture rows into the same values and records as its fields."""
+    with open(DATA_DIR.joinpath(filename)) as f:
+        lines = f.read().splitlines()
+
+    for row_num, line in enumerate(lines, start=1):
+        for schema in SCHEMAS.get(line[:2], []):
+            for row in make_rows(line, row_num):
+                expected = parse_by_field(schema, row)
+                assert (
+                    RowExtractor(schema.model, schema.fields).extract(row) == expected
+                )
+
+                record = schema.parse_row(row)
+                assert record.line_number == row_num
+                for name, value in expected.items():
+                    assert getattr(record, name) == value
+
+
+def test_extractor_handles_short_rows_and_bad_integers():
+    """Test that short, empty, and non-numeric values are skipped like `Field.parse_value` does."""
+    fields = [
+        Field(
+            item=1,
+            name="alpha",
+            friendly_name="alpha",
+            type=FieldType.ALPHA_NUMERIC,
+            startIndex=0,
+            endIndex=2,
+        ),
+        Field(
+            item=2,
+            name="number",
+            friendly_name="number",
+            type=FieldType.NUMERIC,
+            startIndex=2,
+            endIndex=4,
+        ),
+        Field(
+            item=3,
+            name="blank",
+            friendly_name="blank",
+            type=FieldType.NUMERIC,
+            startIndex=4,
+            endIndex=6,
+        ),
+        TransformField(
+            lambda value, suffix: value + suffix,
+            item=4,
+            name="transformed",
+            friendly_name="transformed",
+            type=FieldType.ALPHA_NUMERIC,
+            startIndex=6,
+            endIndex=8,
+            suffix="!",
+        ),
+        Field(
+            item=5,
+            name="short",
+            friendly_name="short",
+            type=FieldType.ALPHA_NUMERIC,
+            startIndex=8,
+            endIndex=12,
+        ),
+    ]
+    extractor = RowExtractor(dict, fields)
+
+    for row in make_rows("abX1##cdef"):
+        assert extractor.parse_row(row) == {"alpha": "ab", "transformed": "cd!"}
+
+    # Transform kwargs are read when the row is parsed.
+    fields[3].kwargs["suffix"] = "?"
+    for row in make_rows("ab12__cd"):
+        assert extractor.parse_row(row) == {
+            "alpha": "ab",
+            "number": 12,
+            "transformed": "cd?",
+        }
+
+
+def test_extractor_wraps_transform_errors():
+    """Test that transform failures raise the same error as `TransformField.parse_value`."""
+    field = TransformField(
+        lambda value: int(value),
+        item=1,
+        name="bad",
+        friendly_name="bad",
+        type=FieldType.NUMERIC,
+        startIndex=0,
+        endIndex=2,
+    )
+    extractor = RowExtractor(dict, [field])
+    with pytest.raises(
+        ValueError, match="Error transforming field value for field: bad."
+    ):
+        extractor.parse_row(make_rows("ab")[0])
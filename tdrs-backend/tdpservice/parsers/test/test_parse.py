@@ -372,6 +372,8 @@ def test_parse_precheck_header_errors(
 
         if expected.get("status"):
             assert dfs.get_status() == expected["status"]
+        # Records created before the failure are rolled back and no longer counted.
+        assert dfs.total_number_of_records_created == 0
 
         parser_errors = ParserError.objects.filter(file=datafile).order_by("id")
         assert parser_errors.count() == expected["count"]
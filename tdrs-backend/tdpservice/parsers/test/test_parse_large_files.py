@@ -2,22 +2,48 @@
 
 import pytest
 
-from tdpservice.parsers import aggregates
+from tdpservice.parsers import aggregates, util
 from tdpservice.parsers.models import (
     DataFileSummary,
     ParserError,
     ParserErrorCategoryChoices,
 )
+from tdpservice.parsers.test.factories import DataFileSummaryFactory
 from tdpservice.parsers.test.helpers import parse_datafile
 from tdpservice.search_indexes.models.tanf import TANF_T1, TANF_T2, TANF_T3
 
 
+def get_parse_output(datafile):
+    """Return the records and errors created for the datafile without their generated ids."""
+    output = {}
+    for model in (TANF_T1, TANF_T2, TANF_T3):
+        records = model.objects.filter(datafile=datafile).values()
+        output[model] = sorted(
+            (
+                {k: v for k, v in r.items() if k not in ("id", "datafile_id")}
+                for r in records
+            ),
+            key=repr,
+        )
+    errors = ParserError.objects.filter(file=datafile).order_by("id").values()
+    output[ParserError] = [
+        {
+            k: v
+            for k, v in e.items()
+            if k not in ("id", "file_id", "object_id", "created_at")
+        }
+        for e in errors
+    ]
+    return output
+
+
 class TestParseLargeFiles:
     """Tests for large and long-running parse scenarios."""
 
-    @pytest.fixture
-    def parsed_big_file(self, big_file, dfs):
-        """Return parsed big_file and its DataFileSummary."""
+    @pytest.fixture(params=["orm", "copy"])
+    def parsed_big_file(self, request, big_file, dfs, settings):
+        """Return parsed big_file and its DataFileSummary for each record writer."""
+        settings.BULK_CREATE_METHOD = request.param
         big_file.year = 2022
         big_file.quarter = "Q1"
         big_file.save()
@@ -63,10 +89,44 @@ def test_big_file_record_counts(self, parsed_big_file):
         assert TANF_T2.objects.count() == 882
         assert TANF_T3.objects.count() == 1376
 
+    @pytest.mark.django_db
+    @pytest.mark.parametrize("bulk_create_method", ["orm", "copy"])
+    def test_parallel_parse_matches_serial(
+        self, big_file, dfs, stt_user, stt, settings, bulk_create_method
+    ):
+        """Test that parsing in multiple processes creates the same records, errors and counts as parsing serially."""
+        settings.BULK_CREATE_METHOD = bulk_create_method
+        big_file.year = 2022
+        big_file.quarter = "Q1"
+        big_file.save()
+        parse_datafile(dfs, big_file)
+
+        parallel_file = util.create_test_datafile(
+            "ADS.E2J.FTP1.TS06", stt_user, stt, year=2022
+        )
+        parallel_dfs = DataFileSummaryFactory.create()
+        settings.PARSER_NUM_PROCESSES = 2
+        settings.PARSER_CHUNK_SIZE = 50
+        parse_datafile(parallel_dfs, parallel_file)
+
+        assert get_parse_output(parallel_file) == get_parse_output(big_file)
+        assert (
+            parallel_dfs.total_number_of_records_in_file
+            == dfs.total_number_of_records_in_file
+        )
+        assert (
+            parallel_dfs.total_number_of_records_created
+            == dfs.total_number_of_records_created
+        )
+
     @pytest.mark.django_db
     @pytest.mark.skip(reason="long runtime")
-    def test_parse_super_big_s1_file(self, super_big_s1_file, dfs):
+    @pytest.mark.parametrize("num_processes", [1, 4])
+    def test_parse_super_big_s1_file(
+        self, super_big_s1_file, dfs, settings, num_processes
+    ):
         """Test parsing super_big_s1_file and validate all records are created."""
+        settings.PARSER_NUM_PROCESSES = num_processes
         super_big_s1_file.year = 2023
         super_big_s1_file.quarter = "Q2"
         super_big_s1_file.save()
@@ -109,3 +169,4 @@ def test_parse_big_s1_file_with_rollback(self, big_s1_rollback_file, dfs):
         assert TANF_T1.objects.count() == 0
         assert TANF_T2.objects.count() == 0
         assert TANF_T3.objects.count() == 0
+        assert dfs.total_number_of_records_created == 0
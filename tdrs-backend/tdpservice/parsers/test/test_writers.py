@@ -0,0 +1,250 @@
+"""Tests for the parser record writers."""
+
+import uuid
+
+import pytest
+
+from tdpservice.data_files.models import create_or_update_shadow_data_file
+from tdpservice.parsers.dataclasses import ErrorGeneratorArgs, FieldType
+from tdpservice.parsers.error_generator import (
+    DeferredParserError,
+    ErrorGeneratorFactory,
+    ErrorGeneratorType,
+)
+from tdpservice.parsers.fields import Field
+from tdpservice.parsers.models import (
+    ParserError,
+    ParserErrorCategoryChoices,
+    ShadowParserError,
+)
+from tdpservice.parsers.row_schema import TanfDataReportSchema
+from tdpservice.parsers.writers import (
+    CopyParserErrorWriter,
+    CopyRecordWriter,
+    OrmParserErrorWriter,
+    OrmRecordWriter,
+    ParserErrorWriterFactory,
+    RecordWriterFactory,
+    _escape_copy_value,
+    delete_rows_by_keys,
+)
+from tdpservice.search_indexes.models.tanf import TANF_T1
+
+
+class TestRecordWriterFactory:
+    """Tests for record writer selection."""
+
+    @pytest.mark.parametrize(
+        "writer_type, expected",
+        [
+            ("orm", OrmRecordWriter),
+            ("ORM", OrmRecordWriter),
+            ("copy", CopyRecordWriter),
+        ],
+    )
+    def test_get_instance(self, writer_type, expected):
+        """Return the writer matching the configured type."""
+        assert isinstance(RecordWriterFactory.get_instance(writer_type), expected)
+
+    def test_get_instance_unknown_raises(self):
+        """Raise when the writer type is unknown."""
+        with pytest.raises(ValueError):
+            RecordWriterFactory.get_instance("unknown")
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, "\\N"),
+        (True, "t"),
+        (False, "f"),
+        (12, "12"),
+        ("a\tb\nc\\d\re", "a\\tb\\nc\\\\d\\re"),
+        ({"a": 1}, '{"a": 1}'),
+    ],
+)
+def test_escape_copy_value(value, expected):
+    """Values are rendered in Postgres COPY text format."""
+    assert _escape_copy_value(value) == expected
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("writer_class", [OrmRecordWriter, CopyRecordWriter])
+def test_writers_persist_identical_records(writer_class, small_correct_file):
+    """Both writers persist the same field values."""
+    records = [
+        TANF_T1(
+            id=uuid.uuid4(),
+            datafile=small_correct_file,
+            line_number=i + 2,
+            RecordType="T1",
+            RPT_MONTH_YEAR=202010,
+            CASE_NUMBER=f"11111111{i}",
+            FUNDING_STREAM=1,
+            ZIP_CODE=None,
+        )
+        for i in range(3)
+    ]
+
+    num_written = writer_class().write(TANF_T1, records)
+
+    assert num_written == 3
+    saved = TANF_T1.objects.filter(datafile=small_correct_file).order_by("line_number")
+    assert [(r.id, r.line_number, r.CASE_NUMBER, r.ZIP_CODE) for r in saved] == [
+        (r.id, r.line_number, r.CASE_NUMBER, None) for r in records
+    ]
+
+
+@pytest.mark.django_db
+def test_copy_writer_empty_records():
+    """No COPY is issued when there is nothing to write."""
+    assert CopyRecordWriter().write(TANF_T1, []) == 0
+
+
+@pytest.mark.django_db
+def test_delete_rows_by_keys(small_correct_file):
+    """Only rows of the datafile matching one of the keys are deleted."""
+    records = [
+        TANF_T1(
+            id=uuid.uuid4(),
+            datafile=small_correct_file,
+            line_number=i + 2,
+            RecordType="T1",
+            RPT_MONTH_YEAR=202010 + i % 2,
+            CASE_NUMBER=f"11111111{i}",
+        )
+        for i in range(4)
+    ]
+    OrmRecordWriter().write(TANF_T1, records)
+
+    keys = [(202010, "111111110"), (202011, "111111111"), (202010, "111111113")]
+    num_deleted = delete_rows_by_keys(
+        TANF_T1,
+        ("RPT_MONTH_YEAR", "CASE_NUMBER"),
+        keys,
+        datafile_id=small_correct_file.pk,
+    )
+
+    assert num_deleted == 2
+    remaining = TANF_T1.objects.filter(datafile=small_correct_file)
+    assert sorted(remaining.values_list("CASE_NUMBER", flat=True)) == [
+        "111111112",
+        "111111113",
+    ]
+    assert delete_rows_by_keys(TANF_T1, ("RecordType",), []) == 0
+
+
+class TestParserErrorWriters:
+    """Tests for the parser error writers."""
+
+    @pytest.fixture
+    def generator_args(self):
+        """Return args for a field value error."""
+        schema = TanfDataReportSchema(
+            record_type="T1",
+            model=TANF_T1,
+            fields=[
+                Field(
+                    item="6",
+                    name="CASE_NUMBER",
+                    friendly_name="Case Number",
+                    type=FieldType.ALPHA_NUMERIC,
+                    startIndex=8,
+                    endIndex=19,
+                )
+            ],
+        )
+        record = TANF_T1(id=uuid.uuid4(), RPT_MONTH_YEAR=202010, CASE_NUMBER="11111111")
+        return ErrorGeneratorArgs(
+            record=record,
+            schema=schema,
+            error_message="Invalid case number.",
+            offending_field=schema.fields[0],
+            fields=schema.fields,
+        )
+
+    def test_factory(self):
+        """Return the error writer matching the configured type."""
+        assert isinstance(
+            ParserErrorWriterFactory.get_instance("orm"), OrmParserErrorWriter
+        )
+        writer = ParserErrorWriterFactory.get_instance("copy", ShadowParserError)
+        assert isinstance(writer, CopyParserErrorWriter)
+        assert writer.deferred is True
+        assert writer.parser_error_model is ShadowParserError
+
+    @pytest.mark.django_db
+    def test_deferred_error_matches_model_error(
+        self, small_correct_file, generator_args
+    ):
+        """Deferred errors expose the same values as eagerly built ParserErrors."""
+        eager = ErrorGeneratorFactory(small_correct_file).get_generator(
+            ErrorGeneratorType.FIELD_VALUE, 3
+        )(generator_args)
+        deferred = ErrorGeneratorFactory(
+            small_correct_file, deferred=True
+        ).get_generator(ErrorGeneratorType.FIELD_VALUE, 3)(generator_args)
+
+        assert isinstance(deferred, DeferredParserError)
+        for name in (
+            "row_number",
+            "item_number",
+            "field_name",
+            "rpt_month_year",
+            "case_number",
+            "error_message",
+            "error_type",
+            "object_id",
+            "fields_json",
+            "values_json",
+        ):
+            assert getattr(deferred, name) == getattr(eager, name)
+        assert deferred.content_type_id == eager.content_type.pk
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize(
+        "writer_class", [OrmParserErrorWriter, CopyParserErrorWriter]
+    )
+    def test_writers_persist_identical_errors(
+        self, writer_class, small_correct_file, generator_args
+    ):
+        """Both writers persist eager and deferred errors identically."""
+        errors = [
+            ErrorGeneratorFactory(small_correct_file, deferred=deferred).get_generator(
+                ErrorGeneratorType.FIELD_VALUE, 3
+            )(generator_args)
+            for deferred in (False, True)
+        ]
+
+        assert writer_class().write(errors) == 2
+
+        saved = ParserError.objects.filter(file=small_correct_file)
+        assert saved.count() == 2
+        for error in saved:
+            assert error.created_at is not None
+            assert error.error_type == ParserErrorCategoryChoices.FIELD_VALUE
+            assert error.fields_json == {
+                "friendly_name": {"CASE_NUMBER": "Case Number"},
+                "item_numbers": {"CASE_NUMBER": "6"},
+            }
+            assert error.values_json == {"CASE_NUMBER": "11111111"}
+
+    @pytest.mark.django_db
+    def test_copy_writer_shadow_parser_error(self, small_correct_file):
+        """The COPY writer targets the shadow error table when configured to."""
+        shadow_file = create_or_update_shadow_data_file(small_correct_file)
+        error = ErrorGeneratorFactory(shadow_file, deferred=True).get_generator(
+            ErrorGeneratorType.MSG_ONLY_PRECHECK, 1
+        )(
+            ErrorGeneratorArgs(
+                record=None, schema=None, error_message="No records created."
+            )
+        )
+
+        assert CopyParserErrorWriter(ShadowParserError).write([error]) == 1
+
+        saved = ShadowParserError.objects.get(file=shadow_file)
+        assert saved.error_message == "No records created."
+        assert saved.fields_json == {}
+        assert saved.values_json == {}
+        assert not ParserError.objects.filter(file_id=shadow_file.pk).exists()
@@ -1,16 +1,21 @@
 """Utility file for functions shared between all parsers even preparser."""
 
 import logging
+import sqlite3
 from datetime import datetime
 from pathlib import Path
 
 from django.contrib.admin.models import ADDITION
+from django.db.models import Q
 
 from tdpservice.core.utils import log
 from tdpservice.data_files.models import DataFile
 
 logger = logging.getLogger(__name__)
 
+# Most memory the page cache of a parser's temporary store may use, the rest is spilled to the store's temporary file.
+TEMP_STORE_CACHE_SIZE_KIB = 64 * 1024
+
 
 def create_test_datafile(
     filename,
@@ -126,12 +131,13 @@ def __init__(self):
         self.cases = dict()
 
     def add_record(self, case_id, record_model_pair, line_num):
-        """Add a record_doc_pair to the dict."""
+        """Add a record_doc_pair to the dict and return whether it was added."""
         record, model = record_model_pair
         if case_id is not None:
             self.cases.setdefault(model, []).append(record)
-        else:
-            logger.error(f"Error: Case id for record at line #{line_num} was None!")
+            return True
+        logger.error(f"Error: Case id for record at line #{line_num} was None!")
+        return False
 
     def get_bulk_create_struct(self):
         """Return dict of form {document: {record: None}} for bulk_create_records to consume."""
@@ -173,6 +179,47 @@ def get_record_value_by_field_name(record, field_name):
     )
 
 
+def record_matches_query(record, query):
+    """Evaluate a simple `Q` object against an in-memory record.
+
+    Only exact and `__in` lookups are supported. As with SQL, a null value never matches a lookup.
+    """
+    results = []
+    for child in query.children:
+        if isinstance(child, Q):
+            results.append(record_matches_query(record, child))
+            continue
+
+        lookup, expected = child
+        field_name, _, lookup_type = lookup.partition("__")
+        value = get_record_value_by_field_name(record, field_name)
+        if value is None:
+            results.append(False)
+        elif lookup_type == "in":
+            results.append(value in expected)
+        elif lookup_type in ("", "exact"):
+            results.append(value == expected)
+        else:
+            raise ValueError(f"Unsupported lookup for in-memory evaluation: {lookup}.")
+
+    matches = any(results) if query.connector == Q.OR else all(results)
+    return not matches if query.negated else matches
+
+
+def open_temp_store():
+    """Open a private SQLite database for state that grows with the file, e.g. the keys of every parsed record.
+
+    The database lives in a temporary file that is deleted when the connection is closed, and its page cache is
+    capped at `TEMP_STORE_CACHE_SIZE_KIB`, so memory stays bounded however large the file is.
+    """
+    # An empty file name opens a database in a temporary file.
+    db = sqlite3.connect("", check_same_thread=False)
+    db.execute(f"PRAGMA cache_size = -{TEMP_STORE_CACHE_SIZE_KIB}")
+    db.execute("PRAGMA journal_mode = OFF")
+    db.execute("PRAGMA synchronous = OFF")
+    return db
+
+
 def log_parser_exception(datafile, error_msg, level):
     """Log to DAC and console on parser exception."""
     context = {
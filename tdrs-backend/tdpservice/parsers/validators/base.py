@@ -6,33 +6,36 @@
 from .util import _is_empty
 
 
-def _handle_cast(val, cast):
-    return cast(val)
-
-
-def _handle_kwargs(val, **kwargs):
-    if "cast" in kwargs and kwargs["cast"] is not None:
-        val = _handle_cast(val, kwargs["cast"])
-
-    return val
-
-
 def base_validator(makeValidator):
-    """Wrap validator funcs to handle kwargs."""
+    """Wrap validator funcs to handle kwargs.
+
+    Kwargs are resolved once, when the validator is created, rather than on every call.
+    """
 
     @functools.wraps(makeValidator)
     def _validator(*args, **kwargs):
         validator = makeValidator(*args, **kwargs)
 
-        def _validate(val):
-            val = _handle_kwargs(val, **kwargs)
-            return validator(val)
-
-        return _validate
+        cast = kwargs.get("cast", None)
+        if cast is None:
+            return validator
+        return lambda val: validator(cast(val))
 
     return _validator
 
 
+def _freeze_options(options):
+    """Return the options as a frozenset with any "start-end" range options expanded to their integers."""
+    frozen = set()
+    for option in options:
+        if isinstance(option, str) and "-" in option:
+            start, end = option.split("-")
+            frozen.update(range(int(start), int(end) + 1))
+        else:
+            frozen.add(option)
+    return frozenset(frozen)
+
+
 @base_validator
 def isEqual(option, **kwargs):
     """Return a function that tests if an input param is equal to option."""
@@ -48,22 +51,14 @@ def isNotEqual(option, **kwargs):
 @base_validator
 def isOneOf(options, **kwargs):
     """Return a function that tests if an input param is one of options."""
-
-    def check_option(value):
-        # split the option if it is a range and append the range to the options
-        for option in options:
-            if "-" in str(option):
-                start, end = option.split("-")
-                options.extend([i for i in range(int(start), int(end) + 1)])
-                options.remove(option)
-        return value in options
-
-    return lambda val: check_option(val)
+    options = _freeze_options(options)
+    return lambda val: val in options
 
 
 @base_validator
 def isNotOneOf(options, **kwargs):
     """Return a function that tests if an input param is not one of options."""
+    options = frozenset(options)
     return lambda val: val not in options
 
 
@@ -160,13 +155,13 @@ def dateYearIsLargerThan(year, **kwargs):
 @base_validator
 def dateMonthIsValid(**kwargs):
     """Return a function that tests that an input date has a month value that is valid."""
-    return lambda val: int(val) in range(1, 13)
+    return lambda val: 1 <= int(val) <= 12
 
 
 @base_validator
 def dateDayIsValid(**kwargs):
     """Return a function that tests that an input date has a day value that is valid."""
-    return lambda val: int(val) in range(1, 32)
+    return lambda val: 1 <= int(val) <= 31
 
 
 @base_validator
@@ -12,6 +12,7 @@
     Result,
     evaluate_all,
     make_validator,
+    resolve_error_args,
     validator,
 )
 
@@ -273,7 +274,7 @@ def _validate(value, eargs):
 
         if not any(result.valid for result in validator_results):
             error_msg = (
-                f"{format_error_context(eargs)} {value} "
+                f"{format_error_context(resolve_error_args(eargs))} {value} "
                 if not is_if_result_func
                 else ""
             )
@@ -79,6 +79,21 @@ def test_isOneOf(val, options, kwargs, expected):
     assert _validator(val) == expected
 
 
+def test_isOneOf_expands_ranges_once():
+    """Test isOneOf expands range options without modifying the given options."""
+    options = ["1-3", "7-9", "x"]
+    _validator = base.isOneOf(options)
+    assert options == ["1-3", "7-9", "x"]
+    assert [_validator(val) for val in (1, 3, 8, "x", 4, "1-3")] == [
+        True,
+        True,
+        True,
+        True,
+        False,
+        False,
+    ]
+
+
 @pytest.mark.parametrize(
     "val, options, kwargs, expected",
     [
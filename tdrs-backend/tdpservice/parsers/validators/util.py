@@ -1,6 +1,5 @@
 """Validation helper functions and data classes."""
 
-
 import functools
 import logging
 import warnings
@@ -26,11 +25,19 @@ def validator(value, eargs):
                 return Result()
         except Exception:
             logger.exception("Caught exception in validator.")
-        return Result(valid=False, error_message=error_func(eargs))
+        return Result(valid=False, error_message=error_func(resolve_error_args(eargs)))
 
     return validator
 
 
+def resolve_error_args(eargs):
+    """Return the `ValidationErrorArgs`, building them first if `eargs` is a factory.
+
+    Row schemas pass a factory so error args are only built for values which fail validation.
+    """
+    return eargs() if callable(eargs) else eargs
+
+
 def deprecate_validator(validator):
     """
     Deprecate entire validator function.
@@ -98,18 +105,23 @@ def _validator(*args, **kwargs):
     return _decorator
 
 
-def value_is_empty(value, length, extra_vals={}):
+@functools.lru_cache(maxsize=None)
+def get_empty_values(length):
+    """Return the frozen set of values considered empty for a field of the given length."""
+    return frozenset(
+        {
+            "",
+            " " * length,  # '     '
+            "#" * length,  # '#####'
+            "_" * length,  # '_____'
+        }
+    )
+
+
+def value_is_empty(value, length, extra_vals=frozenset()):
     """Handle 'empty' values as field inputs."""
     # TODO: have to build mixed type handling for value
-    empty_values = {
-        "",
-        " " * length,  # '     '
-        "#" * length,  # '#####'
-        "_" * length,  # '_____'
-    }
-    empty_values = empty_values.union(extra_vals)
-
-    return value is None or value in empty_values
+    return value is None or value in get_empty_values(length) or value in extra_vals
 
 
 def _is_empty(value, start, end):
@@ -0,0 +1,223 @@
+"""Writer classes used by the parsers to persist buffered records."""
+
+import io
+import json
+import logging
+from abc import ABC, abstractmethod
+from enum import Enum
+
+from django.db import connections, router
+from django.utils import timezone
+
+from tdpservice.parsers.error_generator import DeferredParserError
+from tdpservice.parsers.models import ParserError
+
+logger = logging.getLogger(__name__)
+
+
+class RecordWriterType(str, Enum):
+    """Enum class for record writer types."""
+
+    ORM = "orm"
+    COPY = "copy"
+
+
+def _escape_copy_value(value):
+    """Return the Postgres COPY text format representation of a python value."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(model, columns, rows):
+    """Stream `rows` into the table for `model` with `COPY ... FROM STDIN` and return the number of rows copied."""
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_escape_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    column_sql = ", ".join(quote_name(column) for column in columns)
+    sql = f"COPY {quote_name(model._meta.db_table)} ({column_sql}) FROM STDIN"
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+        return cursor.rowcount
+
+
+def delete_rows_by_keys(model, key_fields, keys, **filters):
+    """Delete the rows of `model` whose `key_fields` values match one of `keys` and return the number deleted.
+
+    The keys are passed as one array parameter per field and joined against the table, so the statement's size and
+    planning cost do not grow with the number of keys. Keys must not contain nulls. `filters` are exact column
+    matches applied to the deleted rows.
+    """
+    if not keys:
+        return 0
+
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in key_fields]
+    columns = [quote_name(field.column) for field in fields]
+
+    arrays = ", ".join(f"%s::{field.db_type(connection)}[]" for field in fields)
+    join = " AND ".join(f"t.{column} = k.{column}" for column in columns)
+    filter_fields = [model._meta.get_field(name) for name in filters]
+    where = "".join(
+        f" AND t.{quote_name(field.column)} = %s" for field in filter_fields
+    )
+    sql = (
+        f"DELETE FROM {quote_name(model._meta.db_table)} AS t "
+        f"USING unnest({arrays}) AS k({', '.join(columns)}) "
+        f"WHERE {join}{where}"
+    )
+    params = [
+        [field.get_db_prep_value(key[i], connection) for key in keys]
+        for i, field in enumerate(fields)
+    ]
+    params += [
+        field.get_db_prep_value(value, connection)
+        for field, value in zip(filter_fields, filters.values())
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+class BaseRecordWriter(ABC):
+    """Abstract base class for all record writers."""
+
+    @abstractmethod
+    def write(self, model, records) -> int:
+        """Persist `records` of type `model` and return the number of records written."""
+        pass
+
+
+class OrmRecordWriter(BaseRecordWriter):
+    """Record writer using Django's multi-row INSERT based `bulk_create`."""
+
+    def write(self, model, records):
+        """Bulk create the records."""
+        return len(model.objects.bulk_create(records))
+
+
+class CopyRecordWriter(BaseRecordWriter):
+    """Record writer streaming records into Postgres with `COPY ... FROM STDIN`."""
+
+    def write(self, model, records):
+        """Copy the records into the model's table."""
+        if not records:
+            return 0
+
+        fields = model._meta.concrete_fields
+        columns = [field.column for field in fields]
+        # `pre_save` mirrors what `bulk_create` does before inserting, e.g. populating `auto_now` fields.
+        rows = (
+            [field.pre_save(record, add=True) for field in fields] for record in records
+        )
+        num_copied = copy_rows(model, columns, rows)
+        for record in records:
+            record._state.adding = False
+            record._state.db = router.db_for_write(model)
+        return num_copied
+
+
+class BaseParserErrorWriter(ABC):
+    """Abstract base class for all parser error writers."""
+
+    # Whether the writer expects errors to be generated as compact `DeferredParserError` tuples.
+    deferred = False
+
+    def __init__(self, parser_error_model=ParserError):
+        super().__init__()
+        self.parser_error_model = parser_error_model
+
+    @abstractmethod
+    def write(self, errors) -> int:
+        """Persist `errors` and return the number of errors written."""
+        pass
+
+
+class OrmParserErrorWriter(BaseParserErrorWriter):
+    """Parser error writer using Django's `bulk_create`."""
+
+    def write(self, errors):
+        """Bulk create the errors."""
+        errors = [
+            (
+                error.to_model(self.parser_error_model)
+                if isinstance(error, DeferredParserError)
+                else error
+            )
+            for error in errors
+        ]
+        return len(self.parser_error_model.objects.bulk_create(errors))
+
+
+class CopyParserErrorWriter(BaseParserErrorWriter):
+    """Parser error writer streaming compact error tuples into Postgres with `COPY ... FROM STDIN`."""
+
+    deferred = True
+
+    def __init__(self, parser_error_model=ParserError):
+        super().__init__(parser_error_model)
+        # The primary key is left to the table's sequence.
+        self.fields = [
+            field
+            for field in parser_error_model._meta.concrete_fields
+            if not field.primary_key
+        ]
+
+    def write(self, errors):
+        """Copy the errors into the parser error table, serializing their JSON columns as each row is written."""
+        if not errors:
+            return 0
+
+        now = timezone.now()
+        rows = (
+            [
+                now if field.name == "created_at" else getattr(error, field.attname)
+                for field in self.fields
+            ]
+            for error in errors
+        )
+        return copy_rows(
+            self.parser_error_model, [field.column for field in self.fields], rows
+        )
+
+
+class RecordWriterFactory:
+    """Factory class to get/instantiate record writers."""
+
+    @classmethod
+    def get_instance(cls, writer_type):
+        """Return the record writer matching `writer_type`."""
+        match RecordWriterType(str(writer_type).lower()):
+            case RecordWriterType.ORM:
+                return OrmRecordWriter()
+            case RecordWriterType.COPY:
+                return CopyRecordWriter()
+
+
+class ParserErrorWriterFactory:
+    """Factory class to get/instantiate parser error writers."""
+
+    @classmethod
+    def get_instance(cls, writer_type, parser_error_model=ParserError):
+        """Return the parser error writer matching `writer_type`."""
+        match RecordWriterType(str(writer_type).lower()):
+            case RecordWriterType.ORM:
+                return OrmParserErrorWriter(parser_error_model)
+            case RecordWriterType.COPY:
+                return CopyParserErrorWriter(parser_error_model)
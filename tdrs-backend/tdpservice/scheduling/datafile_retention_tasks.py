@@ -5,6 +5,11 @@
 import logging
 from datetime import datetime
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
 from celery import shared_task
 
 from tdpservice.core.utils import log
@@ -15,9 +20,43 @@
 logger = logging.getLogger(__name__)
 
 
+def get_old_version_file_ids(min_year, max_year, recheck=False):
+    """Return the ids of the files with a newer version of the same submission, in ascending order.
+
+    The versions of each STT, year, quarter, program type and section are ranked with one window function query. Files
+    whose summary shows their records were already deleted are skipped unless `recheck` is passed.
+    """
+    ranked_files = (
+        DataFile.objects.filter(year__range=(min_year, max_year))
+        .annotate(
+            version_rank=Window(
+                RowNumber(),
+                partition_by=[
+                    F("stt"),
+                    F("year"),
+                    F("quarter"),
+                    F("program_type"),
+                    F("section"),
+                ],
+                order_by=[F("version").desc(), F("id").desc()],
+            )
+        )
+        .filter(version_rank__gt=1)
+    )
+    # Filter outside of the ranking query, filters next to the window function would apply before files are ranked.
+    old_files = DataFile.objects.filter(pk__in=ranked_files.values("pk"))
+    if not recheck:
+        old_files = old_files.exclude(summary__total_number_of_records_created=0)
+    return old_files.order_by("pk").values_list("pk", flat=True)
+
+
 @shared_task
-def remove_all_old_versions():
-    """Delete old versions for every file in the database."""
+def remove_all_old_versions(recheck=False):
+    """Delete the records of old versions for every file in the database.
+
+    Pass `recheck` to also delete records of old versions whose summary shows no records, e.g. to clean up records
+    created outside of the parser.
+    """
     system_user, created = User.objects.get_or_create(username="system")
     log_context = get_log_context(system_user)
     log_context["object_repr"] = "Datafile Version Cleanup"
@@ -42,41 +81,39 @@ def remove_all_old_versions():
             logger_context=log_context,
         )
 
-    # Query only the distinct file groupings that actually exist in the database,
-    # instead of iterating over the full Cartesian product of all possible combinations.
-    existing_groupings = (
-        DataFile.objects.filter(year__range=(min_year, max_year))
-        .values_list("year", "quarter", "program_type", "section", "stt")
-        .distinct()
+    file_ids = list(get_old_version_file_ids(min_year, max_year, recheck))
+    batch_size = settings.DATAFILE_RETENTION_BATCH_SIZE
+    log(
+        f"Found {len(file_ids)} old file versions with records to delete, deleting them in batches of {batch_size}.",
+        level="info",
+        logger_context=log_context,
     )
 
-    # Collect all old-version file IDs across all groupings, then delete in one batch.
-    all_old_file_ids = []
-    for year, quarter, program_type, section, stt_id in existing_groupings:
-        files = DataFile.objects.filter(
-            year=year,
-            quarter=quarter,
-            program_type=program_type,
-            section=section,
-            stt_id=stt_id,
-        )
-        if files.count() <= 1:
-            continue
-        newest_file = files.latest("version")
-        old_ids = list(files.exclude(id=newest_file.id).values_list("id", flat=True))
-        all_old_file_ids.extend(old_ids)
-
-    if all_old_file_ids:
+    # Each batch is deleted in its own transaction and zeroes the record counts on the files' summaries, so an
+    # interrupted run loses at most one batch and the next run picks up the files that still have records.
+    num_files_done = 0
+    num_records_deleted = 0
+    for start in range(0, len(file_ids), batch_size):
+        batch = file_ids[start : start + batch_size]
         try:
-            delete_records(all_old_file_ids, log_context)
+            with transaction.atomic():
+                num_records_deleted += delete_records(batch, log_context)
         except Exception as e:
             log(
-                f"Failed to delete old versions of {len(all_old_file_ids)} files.",
+                f"Failed to delete old versions of {len(batch)} files: {batch}.",
                 level="error",
                 logger_context=log_context,
             )
             logger.exception(e)
             num_exceptions += 1
+            continue
+
+        num_files_done += len(batch)
+        log(
+            f"Deleted {num_records_deleted} records of {num_files_done}/{len(file_ids)} old file versions.",
+            level="info",
+            logger_context=log_context,
+        )
 
     if num_exceptions == 0:
         log(
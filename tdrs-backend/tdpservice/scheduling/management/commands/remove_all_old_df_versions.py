@@ -14,10 +14,18 @@ class Command(BaseCommand):
 
     help = "Remove all old versions of every datafile.."
 
+    def add_arguments(self, parser):
+        """Add arguments to the management command."""
+        parser.add_argument(
+            "--recheck",
+            action="store_true",
+            help="Also remove old versions whose summary shows their records were already removed.",
+        )
+
     def handle(self, *args, **options):
         """Remove every previous version."""
         logger.info("Queueing task to remove all old versions of every datafile.")
-        remove_all_old_versions.delay()
+        remove_all_old_versions.delay(recheck=options["recheck"])
         logger.info(
             "Task to remove all old versions of every datafile has been queued. Please refer to the LogEntries "
             "in the DAC for more information."
@@ -16,7 +16,10 @@
 
 from tdpservice.core.utils import log
 from tdpservice.data_files.enums import SubmissionState
-from tdpservice.data_files.error_reports import ErrorReportFactory
+from tdpservice.data_files.error_reports import (
+    ErrorReportFactory,
+    get_error_set_version,
+)
 from tdpservice.data_files.models import DataFile, ReparseFileMeta, ShadowDataFile
 from tdpservice.data_files.submission_lifecycle import transition_datafile
 from tdpservice.email.helpers.data_file import send_data_submitted_email
@@ -40,6 +43,13 @@
     ShadowParserError,
 )
 from tdpservice.parsers.util import DecoderUnknownException, log_parser_exception
+from tdpservice.scheduling.reparse_scheduler import (
+    claim_reparse_files,
+    get_reparses_with_pending_files,
+    record_parse_time,
+    unclaim_reparse_files,
+)
+from tdpservice.search_indexes.grafana_summary_tables import refresh_summary_tables
 from tdpservice.search_indexes.models.reparse_meta import ReparseMeta
 from tdpservice.users.models import AccountApprovalStatusChoices, User
 
@@ -91,6 +101,39 @@ def queue_parse(data_file_id, reparse_id=None):
         queue_go_parse(data_file_id, reparse_id=reparse_id)
 
 
+def release_reparse_files(reparse_id=None):
+    """Queue the next batch of files of the reparse, or of every reparse with files waiting when no id is given."""
+    reparse_ids = [reparse_id] if reparse_id else get_reparses_with_pending_files()
+    for reparse_id in reparse_ids:
+        data_file_ids = claim_reparse_files(reparse_id)
+        for i, data_file_id in enumerate(data_file_ids):
+            try:
+                queue_parse(data_file_id, reparse_id=reparse_id)
+            except Exception:
+                unclaim_reparse_files(reparse_id, data_file_ids[i:])
+                raise
+
+
+def _release_pending_reparse_files():
+    """Release waiting reparse files now that a parse slot is free, without failing the finished parse."""
+    try:
+        release_reparse_files()
+    except Exception:
+        logger.exception("Failed to release the next batch of reparse files.")
+
+
+def _refresh_grafana_summary_tables(data_file):
+    """Refresh the Grafana summary tables with the parsed file's submission without failing the finished parse."""
+    if _uses_shadow_table(data_file):
+        return
+    try:
+        refresh_summary_tables([data_file.pk])
+    except Exception:
+        logger.exception(
+            f"Failed to refresh the Grafana summary tables for datafile {data_file.pk}."
+        )
+
+
 def set_reparse_file_meta_model_state(reparse_id, file_meta, is_success):
     """Set ReparseFileMeta fields to indicate a parse failure."""
     if reparse_id:
@@ -164,34 +207,43 @@ def _get_post_parse_data_file(data_file_id):
     raise DataFile.DoesNotExist(f"No parser data file found for id={data_file_id}")
 
 
-def _get_summary_status(dfs, data_file, parser_error_model=ParserError):
+def _get_summary_status(
+    dfs, data_file, parser_error_model=ParserError, parse_aggregates=None
+):
     """Return DataFileSummary-style status using the selected parser error model."""
     if dfs.status != DataFileSummary.Status.PENDING:
         return dfs.status
 
-    counts = parser_error_model.objects.filter(
-        file=data_file, deprecated=False
-    ).aggregate(
-        total=Count("id"),
-        precheck=Count(
-            Case(
-                When(error_type=ParserErrorCategoryChoices.PRE_CHECK, then=1),
-                output_field=IntegerField(),
-            )
-        ),
-        record_precheck=Count(
-            Case(
-                When(error_type=ParserErrorCategoryChoices.RECORD_PRE_CHECK, then=1),
-                output_field=IntegerField(),
-            )
-        ),
-        case_consistency=Count(
-            Case(
-                When(error_type=ParserErrorCategoryChoices.CASE_CONSISTENCY, then=1),
-                output_field=IntegerField(),
-            )
-        ),
-    )
+    if parse_aggregates is not None:
+        counts = parse_aggregates.get_error_counts()
+    else:
+        counts = parser_error_model.objects.filter(
+            file=data_file, deprecated=False
+        ).aggregate(
+            total=Count("id"),
+            precheck=Count(
+                Case(
+                    When(error_type=ParserErrorCategoryChoices.PRE_CHECK, then=1),
+                    output_field=IntegerField(),
+                )
+            ),
+            record_precheck=Count(
+                Case(
+                    When(
+                        error_type=ParserErrorCategoryChoices.RECORD_PRE_CHECK, then=1
+                    ),
+                    output_field=IntegerField(),
+                )
+            ),
+            case_consistency=Count(
+                Case(
+                    When(
+                        error_type=ParserErrorCategoryChoices.CASE_CONSISTENCY, then=1
+                    ),
+                    output_field=IntegerField(),
+                )
+            ),
+        )
 
     if counts["precheck"] > 0:
         return DataFileSummary.Status.REJECTED
@@ -207,37 +259,57 @@ def update_dfs(
     data_file,
     parser_error_model=None,
     record_model_resolver=None,
+    parse_aggregates=None,
 ):
-    """Update DataFileSummary fields using the selected parser output models."""
+    """Update DataFileSummary fields using the selected parser output models.
+
+    When the file was parsed in this process, `parse_aggregates` holds the parser's counters and no aggregation
+    queries are run.
+    """
     parser_models = _parser_models_for_instance(data_file)
     parser_error_model = parser_error_model or parser_models.parser_error_model
     record_model_resolver = record_model_resolver or parser_models.record_model_resolver
 
-    dfs.status = _get_summary_status(dfs, data_file, parser_error_model)
+    dfs.status = _get_summary_status(
+        dfs, data_file, parser_error_model, parse_aggregates
+    )
 
     if data_file.program_type == DataFile.ProgramType.FRA:
-        dfs.case_aggregates = fra_total_errors(
-            data_file, parser_error_model=parser_error_model
-        )
+        if parse_aggregates is not None:
+            dfs.case_aggregates = parse_aggregates.fra_total_errors()
+        else:
+            dfs.case_aggregates = fra_total_errors(
+                data_file, parser_error_model=parser_error_model
+            )
     else:
         if "Case Data" in data_file.section:
-            dfs.case_aggregates = case_aggregates_by_month(
-                data_file,
-                dfs.status,
-                parser_error_model=parser_error_model,
-                record_model_resolver=record_model_resolver,
-            )
+            if parse_aggregates is not None:
+                dfs.case_aggregates = parse_aggregates.case_aggregates_by_month(
+                    data_file, dfs.status
+                )
+            else:
+                dfs.case_aggregates = case_aggregates_by_month(
+                    data_file,
+                    dfs.status,
+                    parser_error_model=parser_error_model,
+                    record_model_resolver=record_model_resolver,
+                )
         else:
-            dfs.case_aggregates = total_errors_by_month(
-                data_file,
-                dfs.status,
-                parser_error_model=parser_error_model,
-            )
+            if parse_aggregates is not None:
+                dfs.case_aggregates = parse_aggregates.total_errors_by_month(
+                    data_file, dfs.status
+                )
+            else:
+                dfs.case_aggregates = total_errors_by_month(
+                    data_file,
+                    dfs.status,
+                    parser_error_model=parser_error_model,
+                )
     dfs.save()
 
 
-def set_error_report(dfs, error_report):
-    """Update DataFileSummary error_report."""
+def set_error_report(dfs, error_report, version=None):
+    """Update DataFileSummary error_report and the version of the error set it was generated from."""
     is_shadow = isinstance(dfs, ShadowDataFileSummary)
     file_name = f"{dfs.datafile.original_filename}"
     if is_shadow:
@@ -245,7 +317,10 @@ def set_error_report(dfs, error_report):
 
     file_name += "_error_report"
     dfs.error_report = File(error_report, name=file_name)
+    dfs.error_report_version = version
     dfs.save()
+    # The report has been streamed to storage; closing it removes the temporary file.
+    error_report.close()
 
 
 def _transition_parse_outcome(data_file, dfs, reparse_id=None):
@@ -322,6 +397,7 @@ def _finalize_parse(
     parser_error_model=None,
     record_model_resolver=None,
     roll_log=True,
+    parse_aggregates=None,
 ):
     """Generate parse artifacts and refresh DataFileSummary aggregates."""
     parser_models = _parser_models_for_instance(data_file)
@@ -341,7 +417,11 @@ def _finalize_parse(
         parser_error_model=parser_error_model,
     )
     error_report = error_report_generator.generate()
-    set_error_report(dfs, error_report)
+    set_error_report(
+        dfs,
+        error_report,
+        get_error_set_version(data_file, parser_error_model=parser_error_model),
+    )
     if roll_log:
         logger.handlers[2].doRollover(data_file)
 
@@ -351,6 +431,7 @@ def _finalize_parse(
         data_file,
         parser_error_model=parser_error_model,
         record_model_resolver=record_model_resolver,
+        parse_aggregates=parse_aggregates,
     )
     if explicit_status == DataFileSummary.Status.REJECTED:
         dfs.status = explicit_status
@@ -363,6 +444,9 @@ def _finalize_reparse(data_file_id, reparse_id, file_meta, dfs, reparse_success)
         return
 
     if dfs is None:
+        # The parse failed before it started, mark the file failed so it doesn't stay in flight.
+        if file_meta is not None:
+            set_reparse_file_meta_model_state(reparse_id, file_meta, False)
         return
 
     file_meta.num_records_created = dfs.total_number_of_records_created
@@ -371,6 +455,8 @@ def _finalize_reparse(data_file_id, reparse_id, file_meta, dfs, reparse_success)
         error_type=ParserErrorCategoryChoices.CASE_CONSISTENCY,
     ).count()
     set_reparse_file_meta_model_state(reparse_id, file_meta, reparse_success)
+    record_parse_time(file_meta, dfs.total_number_of_records_in_file)
+    file_meta.save(update_fields=["num_records_in_file", "seconds_per_record"])
     ReparseMeta.set_total_num_records_post(ReparseMeta.objects.get(pk=reparse_id))
 
 
@@ -436,6 +522,7 @@ def post_parse(data_file_id, reparse_id=0, parse_error=None):
             data_file_id,
             parse_error,
         )
+        _refresh_grafana_summary_tables(data_file)
         return
 
     _finalize_parse(
@@ -445,11 +532,13 @@ def post_parse(data_file_id, reparse_id=0, parse_error=None):
         record_model_resolver=parser_models.record_model_resolver,
         roll_log=False,
     )
+    _refresh_grafana_summary_tables(data_file)
     if not settings.GO_PARSER_SHADOW_MODE and reparse_id:
         file_meta = ReparseFileMeta.objects.get(
             data_file_id=data_file_id, reparse_meta_id=reparse_id
         )
         _finalize_reparse(data_file_id, reparse_id, file_meta, dfs, True)
+        _release_pending_reparse_files()
 
 
 @shared_task
@@ -461,6 +550,7 @@ def parse(data_file_id, reparse_id=None):
     data_file = None
     dfs = None
     file_meta = None
+    parse_aggregates = None
     reparse_success = True
     try:
         data_file = DataFile.objects.get(id=data_file_id)
@@ -498,7 +588,8 @@ def parse(data_file_id, reparse_id=None):
             is_program_audit=data_file.is_program_audit,
         )
         parser.parse_and_validate()
-        update_dfs(dfs, data_file)
+        parse_aggregates = parser.aggregates
+        update_dfs(dfs, data_file, parse_aggregates=parse_aggregates)
 
         logger.info(f"Parsing finished for file -> {repr(data_file)}.")
 
@@ -562,5 +653,12 @@ def parse(data_file_id, reparse_id=None):
         reparse_success = False
     finally:
         if data_file is not None:
-            _finalize_parse(data_file, dfs)
+            # Errors added after a failure aren't counted by the parser.
+            _finalize_parse(
+                data_file,
+                dfs,
+                parse_aggregates=parse_aggregates if reparse_success else None,
+            )
+            _refresh_grafana_summary_tables(data_file)
         _finalize_reparse(data_file_id, reparse_id, file_meta, dfs, reparse_success)
+        _release_pending_reparse_files()
@@ -0,0 +1,130 @@
+"""Release the files of a reparse to the parser in throttled batches."""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum
+from django.utils import timezone
+
+from tdpservice.data_files.enums import SubmissionState
+from tdpservice.data_files.models import DataFile, ReparseFileMeta
+from tdpservice.search_indexes.models.reparse_meta import ReparseMeta
+from tdpservice.search_indexes.utils import calculate_timeout
+
+logger = logging.getLogger(__name__)
+
+# User submissions older than this are considered stuck and no longer hold back reparse work.
+USER_PARSE_WINDOW = timedelta(hours=1)
+# Reparse files queued longer ago than this are considered lost, e.g. to a killed worker, and free their slot.
+REPARSE_FILE_WINDOW = timedelta(hours=3)
+
+
+def get_num_user_parses_in_flight():
+    """Return the number of user submitted files that are queued or being parsed."""
+    return (
+        DataFile.objects.filter(
+            state__in=[
+                SubmissionState.VIRUS_SCAN_COMPLETED,
+                SubmissionState.PARSE_STARTED,
+            ],
+            created_at__gte=timezone.now() - USER_PARSE_WINDOW,
+        )
+        .exclude(reparse_file_metas__finished=False)
+        .count()
+    )
+
+
+def get_num_reparse_files_in_flight():
+    """Return the number of reparse files that are queued or being parsed."""
+    return ReparseFileMeta.objects.filter(
+        queued_at__gte=timezone.now() - REPARSE_FILE_WINDOW, finished=False
+    ).count()
+
+
+def get_observed_line_parse_time(meta_model):
+    """Return the average time it took to parse a line of the reparse's finished files, None before any finished."""
+    timings = meta_model.reparse_file_metas.filter(
+        finished=True, seconds_per_record__isnull=False, num_records_in_file__gt=0
+    ).aggregate(
+        seconds=Sum(
+            F("seconds_per_record") * F("num_records_in_file"),
+            output_field=FloatField(),
+        ),
+        num_records=Sum("num_records_in_file"),
+    )
+    if not timings["num_records"]:
+        return None
+    return timings["seconds"] / timings["num_records"]
+
+
+def update_timeout(meta_model):
+    """Estimate when the rest of the reparse finishes from the parse times observed so far."""
+    remaining = meta_model.reparse_file_metas.filter(finished=False).aggregate(
+        num_files=Count("pk"), num_records=Sum("num_records_in_file")
+    )
+    if not remaining["num_files"]:
+        return
+    meta_model.timeout_at = timezone.now() + calculate_timeout(
+        remaining["num_files"],
+        remaining["num_records"] or 0,
+        get_observed_line_parse_time(meta_model),
+    )
+    meta_model.save(update_fields=["timeout_at"])
+
+
+def claim_reparse_files(reparse_id):
+    """Mark the next batch of the reparse's files as queued and return their DataFile ids.
+
+    The batch fills the slots left by `REPARSE_MAX_IN_FLIGHT_FILES` after the reparse files and user submissions
+    already in flight, so user submissions never queue behind more than that many reparse files. Files are released
+    smallest first. The reparse is locked while claiming so concurrent callers never exceed the limit.
+    """
+    with transaction.atomic():
+        meta_model = ReparseMeta.objects.select_for_update().get(pk=reparse_id)
+        num_slots = (
+            settings.REPARSE_MAX_IN_FLIGHT_FILES
+            - get_num_reparse_files_in_flight()
+            - get_num_user_parses_in_flight()
+        )
+        file_metas = list(
+            meta_model.reparse_file_metas.filter(queued_at=None, finished=False)
+            .order_by(F("num_records_in_file").asc(nulls_last=True), "data_file_id")
+            .values_list("pk", "data_file_id")[: max(num_slots, 0)]
+        )
+        ReparseFileMeta.objects.filter(pk__in=[pk for pk, _ in file_metas]).update(
+            queued_at=timezone.now()
+        )
+        update_timeout(meta_model)
+
+    if file_metas:
+        logger.info(
+            f"Releasing {len(file_metas)} files of reparse {reparse_id} to the parser."
+        )
+    return [data_file_id for _, data_file_id in file_metas]
+
+
+def unclaim_reparse_files(reparse_id, data_file_ids):
+    """Return files that couldn't be queued to the reparse's pending files."""
+    ReparseFileMeta.objects.filter(
+        reparse_meta_id=reparse_id, data_file_id__in=data_file_ids, finished=False
+    ).update(queued_at=None)
+
+
+def get_reparses_with_pending_files():
+    """Return the ids of the reparses with files that haven't been released yet."""
+    return (
+        ReparseFileMeta.objects.filter(queued_at=None, finished=False)
+        .values_list("reparse_meta_id", flat=True)
+        .distinct()
+    )
+
+
+def record_parse_time(file_meta, num_records_in_file):
+    """Store the size of the reparsed file and how long it took per line on its file meta."""
+    file_meta.num_records_in_file = num_records_in_file
+    if file_meta.started_at and file_meta.finished_at and num_records_in_file:
+        file_meta.seconds_per_record = (
+            file_meta.finished_at - file_meta.started_at
+        ).total_seconds() / num_records_in_file
@@ -8,6 +8,7 @@
 
 from tdpservice.scheduling.datafile_retention_tasks import remove_all_old_versions
 from tdpservice.scheduling.management.db_backup import run_backup
+from tdpservice.scheduling.parser_task import release_reparse_files
 
 logger = logging.getLogger(__name__)
 
@@ -25,3 +26,9 @@ def postgres_backup(*args):
     else:
         logger.error("Failed to complete database backup.")
     return result
+
+
+@shared_task
+def release_pending_reparse_files():
+    """Release waiting reparse files when no parse finishing has released them, e.g. after workers were killed."""
+    release_reparse_files()
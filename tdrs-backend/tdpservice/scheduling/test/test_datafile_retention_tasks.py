@@ -7,6 +7,8 @@
 
 from tdpservice.data_files.models import DataFile
 from tdpservice.data_files.test.factories import DataFileFactory
+from tdpservice.parsers.models import DataFileSummary
+from tdpservice.parsers.test.factories import DataFileSummaryFactory
 from tdpservice.scheduling.datafile_retention_tasks import remove_all_old_versions
 from tdpservice.search_indexes.models.fra import TANF_Exiter1
 from tdpservice.search_indexes.models.ssp import SSP_M1
@@ -23,6 +25,23 @@ def second_stt():
     return stt
 
 
+def create_tanf_versions(stt, user, num_versions):
+    """Create `num_versions` versions of the same TANF file, each with one TANF_T1 record."""
+    files = [
+        DataFileFactory.create(
+            year=datetime.now().year,
+            quarter="Q1",
+            program_type="TAN",
+            section="Active Case Data",
+            stt=stt,
+            user=user,
+            version=version,
+        )
+        for version in range(1, num_versions + 1)
+    ]
+    return files, [create_tanf_t1_record(datafile) for datafile in files]
+
+
 def create_tanf_t1_record(datafile):
     """Create a TANF_T1 record linked to the given DataFile."""
     return TANF_T1.objects.create(
@@ -750,3 +769,70 @@ def test_all_program_types_with_multiple_versions_each(self, stt, user):
         assert SSP_M1.objects.filter(id=ssp_record_v2.id).exists()
         assert Tribal_TANF_T1.objects.filter(id=tribal_record_v2.id).exists()
         assert TANF_Exiter1.objects.filter(id=fra_record_v2.id).exists()
+
+    def test_skips_old_versions_whose_records_were_deleted(self, stt, user):
+        """Test that old versions whose summary shows no records are only cleaned up on a recheck.
+
+        Given: An old version whose summary shows its records were already deleted
+        When: remove_all_old_versions is called with and without recheck
+        Then: Its records are only deleted by the recheck
+        """
+        (old_file, _), (old_record, new_record) = create_tanf_versions(stt, user, 2)
+        DataFileSummaryFactory.create(
+            datafile=old_file, total_number_of_records_created=0
+        )
+
+        remove_all_old_versions()
+        assert TANF_T1.objects.filter(id=old_record.id).exists()
+
+        remove_all_old_versions(recheck=True)
+        assert not TANF_T1.objects.filter(id=old_record.id).exists()
+        assert TANF_T1.objects.filter(id=new_record.id).exists()
+
+    def test_newest_version_without_records_is_retained(self, stt, user):
+        """Test that the newest version is retained even if its summary shows no records.
+
+        Given: An old version with records and a newest version whose summary shows no records
+        When: remove_all_old_versions is called
+        Then: The old version's records are deleted and its summary is updated
+        """
+        (old_file, new_file), (old_record, new_record) = create_tanf_versions(
+            stt, user, 2
+        )
+        DataFileSummaryFactory.create(
+            datafile=old_file, total_number_of_records_created=1
+        )
+        DataFileSummaryFactory.create(
+            datafile=new_file, total_number_of_records_created=0
+        )
+
+        remove_all_old_versions()
+
+        assert not TANF_T1.objects.filter(id=old_record.id).exists()
+        assert TANF_T1.objects.filter(id=new_record.id).exists()
+        assert (
+            DataFileSummary.objects.get(
+                datafile=old_file
+            ).total_number_of_records_created
+            == 0
+        )
+
+    @patch("tdpservice.scheduling.datafile_retention_tasks.log")
+    def test_deletes_old_versions_in_batches(self, mock_log, settings, stt, user):
+        """Test that old versions are deleted in batches and progress is logged.
+
+        Given: Four versions of a file and a batch size of two
+        When: remove_all_old_versions is called
+        Then: The three old versions are deleted in two batches
+        """
+        settings.DATAFILE_RETENTION_BATCH_SIZE = 2
+        _, records = create_tanf_versions(stt, user, 4)
+
+        remove_all_old_versions()
+
+        assert [
+            TANF_T1.objects.filter(id=record.id).exists() for record in records
+        ] == [False, False, False, True]
+        messages = [call[0][0] for call in mock_log.call_args_list]
+        assert "Deleted 2 records of 2/3 old file versions." in messages
+        assert "Deleted 3 records of 3/3 old file versions." in messages
@@ -16,9 +16,11 @@
     create_or_update_shadow_data_file,
 )
 from tdpservice.data_files.test.factories import DataFileFactory
+from tdpservice.parsers.aggregates import ParseAggregates
 from tdpservice.parsers.models import (
     DataFileSummary,
     ParserError,
+    ParserErrorCategoryChoices,
     ShadowDataFileSummary,
     ShadowParserError,
 )
@@ -49,6 +51,7 @@ class DummyParser:
     def __init__(self, exc=None):
         self.exc = exc
         self.called = False
+        self.aggregates = None
 
     def parse_and_validate(self):
         """Invoke a configured exception or no-op."""
@@ -316,6 +319,45 @@ def test_update_dfs_uses_total_errors(monkeypatch, stt):
     assert dfs.case_aggregates == {"total": 3}
 
 
+@pytest.mark.django_db
+def test_update_dfs_uses_parse_aggregates(monkeypatch, stt):
+    """Use the parser's counters instead of querying aggregates."""
+    datafile = DataFileFactory(
+        stt=stt,
+        version=4,
+        program_type=DataFile.ProgramType.TANF,
+        section=DataFile.Section.ACTIVE_CASE_DATA,
+    )
+    dfs = DataFileSummary.objects.create(
+        datafile=datafile, status=DataFileSummary.Status.PENDING
+    )
+    parse_aggregates = ParseAggregates()
+    parse_aggregates.add_errors(
+        [
+            ParserError(
+                file=datafile,
+                error_type=ParserErrorCategoryChoices.FIELD_VALUE,
+                rpt_month_year=202010,
+                case_number="1",
+            )
+        ]
+    )
+
+    monkeypatch.setattr(
+        parser_task,
+        "case_aggregates_by_month",
+        lambda *a, **kwargs: pytest.fail("case_aggregates_by_month should not be used"),
+    )
+
+    parser_task.update_dfs(dfs, datafile, parse_aggregates=parse_aggregates)
+
+    dfs.refresh_from_db()
+    assert dfs.status == DataFileSummary.Status.ACCEPTED_WITH_ERRORS
+    assert dfs.case_aggregates == parse_aggregates.case_aggregates_by_month(
+        datafile, dfs.status
+    )
+
+
 def test_set_error_report_sets_filename():
     """Set error report file name based on original filename."""
 
@@ -529,7 +571,7 @@ def test_finalize_reparse_sets_total_num_records_post_when_last_file_finishes(
     )
     monkeypatch.setattr(
         "tdpservice.search_indexes.models.reparse_meta.count_all_records",
-        lambda: 42,
+        lambda exact_counts: 42,
     )
 
     parser_task._finalize_reparse(
@@ -608,7 +650,10 @@ def test_parse_success_reparse_updates_file_meta(monkeypatch, data_analyst):
     monkeypatch.setattr(
         parser_task.ParserError.objects,
         "filter",
-        lambda *a, **k: SimpleNamespace(count=lambda: 2),
+        lambda *a, **k: SimpleNamespace(
+            count=lambda: 2,
+            aggregate=lambda **k: {"count": 2, "last_id": None},
+        ),
     )
     monkeypatch.setattr(
         parser_task.ReparseMeta, "set_total_num_records_post", lambda *a, **k: None
@@ -676,7 +721,10 @@ def test_parse_success_reparse_suppresses_email_for_accepted_to_accepted(
     monkeypatch.setattr(
         parser_task.ParserError.objects,
         "filter",
-        lambda *a, **k: SimpleNamespace(count=lambda: 0),
+        lambda *a, **k: SimpleNamespace(
+            count=lambda: 0,
+            aggregate=lambda **k: {"count": 0, "last_id": None},
+        ),
     )
     monkeypatch.setattr(
         parser_task.ReparseMeta, "set_total_num_records_post", lambda *a, **k: None
@@ -730,7 +778,10 @@ def test_parse_success_reparse_still_sends_email_for_unchanged_nonaccepted_statu
     monkeypatch.setattr(
         parser_task.ParserError.objects,
         "filter",
-        lambda *a, **k: SimpleNamespace(count=lambda: 1),
+        lambda *a, **k: SimpleNamespace(
+            count=lambda: 1,
+            aggregate=lambda **k: {"count": 1, "last_id": None},
+        ),
     )
     monkeypatch.setattr(
         parser_task.ReparseMeta, "set_total_num_records_post", lambda *a, **k: None
@@ -967,7 +1018,10 @@ def test_reparse_transitions_to_parsing(monkeypatch, stt):
     monkeypatch.setattr(
         parser_task.ParserError.objects,
         "filter",
-        lambda *a, **k: SimpleNamespace(count=lambda: 0),
+        lambda *a, **k: SimpleNamespace(
+            count=lambda: 0,
+            aggregate=lambda **k: {"count": 0, "last_id": None},
+        ),
     )
     monkeypatch.setattr(
         parser_task.ReparseMeta, "set_total_num_records_post", lambda *a, **k: None
@@ -0,0 +1,153 @@
+"""Tests for releasing reparse files to the parser in throttled batches."""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+import pytest
+
+from tdpservice.data_files.enums import SubmissionState
+from tdpservice.data_files.models import ReparseFileMeta
+from tdpservice.data_files.test.factories import DataFileFactory
+from tdpservice.scheduling import parser_task, tasks
+from tdpservice.scheduling.reparse_scheduler import (
+    REPARSE_FILE_WINDOW,
+    record_parse_time,
+    update_timeout,
+)
+from tdpservice.search_indexes.models.reparse_meta import ReparseMeta
+
+
+@pytest.fixture
+def queued(monkeypatch, settings):
+    """Capture the parse tasks queued instead of sending them to the broker."""
+    settings.GO_PARSER_SHADOW_MODE = False
+    calls = []
+    monkeypatch.setattr(
+        parser_task.parse,
+        "delay",
+        lambda file_id, reparse_id=None: calls.append((file_id, reparse_id)),
+    )
+    return calls
+
+
+@pytest.fixture
+def reparse_files(stt):
+    """Return a reparse of three files of different sizes."""
+    meta_model = ReparseMeta.objects.create(db_backup_location="s3://backup")
+    file_metas = [
+        ReparseFileMeta.objects.create(
+            data_file=DataFileFactory(stt=stt, version=version),
+            reparse_meta=meta_model,
+            num_records_in_file=num_records,
+        )
+        for version, num_records in ((1, 300), (2, 100), (3, 200))
+    ]
+    return meta_model, file_metas
+
+
+@pytest.mark.django_db
+def test_release_reparse_files_in_size_order(settings, queued, reparse_files):
+    """Release the smallest files first and no more than the in flight limit."""
+    settings.REPARSE_MAX_IN_FLIGHT_FILES = 2
+    meta_model, (large, small, medium) = reparse_files
+
+    parser_task.release_reparse_files(meta_model.pk)
+    assert queued == [
+        (small.data_file_id, meta_model.pk),
+        (medium.data_file_id, meta_model.pk),
+    ]
+
+    # Nothing is released until a parse finishes.
+    parser_task.release_reparse_files()
+    assert len(queued) == 2
+
+    small.refresh_from_db()
+    small.finished = True
+    small.save()
+    parser_task.release_reparse_files()
+    assert queued[2:] == [(large.data_file_id, meta_model.pk)]
+    assert not ReparseFileMeta.objects.filter(queued_at=None).exists()
+
+
+@pytest.mark.django_db
+def test_user_parses_are_ahead_of_reparse_files(settings, queued, stt, reparse_files):
+    """User submissions being parsed take up in flight slots."""
+    settings.REPARSE_MAX_IN_FLIGHT_FILES = 2
+    meta_model, (_, small, _) = reparse_files
+    DataFileFactory(stt=stt, version=4, state=SubmissionState.PARSE_STARTED)
+
+    parser_task.release_reparse_files(meta_model.pk)
+
+    assert queued == [(small.data_file_id, meta_model.pk)]
+
+
+@pytest.mark.django_db
+def test_stuck_reparse_files_dont_block_releases(settings, queued, stt, reparse_files):
+    """Files queued too long ago without finishing, e.g. lost to a killed worker, free their slot."""
+    settings.REPARSE_MAX_IN_FLIGHT_FILES = 1
+    meta_model, (_, small, _) = reparse_files
+    old_meta_model = ReparseMeta.objects.create(db_backup_location="s3://backup")
+    ReparseFileMeta.objects.create(
+        data_file=DataFileFactory(stt=stt, version=4),
+        reparse_meta=old_meta_model,
+        queued_at=timezone.now() - REPARSE_FILE_WINDOW - timedelta(minutes=1),
+    )
+
+    parser_task.release_reparse_files(meta_model.pk)
+
+    assert queued == [(small.data_file_id, meta_model.pk)]
+
+
+@pytest.mark.django_db
+def test_scheduled_release_resumes_stalled_reparse(settings, queued, reparse_files):
+    """Release waiting files on a schedule when every file in flight was lost and no parse finishes."""
+    settings.REPARSE_MAX_IN_FLIGHT_FILES = 1
+    meta_model, (large, small, medium) = reparse_files
+    small.queued_at = timezone.now() - REPARSE_FILE_WINDOW - timedelta(minutes=1)
+    small.save()
+
+    tasks.release_pending_reparse_files()
+
+    assert queued == [(medium.data_file_id, meta_model.pk)]
+    assert (
+        settings.CELERY_BEAT_SCHEDULE["Release Pending Reparse Files"]["task"]
+        == "tdpservice.scheduling.tasks.release_pending_reparse_files"
+    )
+
+
+@pytest.mark.django_db
+def test_release_reparse_files_unclaims_files_that_fail_to_queue(
+    monkeypatch, settings, reparse_files
+):
+    """Files that couldn't be queued are released again later."""
+    settings.GO_PARSER_SHADOW_MODE = False
+    meta_model, _ = reparse_files
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("broker down")
+
+    monkeypatch.setattr(parser_task.parse, "delay", fail)
+
+    with pytest.raises(RuntimeError):
+        parser_task.release_reparse_files(meta_model.pk)
+    assert ReparseFileMeta.objects.filter(queued_at=None).count() == 3
+
+
+@pytest.mark.django_db
+def test_timeout_uses_observed_parse_time(reparse_files):
+    """Estimate the rest of the reparse from the parse times of finished files."""
+    meta_model, (large, small, medium) = reparse_files
+    now = timezone.now()
+    small.started_at = now - timedelta(seconds=50)
+    small.finished_at = now
+    small.finished = True
+    record_parse_time(small, 100)
+    small.save()
+    assert small.seconds_per_record == 0.5
+
+    update_timeout(meta_model)
+
+    # 2 files left to queue at 10 seconds each and 500 lines at 0.5 seconds per line.
+    expected = timezone.now() + timedelta(seconds=2 * 10 + 500 * 0.5)
+    assert abs(meta_model.timeout_at - expected) < timedelta(seconds=5)
@@ -2,10 +2,12 @@
 import datetime
 
 from django.contrib.admin import SimpleListFilter
+from django.db.models import Exists, OuterRef
 from django.db.models import Q as Query
 from django.utils.translation import gettext_lazy as _
 
 from tdpservice.core.filters import MostRecentVersionFilter
+from tdpservice.data_files.models import DataFile
 from tdpservice.search_indexes.admin.multiselect_filter import MultiSelectDropdownFilter
 from tdpservice.stts.models import STT
 
@@ -17,13 +19,17 @@ class CreationDateFilter(MostRecentVersionFilter):
     parameter_name = "created_at"
 
     def queryset(self, request, queryset):
-        """Sort queryset to show latest records."""
-        if self.value() is None and queryset.exists():
-            datafiles = []
-            for record in queryset.order_by(
-                "datafile__stt__stt_code", "-datafile__id"
-            ).distinct("datafile__stt__stt_code"):
-                datafiles.append(record.datafile)
+        """Filter the queryset to the records of the newest datafile with records of each STT."""
+        if self.value() is None:
+            # Datafiles are ranked instead of the records, each datafile only probes the records' datafile index.
+            datafiles = (
+                DataFile.objects.filter(
+                    Exists(queryset.filter(datafile_id=OuterRef("pk")))
+                )
+                .order_by("stt__stt_code", "-id")
+                .distinct("stt__stt_code")
+                .values("pk")
+            )
             return queryset.filter(datafile__in=datafiles)
         return queryset
 
@@ -23,7 +23,9 @@ def export_as_csv(self, request, queryset):
                 + str(datetime.now().strftime("%d%m%y-%H-%M-%S"))
             )
 
-        sql, params = queryset.query.sql_with_params()
+        # The changelist selects related datafiles. The export only selects the model's own columns so they can be
+        # referenced by name.
+        sql, params = queryset.select_related(None).query.sql_with_params()
         file_path = f"exports/{datafile_name}.csv.gz"
 
         export_queryset_to_s3_csv.delay(
@@ -0,0 +1,26 @@
+"""Refresh the Grafana summary tables generated by `generate_views.py --summary_tables`."""
+
+from django.db import connection
+
+REFRESH_FUNCTION_PREFIX = "grafana_refresh_"
+
+
+def get_refresh_functions():
+    """Return the names of the refresh functions of the summary tables applied to the database."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT proname FROM pg_proc WHERE pronamespace = current_schema()::regnamespace "
+            "AND starts_with(proname, %s) ORDER BY proname",
+            [REFRESH_FUNCTION_PREFIX],
+        )
+        return [name for (name,) in cursor.fetchall()]
+
+
+def refresh_summary_tables(datafile_ids):
+    """Replace the summary table rows of the datafiles' submissions with the rows of the submissions' latest versions.
+
+    Nothing is refreshed when the Grafana views were applied instead of summary tables.
+    """
+    with connection.cursor() as cursor:
+        for function in get_refresh_functions():
+            cursor.execute(f'SELECT "{function}"(%s::integer[])', [list(datafile_ids)])
@@ -7,6 +7,7 @@
 from tdpservice.core.utils import log
 from tdpservice.search_indexes.models.reparse_meta import ReparseMeta
 from tdpservice.search_indexes.reparse import handle_datafiles
+from tdpservice.search_indexes.reparse_backup import get_backup_location
 from tdpservice.search_indexes.utils import (
     assert_sequential_execution,
     backup,
@@ -15,6 +16,7 @@
     delete_associated_models,
     get_files_to_reparse,
     get_log_context,
+    get_num_records_in_files,
     should_exit,
 )
 from tdpservice.users.models import User
@@ -56,6 +58,12 @@ def add_arguments(self, parser):
             type=str,
             help="Re-parse specific datafiles by datafile id",
         )
+        parser.add_argument(
+            "--exact_counts",
+            action="store_true",
+            help="Count the rows of every record table for the reparse's record totals instead of using the "
+            "counts tracked on the datafile summaries. Slow on large tables.",
+        )
 
     def _handle_input(self, testing, continue_msg):
         """Handle user input."""
@@ -77,6 +85,7 @@ def handle(self, *args, **options):
             else None
         )
         new_indices = reparse_all is True
+        exact_counts = options.get("exact_counts", False)
 
         # Option that can only be specified by calling `handle` directly and passing it.
         testing = options.get("testing", False)
@@ -156,18 +165,23 @@ def handle(self, *args, **options):
             all=reparse_all,
             new_indices=new_indices,
             delete_old_indices=new_indices,
+            exact_counts=exact_counts,
         )
 
-        # Backup the Postgres DB
-        backup_file_name += f"_rpv{meta_model.pk}.pg"
-        backup(backup_file_name, log_context)
+        # Backup the rows the reparse deletes
+        file_ids = files.values_list("id", flat=True).distinct()
+        num_records_in_files = get_num_records_in_files(files)
+        backup_file_name += f"_rpv{meta_model.pk}.sql.gz"
+        backup_location = get_backup_location(backup_file_name)
+        backup(backup_location, file_ids, log_context)
 
-        meta_model.db_backup_location = backup_file_name
+        meta_model.db_backup_location = backup_location
         meta_model.save()
 
         # Delete records from Postgres if necessary
-        file_ids = files.values_list("id", flat=True).distinct()
-        meta_model.total_num_records_initial = count_total_num_records(log_context)
+        meta_model.total_num_records_initial = count_total_num_records(
+            log_context, meta_model.exact_counts
+        )
         meta_model.save()
 
         delete_associated_models(meta_model, file_ids, log_context)
@@ -182,7 +196,9 @@ def handle(self, *args, **options):
 
         # Delete and re-save datafiles to handle cascading dependencies
         logger.info(f"Deleting and re-parsing {num_files} files")
-        handle_datafiles(files, meta_model, log_context)
+        handle_datafiles(
+            files, meta_model, log_context, num_records_in_files=num_records_in_files
+        )
 
         log(
             "Database cleansing complete and all files have been re-scheduling for parsing and validation.",
@@ -195,4 +211,6 @@ def handle(self, *args, **options):
             logger_context=log_context,
             level="info",
         )
-        logger.info("Done. All tasks have been queued to parse the selected datafiles.")
+        logger.info(
+            "Done. The selected datafiles will be released to the parser in batches."
+        )
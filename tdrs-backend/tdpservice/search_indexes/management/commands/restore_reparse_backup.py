@@ -0,0 +1,55 @@
+"""Restore the rows of the datafiles backed up before a reparse."""
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tdpservice.search_indexes.models.reparse_meta import ReparseMeta
+from tdpservice.search_indexes.reparse_backup import restore_datafile_rows
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Command class."""
+
+    help = (
+        "Replace the records, parser errors and summaries of the reparsed datafiles with the ones backed up before "
+        "the reparse. Elastic indices aren't restored, rebuild them afterwards if necessary."
+    )
+
+    def add_arguments(self, parser):
+        """Add arguments to the management command."""
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument(
+            "-f",
+            "--file",
+            type=str,
+            help="Local path or s3:// location of the backup.",
+        )
+        group.add_argument(
+            "-r",
+            "--reparse_meta",
+            type=int,
+            help="Restore the backup taken by the reparse with this ReparseMeta id.",
+        )
+
+    def handle(self, *args, **options):
+        """Restore the backup."""
+        location = options["file"]
+        if options["reparse_meta"] is not None:
+            meta_model = ReparseMeta.objects.filter(pk=options["reparse_meta"]).first()
+            if meta_model is None or not meta_model.db_backup_location:
+                raise CommandError(
+                    f"No backup recorded for reparse {options['reparse_meta']}."
+                )
+            location = meta_model.db_backup_location
+
+        logger.info(f"Restoring the reparse backup {location}.")
+        try:
+            counts = restore_datafile_rows(location)
+        except ValueError as e:
+            raise CommandError(str(e))
+        for table, count in counts.items():
+            logger.info(f"Restored {count} {table} rows.")
+        logger.info(f"Restored the reparse backup {location}.")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.14 on 2026-10-18 22:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search_indexes", "0037_shadowprogramaudit_t1_shadowprogramaudit_t2_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reparsemeta",
+            name="exact_counts",
+            field=models.BooleanField(default=False),
+        ),
+    ]
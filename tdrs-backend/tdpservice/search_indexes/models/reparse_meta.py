@@ -38,6 +38,8 @@ class Meta:
     all = models.BooleanField(default=False)
     new_indices = models.BooleanField(default=False)
     delete_old_indices = models.BooleanField(default=False)
+    # Count the rows of every record table for both record totals instead of summing the counts tracked by the parser.
+    exact_counts = models.BooleanField(default=False)
 
     @property
     def is_finished(self):
@@ -125,5 +127,7 @@ def get_latest():
     def set_total_num_records_post(meta_model):
         """Update the total_num_records_post field once reparse has completed."""
         if meta_model.is_finished:
-            meta_model.total_num_records_post = count_all_records()
+            meta_model.total_num_records_post = count_all_records(
+                meta_model.exact_counts
+            )
             meta_model.save()
@@ -10,6 +10,7 @@
 from tdpservice.parsers.models import DataFileSummary
 from tdpservice.scheduling import parser_task
 from tdpservice.search_indexes.models.reparse_meta import ReparseMeta
+from tdpservice.search_indexes.reparse_backup import get_backup_location
 from tdpservice.search_indexes.utils import (
     assert_sequential_execution,
     backup,
@@ -17,6 +18,7 @@
     count_total_num_records,
     delete_associated_models,
     get_log_context,
+    get_num_records_in_files,
     get_number_of_records,
 )
 from tdpservice.users.models import User
@@ -40,33 +42,44 @@ def __init__(self, original_exception):
         super().__init__(str(original_exception))
 
 
-def handle_datafiles(files, meta_model, log_context, previous_summary_statuses=None):
-    """Delete, re-save, and reparse selected datafiles."""
+def handle_datafiles(
+    files,
+    meta_model,
+    log_context,
+    previous_summary_statuses=None,
+    num_records_in_files=None,
+):
+    """Add the selected datafiles to the reparse and release the first batch of them to the parser.
+
+    The rest are released by `parser_task.release_reparse_files` as parses finish.
+    """
     previous_summary_statuses = previous_summary_statuses or {}
-    for file in files:
-        try:
+    num_records_in_files = num_records_in_files or {}
+    try:
+        for file in files:
             ReparseFileMeta.objects.create(
                 data_file=file,
                 reparse_meta=meta_model,
                 previous_summary_status=previous_summary_statuses.get(file.pk),
+                num_records_in_file=num_records_in_files.get(file.pk),
             )
-            parser_task.queue_parse(file.pk, reparse_id=meta_model.pk)
-        except DatabaseError as e:
-            log(
-                "Encountered a DatabaseError while re-creating datafiles. The database "
-                "is INCONSISTENT! Restore the DB from the backup as soon as possible!",
-                logger_context=log_context,
-                level="critical",
-            )
-            raise e
-        except Exception as e:
-            log(
-                "Caught generic exception in _handle_datafiles. Database is INCONSISTENT! "
-                "Restore the DB from the backup as soon as possible!",
-                logger_context=log_context,
-                level="critical",
-            )
-            raise e
+        parser_task.release_reparse_files(meta_model.pk)
+    except DatabaseError as e:
+        log(
+            "Encountered a DatabaseError while re-creating datafiles. The database "
+            "is INCONSISTENT! Restore the DB from the backup as soon as possible!",
+            logger_context=log_context,
+            level="critical",
+        )
+        raise e
+    except Exception as e:
+        log(
+            "Caught generic exception in _handle_datafiles. Database is INCONSISTENT! "
+            "Restore the DB from the backup as soon as possible!",
+            logger_context=log_context,
+            level="critical",
+        )
+        raise e
 
 
 def clean_reparse(selected_file_ids):
@@ -79,6 +92,7 @@ def clean_reparse(selected_file_ids):
             "datafile_id", "status"
         )
     )
+    num_records_in_files = get_num_records_in_files(files)
     num_files = files.count()
 
     fiscal_quarter = None
@@ -131,14 +145,15 @@ def clean_reparse(selected_file_ids):
             f"Sequential execution required for selected file ids: {selected_file_ids}"
         )
     meta_model.save()
-    # Backup the Postgres DB
-    backup_file_name += f"_rpv{meta_model.pk}_{datetime.datetime.now().strftime('%d-%m-%Y-%H-%M-%S')}.pg"
-    backup(backup_file_name, log_context)
+    # Backup the rows the reparse deletes
+    file_ids = files.values_list("id", flat=True).distinct()
+    backup_file_name += f"_rpv{meta_model.pk}_{datetime.datetime.now().strftime('%d-%m-%Y-%H-%M-%S')}.sql.gz"
+    backup_location = get_backup_location(backup_file_name)
+    backup(backup_location, file_ids, log_context)
 
-    meta_model.db_backup_location = backup_file_name
+    meta_model.db_backup_location = backup_location
     meta_model.save()
 
-    file_ids = files.values_list("id", flat=True).distinct()
     meta_model.total_num_records_initial = count_total_num_records(log_context)
     meta_model.save()
 
@@ -159,7 +174,13 @@ def clean_reparse(selected_file_ids):
 
         # Delete and re-save datafiles to handle cascading dependencies
         logger.info(f"Deleting and re-parsing {num_files} files")
-        handle_datafiles(files, meta_model, log_context, previous_summary_statuses)
+        handle_datafiles(
+            files,
+            meta_model,
+            log_context,
+            previous_summary_statuses,
+            num_records_in_files,
+        )
     except Exception as exc:
         raise ReparseDestructiveCleanupStarted(exc) from exc
 
@@ -174,4 +195,6 @@ def clean_reparse(selected_file_ids):
         logger_context=log_context,
         level="info",
     )
-    logger.info("Done. All tasks have been queued to parse the selected datafiles.")
+    logger.info(
+        "Done. The selected datafiles will be released to the parser in batches."
+    )
@@ -0,0 +1,163 @@
+"""Back up and restore the rows a reparse deletes."""
+
+import gzip
+import logging
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from tdpservice.data_files.s3_client import S3Client, S3MultipartUploadFile
+from tdpservice.parsers.models import DataFileSummary, ParserError
+from tdpservice.search_indexes.util import MODELS
+
+logger = logging.getLogger(__name__)
+
+BACKUP_HEADER = "-- Reparse backup of datafiles: "
+COPY_STATEMENT = re.compile(
+    r'^COPY "(?P<table>[^"]+)" \((?P<columns>.*)\) FROM stdin;$'
+)
+END_OF_COPY_DATA = b"\\.\n"
+
+
+def get_backup_models():
+    """Return every model a reparse deletes rows of, with the name of its foreign key to the datafile."""
+    return [(DataFileSummary, "datafile"), (ParserError, "file")] + [
+        (model, "datafile") for model in MODELS
+    ]
+
+
+def get_backup_location(backup_file_name):
+    """Return where the backup is stored, the local file when running locally and otherwise s3."""
+    if settings.USE_LOCALSTACK:
+        return backup_file_name
+    return f"s3://{settings.AWS_S3_DATAFILES_BUCKET_NAME}/backup{backup_file_name}"
+
+
+def _split_s3_location(location):
+    """Return the bucket and key of an s3 location."""
+    bucket, _, key = location[len("s3://") :].partition("/")
+    return bucket, key
+
+
+@contextmanager
+def _open_backup_for_writing(location):
+    """Open a gzip stream writing to the backup location."""
+    if location.startswith("s3://"):
+        bucket, key = _split_s3_location(location)
+        with S3MultipartUploadFile(
+            S3Client().client, bucket, key, settings.S3_MULTIPART_UPLOAD_PART_SIZE
+        ) as upload:
+            with gzip.GzipFile(fileobj=upload, mode="wb") as f:
+                yield f
+    else:
+        with gzip.open(location, "wb") as f:
+            yield f
+
+
+@contextmanager
+def _open_backup_for_reading(location):
+    """Open a gzip stream reading from the backup location."""
+    if location.startswith("s3://"):
+        bucket, key = _split_s3_location(location)
+        body = S3Client().client.get_object(Bucket=bucket, Key=key)["Body"]
+        try:
+            with gzip.GzipFile(fileobj=body, mode="rb") as f:
+                yield f
+        finally:
+            body.close()
+    else:
+        with gzip.open(location, "rb") as f:
+            yield f
+
+
+class _CopyDataReader:
+    """Reads the data of one COPY statement of a backup, up to the line terminating it."""
+
+    def __init__(self, file):
+        self.file = file
+        self.buffer = b""
+        self.done = False
+
+    def read(self, size=-1):
+        """Return up to `size` bytes of the statement's data."""
+        while not self.done and (size < 0 or len(self.buffer) < size):
+            line = self.file.readline()
+            if not line or line == END_OF_COPY_DATA:
+                self.done = True
+            else:
+                self.buffer += line
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def backup_datafile_rows(location, file_ids):
+    """Back up the rows a reparse of the datafiles deletes and return the number of rows backed up per table.
+
+    The backup is a gzipped `COPY ... FROM stdin` script in the format of a plain `pg_dump`, one statement per
+    table. The rows are streamed from `COPY ... TO STDOUT` straight into the backup.
+    """
+    file_ids = sorted(file_ids)
+    counts = dict()
+    with _open_backup_for_writing(location) as f, connection.cursor() as cursor:
+        f.write(f"{BACKUP_HEADER}{','.join(str(id) for id in file_ids)}\n".encode())
+        quote_name = connection.ops.quote_name
+        for model, datafile_field in get_backup_models():
+            table = quote_name(model._meta.db_table)
+            columns = ", ".join(
+                quote_name(field.column) for field in model._meta.concrete_fields
+            )
+            datafile_column = quote_name(model._meta.get_field(datafile_field).column)
+
+            f.write(f"COPY {table} ({columns}) FROM stdin;\n".encode())
+            query = cursor.mogrify(
+                f"SELECT {columns} FROM {table} WHERE {datafile_column} = ANY(%s)",
+                [file_ids],
+            ).decode()
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT", f)
+            f.write(END_OF_COPY_DATA)
+            counts[model._meta.db_table] = cursor.rowcount
+    return counts
+
+
+def restore_datafile_rows(location):
+    """Replace the rows of the backed up datafiles with the rows in the backup and return the number restored per table.
+
+    Everything is restored in one transaction, so either the whole backup is restored or nothing changes.
+    """
+    models = {
+        model._meta.db_table: (model, field) for model, field in get_backup_models()
+    }
+    counts = dict()
+    with _open_backup_for_reading(location) as f, transaction.atomic():
+        header = f.readline().decode()
+        if not header.startswith(BACKUP_HEADER):
+            raise ValueError(f"{location} is not a reparse backup.")
+        ids = header[len(BACKUP_HEADER) :].strip()
+        file_ids = [int(id) for id in ids.split(",")] if ids else []
+
+        with connection.cursor() as cursor:
+            for line in iter(f.readline, b""):
+                match = COPY_STATEMENT.match(line.decode().rstrip("\n"))
+                if match is None or match["table"] not in models:
+                    raise ValueError(f"Unexpected statement in {location}: {line!r}")
+                model, datafile_field = models[match["table"]]
+                columns = {field.column for field in model._meta.concrete_fields}
+                backup_columns = re.findall(r'"([^"]+)"', match["columns"])
+                if not set(backup_columns) <= columns:
+                    raise ValueError(
+                        f"The columns of {match['table']} in {location} don't match the table."
+                    )
+
+                # Drop the rows created since the backup, e.g. by the reparse, before restoring the backed up ones.
+                qset = model.objects.filter(**{f"{datafile_field}_id__in": file_ids})
+                qset._raw_delete(qset.db)
+                cursor.copy_expert(
+                    f'COPY "{match["table"]}" ({match["columns"]}) FROM STDIN',
+                    _CopyDataReader(f),
+                )
+                counts[match["table"]] = cursor.rowcount
+    return counts
@@ -3,16 +3,18 @@
 from __future__ import absolute_import
 
 import gzip
-import os
 
 from django.apps import apps
 from django.conf import settings
+from django.db import connection
 
 from botocore.exceptions import ClientError
 from celery import shared_task
 
 from tdpservice.core.utils import log
-from tdpservice.data_files.s3_client import S3Client
+from tdpservice.data_files.models import DataFile
+from tdpservice.data_files.s3_client import S3Client, S3MultipartUploadFile
+from tdpservice.stts.models import STT
 from tdpservice.users.models import User
 
 
@@ -26,36 +28,40 @@ def prettify_time_delta(start, end):
     return elapsed_minutes, remainder_seconds
 
 
-class RowIterator:
-    """Iterator class to support custom CSV row generation."""
+def get_csv_header(field_names):
+    """Generate the header row, with an STT column following the datafile column."""
+    header = []
+    for name in field_names:
+        header.append(name)
+        if name == "datafile":
+            header.append("STT")
+    return ",".join(header) + "\n"
 
-    def __init__(self, field_names, queryset):
-        self.field_names = field_names
-        self.queryset = queryset
 
-    def _get_header(self, field_names):
-        """Generate custom header row."""
-        header_row = ""
-        for name in field_names:
-            header_row += f"{name},"
-            if name == "datafile":
-                header_row += "STT,"
-        return header_row[:-1] + "\n"
+def get_copy_export_sql(model, query, field_names):
+    """Return a `COPY ... TO STDOUT` statement writing the rows of `query` as CSV.
 
-    def __iter__(self):
-        """Yield the next row in the csv export."""
-        yield self._get_header(self.field_names)
-
-        # queryset.iterator simply 'forgets' the record after iterating over it, instead of caching it
-        # this is okay here since we only write out the contents and don't need the record again.
-        for obj in self.queryset.iterator():
-            row = ""
-            for field_name in self.field_names:
-                field = getattr(obj, field_name)
-                row += f"{field},"
-                if field and field_name == "datafile":
-                    row += f"{field.stt.stt_code},"
-            yield row[:-1] + "\n"
+    The datafile column is written like `DataFile.__str__` and followed by the STT code, both of which are looked up in
+    the same statement. The lookup is a lateral join, which is evaluated per row in the order of `query`. Its
+    `LIMIT` keeps Postgres from flattening it into a plain join that could reorder the rows.
+    """
+    columns = []
+    for name in field_names:
+        if name == "datafile":
+            columns += ["'filename: ' || df.original_filename", "df.stt_code"]
+        else:
+            columns.append(f'q."{model._meta.get_field(name).column}"')
+
+    datafile_column = model._meta.get_field("datafile").column
+    return (
+        f"COPY (SELECT {', '.join(columns)} FROM ({query}) AS q "
+        "LEFT JOIN LATERAL ("
+        "SELECT datafile.original_filename, stt.stt_code "
+        f'FROM "{DataFile._meta.db_table}" AS datafile '
+        f'LEFT JOIN "{STT._meta.db_table}" AS stt ON stt.id = datafile.stt_id '
+        f'WHERE datafile.id = q."{datafile_column}" LIMIT 1'
+        ") AS df ON TRUE) TO STDOUT WITH (FORMAT csv)"
+    )
 
 
 @shared_task
@@ -63,7 +69,10 @@ def export_queryset_to_s3_csv(
     query_str, query_params, field_names, model_name, s3_filename
 ):
     """
-    Export a selected queryset to a csv file stored in s3.
+    Export a selected queryset to a gzipped csv file stored in s3.
+
+    The rows are streamed out of Postgres with `COPY ... TO STDOUT`, compressed and uploaded to s3 in parts as they
+    arrive, so neither memory nor disk use grow with the size of the export.
 
     @param query_str: a sql string obtained via queryset.query.sql_with_params().
     @param query_params: sql query params obtained via queryset.query.sql_with_params().
@@ -73,23 +82,24 @@ def export_queryset_to_s3_csv(
     """
     system_user, _ = User.objects.get_or_create(username="system")
     Model = apps.get_model("search_indexes", model_name)
-    queryset = Model.objects.raw(query_str, query_params)
-    iterator = RowIterator(field_names, queryset)
     s3 = S3Client()
 
-    tmp_filename = "file.csv.gz"
-    record_count = -1  # offset row count to account for the header
-    with gzip.open(tmp_filename, "wt") as f:
-        for row in iterator:
-            record_count += 1
-            f.write(row)
-
-    local_filename = os.path.basename(tmp_filename)
-
     try:
-        s3.client.upload_file(
-            local_filename, settings.AWS_S3_DATAFILES_BUCKET_NAME, s3_filename
-        )
+        with S3MultipartUploadFile(
+            s3.client,
+            settings.AWS_S3_DATAFILES_BUCKET_NAME,
+            s3_filename,
+            settings.S3_MULTIPART_UPLOAD_PART_SIZE,
+        ) as upload:
+            with gzip.GzipFile(fileobj=upload, mode="wb") as f:
+                f.write(get_csv_header(field_names).encode())
+                with connection.cursor() as cursor:
+                    # COPY doesn't take parameters, so they're bound client side.
+                    query = cursor.mogrify(query_str, tuple(query_params)).decode()
+                    cursor.copy_expert(
+                        get_copy_export_sql(Model, query, field_names), f
+                    )
+                    record_count = cursor.rowcount
     except ClientError as e:
         log(
             f"Export failed: {s3_filename}. {e}",
@@ -101,4 +111,3 @@ def export_queryset_to_s3_csv(
             f"Export of {record_count} {model_name} objects complete: {s3_filename}",
             {"user_id": system_user.pk, "object_id": None, "object_repr": ""},
         )
-    os.remove(local_filename)
@@ -0,0 +1,48 @@
+"""Tests for the search_indexes admin filters."""
+
+from django.contrib import admin
+from django.test import RequestFactory
+
+import pytest
+
+from tdpservice.data_files.test.factories import DataFileFactory
+from tdpservice.parsers.test.factories import TanfT1Factory
+from tdpservice.search_indexes.admin.filters import CreationDateFilter
+from tdpservice.search_indexes.models.tanf import TANF_T1
+from tdpservice.stts.test.factories import STTFactory
+
+
+def filter_records(params):
+    """Apply the CreationDateFilter to every TANF_T1 record."""
+    request = RequestFactory().get("/admin/search_indexes/tanf_t1/", params)
+    list_filter = CreationDateFilter(
+        request, dict(params), TANF_T1, admin.site._registry[TANF_T1]
+    )
+    return list_filter.queryset(request, TANF_T1.objects.all())
+
+
+@pytest.mark.django_db
+def test_creation_date_filter_shows_newest_datafile_per_stt():
+    """Show the records of each STT's newest datafile that has records."""
+    stt_a = STTFactory(stt_code="1")
+    stt_b = STTFactory(stt_code="2")
+    old_file = DataFileFactory(stt=stt_a, version=1)
+    new_file = DataFileFactory(stt=stt_a, version=2)
+    other_stt_file = DataFileFactory(stt=stt_b, version=1)
+    # A newer file without TANF_T1 records, e.g. a section 2 file, doesn't hide the STT's records.
+    DataFileFactory(stt=stt_a, version=3)
+
+    TanfT1Factory.create_batch(2, datafile=old_file)
+    new_records = TanfT1Factory.create_batch(3, datafile=new_file)
+    other_stt_records = TanfT1Factory.create_batch(1, datafile=other_stt_file)
+
+    assert set(filter_records({})) == set(new_records + other_stt_records)
+    assert filter_records({"created_at": "all"}).count() == 6
+
+
+@pytest.mark.django_db
+def test_creation_date_filter_without_records():
+    """Return no records when there are none to filter."""
+    DataFileFactory()
+
+    assert not filter_records({}).exists()
@@ -0,0 +1,114 @@
+"""Tests for exporting parsed records to s3."""
+
+import csv
+import gzip
+import io
+
+import pytest
+
+from tdpservice.data_files.test.factories import DataFileFactory
+from tdpservice.parsers.test.factories import TanfT1Factory
+from tdpservice.search_indexes.models.tanf import TANF_T1
+from tdpservice.search_indexes.tasks import export_queryset_to_s3_csv
+from tdpservice.stts.test.factories import STTFactory
+
+
+class FakeS3Client:
+    """In-memory stand-in for the s3 multipart upload API."""
+
+    def __init__(self):
+        self.uploads = {}
+        self.objects = {}
+
+    def create_multipart_upload(self, Bucket, Key):
+        """Start an upload."""
+        upload_id = str(len(self.uploads) + len(self.objects))
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        """Store a part."""
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        """Assemble the object from its parts."""
+        parts = self.uploads.pop(UploadId)
+        self.objects[Key] = b"".join(
+            parts[part["PartNumber"]] for part in MultipartUpload["Parts"]
+        )
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        """Discard the upload."""
+        self.uploads.pop(UploadId)
+
+
+@pytest.fixture
+def s3_client(mocker):
+    """Patch the export's s3 client with an in-memory stand-in."""
+    client = FakeS3Client()
+    mocker.patch("tdpservice.search_indexes.tasks.S3Client").return_value.client = (
+        client
+    )
+    return client
+
+
+@pytest.mark.django_db
+def test_export_queryset_to_s3_csv(s3_client, settings, mocker):
+    """Test that the export streams every row, in order and with its STT code, in several parts."""
+    settings.S3_MULTIPART_UPLOAD_PART_SIZE = 256
+    for stt_code in ("02", "01"):
+        datafile = DataFileFactory(stt=STTFactory(stt_code=stt_code))
+        TanfT1Factory.create_batch(20, datafile=datafile, CASE_NUMBER=None)
+
+    queryset = TANF_T1.objects.select_related("datafile").order_by(
+        "datafile__stt__stt_code", "id"
+    )
+    field_names = [field.name for field in TANF_T1._meta.fields]
+    sql, params = queryset.select_related(None).query.sql_with_params()
+    upload_part = mocker.spy(s3_client, "upload_part")
+
+    export_queryset_to_s3_csv(sql, params, field_names, "tanf_t1", "exports/t1.csv.gz")
+
+    assert upload_part.call_count > 1
+    assert not s3_client.uploads
+    rows = list(
+        csv.reader(
+            io.StringIO(
+                gzip.decompress(s3_client.objects["exports/t1.csv.gz"]).decode()
+            )
+        )
+    )
+    header = rows[0]
+    assert header[: header.index("datafile") + 2][-2:] == ["datafile", "STT"]
+
+    expected = []
+    for record in queryset:
+        row = []
+        for name in field_names:
+            value = getattr(record, name)
+            row.append("" if value is None else str(value))
+            if name == "datafile":
+                row.append(record.datafile.stt.stt_code)
+        expected.append(row)
+    assert rows[1:] == expected
+
+
+@pytest.mark.django_db
+def test_export_queryset_to_s3_csv_aborts_on_error(s3_client, mocker):
+    """Test that a failed export aborts its upload."""
+    mocker.patch(
+        "tdpservice.search_indexes.tasks.get_copy_export_sql",
+        side_effect=ValueError("bad export"),
+    )
+
+    with pytest.raises(ValueError):
+        export_queryset_to_s3_csv(
+            *TANF_T1.objects.all().query.sql_with_params(),
+            ["id"],
+            "tanf_t1",
+            "exports/t1.csv.gz",
+        )
+
+    assert not s3_client.uploads
+    assert not s3_client.objects
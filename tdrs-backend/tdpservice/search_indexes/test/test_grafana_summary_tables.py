@@ -0,0 +1,46 @@
+"""Tests for refreshing the Grafana summary tables."""
+
+from django.db import connection
+
+import pytest
+
+from tdpservice.search_indexes.grafana_summary_tables import (
+    get_refresh_functions,
+    refresh_summary_tables,
+)
+
+
+@pytest.fixture
+def refresh_calls():
+    """Create a summary table refresh function that records the datafile ids it was called with."""
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE TABLE grafana_refresh_calls (datafile_ids INTEGER[])")
+        cursor.execute(
+            'CREATE FUNCTION "grafana_refresh_tanf_t1"(datafile_ids INTEGER[]) RETURNS VOID AS $$ '
+            "INSERT INTO grafana_refresh_calls VALUES (datafile_ids) $$ LANGUAGE sql"
+        )
+
+    def get_calls():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT datafile_ids FROM grafana_refresh_calls")
+            return [ids for (ids,) in cursor.fetchall()]
+
+    return get_calls
+
+
+@pytest.mark.django_db
+def test_refresh_summary_tables(refresh_calls):
+    """Call the refresh function of every summary table with the datafiles."""
+    assert get_refresh_functions() == ["grafana_refresh_tanf_t1"]
+
+    refresh_summary_tables([1, 2])
+
+    assert refresh_calls() == [[1, 2]]
+
+
+@pytest.mark.django_db
+def test_refresh_without_summary_tables():
+    """Refresh nothing when the views were applied instead of summary tables."""
+    assert get_refresh_functions() == []
+
+    refresh_summary_tables([1])
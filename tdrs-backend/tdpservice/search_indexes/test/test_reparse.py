@@ -1,11 +1,13 @@
 """Test cases for reparse functions."""
 
-import os
-import time
+import gzip
 from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.admin.models import ADDITION, LogEntry
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.db.utils import DatabaseError
 from django.utils import timezone
 
@@ -15,17 +17,25 @@
 from tdpservice.parsers import util
 from tdpservice.parsers.factory import ParserFactory
 from tdpservice.parsers.models import DataFileSummary
-from tdpservice.parsers.test.factories import DataFileSummaryFactory
+from tdpservice.parsers.test.factories import (
+    DataFileSummaryFactory,
+    ParserErrorFactory,
+    TanfT1Factory,
+)
 from tdpservice.scheduling.management.commands import backup_db
 from tdpservice.search_indexes.management.commands import clean_and_reparse
 from tdpservice.search_indexes.models.reparse_meta import ReparseMeta
+from tdpservice.search_indexes.reparse_backup import get_backup_models
+from tdpservice.search_indexes.models.tanf import TANF_T1
 from tdpservice.search_indexes.tasks import prettify_time_delta
+from tdpservice.search_indexes.util import estimate_record_count
 from tdpservice.search_indexes.utils import (
     assert_sequential_execution,
     backup,
     calculate_timeout,
     count_total_num_records,
     delete_associated_models,
+    delete_records,
 )
 from tdpservice.users.models import User
 
@@ -153,9 +163,74 @@ def test_count_total_num_records(
         tribal_section_1_file,
     )
 
-    assert 3104 == count_total_num_records(log_context)
+    assert 3104 == count_total_num_records(log_context, exact=True)
     cat4_edge_case_file.delete()
-    assert 3096 == count_total_num_records(log_context)
+    assert 3096 == count_total_num_records(log_context, exact=True)
+
+
+@pytest.mark.django_db
+def test_count_total_num_records_tracked(log_context, cat4_edge_case_file, big_file):
+    """Count records from the counts tracked on the datafile summaries."""
+    files = [cat4_edge_case_file, big_file]
+    for file in files:
+        dfs = DataFileSummaryFactory(datafile=file)
+        ParserFactory.get_instance(
+            datafile=file, dfs=dfs, section=file.section, program_type=file.program_type
+        ).parse_and_validate()
+        dfs.save()
+
+    exact = count_total_num_records(log_context, exact=True)
+    assert exact > 0
+    assert count_total_num_records(log_context) == exact
+
+    delete_records([files[0].pk], log_context)
+    assert count_total_num_records(log_context) == count_total_num_records(
+        log_context, exact=True
+    )
+
+
+@pytest.mark.django_db
+def test_total_num_records_post_uses_count_mode(cat4_edge_case_file):
+    """Count the records after the reparse the same way as before it."""
+    # Records without a summary are only found by counting the tables.
+    TanfT1Factory.create_batch(3, datafile=cat4_edge_case_file)
+    for exact_counts, expected in ((False, 0), (True, 3)):
+        meta_model = ReparseMeta.objects.create(exact_counts=exact_counts)
+        ReparseFileMeta.objects.create(
+            data_file=cat4_edge_case_file, reparse_meta=meta_model, finished=True
+        )
+
+        ReparseMeta.set_total_num_records_post(meta_model)
+
+        assert meta_model.total_num_records_post == expected
+
+
+@pytest.mark.django_db
+def test_estimate_record_count(dfs, big_file):
+    """Estimate the rows of a record table from the planner's statistics."""
+    dfs.datafile = big_file
+    ParserFactory.get_instance(
+        datafile=big_file,
+        dfs=dfs,
+        section=big_file.section,
+        program_type=big_file.program_type,
+    ).parse_and_validate()
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE "{TANF_T1._meta.db_table}"')
+
+    assert estimate_record_count(TANF_T1) == TANF_T1.objects.count()
+
+
+def get_datafile_rows(file_ids):
+    """Return the rows of every model a reparse deletes for the datafiles."""
+    return {
+        model: list(
+            model.objects.filter(**{f"{datafile_field}_id__in": file_ids})
+            .order_by("pk")
+            .values_list()
+        )
+        for model, datafile_field in get_backup_models()
+    }
 
 
 @pytest.mark.django_db
@@ -167,7 +242,7 @@ def test_reparse_backup_succeed(
     small_ssp_section1_datafile,
     tribal_section_1_file,
 ):
-    """Verify a backup is created with the correct size."""
+    """Verify the backup only contains the rows of the selected datafiles."""
     parse_files(
         dfs,
         cat4_edge_case_file,
@@ -176,17 +251,35 @@ def test_reparse_backup_succeed(
         tribal_section_1_file,
     )
 
-    file_name = "/tmp/test_reparse.pg"
-    backup(file_name, log_context)
-    time.sleep(10)
+    file_name = "/tmp/test_reparse.sql.gz"
+    backup(file_name, [big_file.pk], log_context)
 
-    file_size = os.path.getsize(file_name)
-    assert file_size > 160000
+    with gzip.open(file_name, "rt") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == f"-- Reparse backup of datafiles: {big_file.pk}"
+    assert len(lines) == 1 + 2 * len(get_backup_models()) + sum(
+        len(rows) for rows in get_datafile_rows([big_file.pk]).values()
+    )
+    assert LogEntry.objects.latest("pk").change_message == "Database backup complete."
 
 
 @pytest.mark.django_db
-def test_reparse_backup_fail(
-    mocker,
+def test_reparse_backup_fail(mocker, log_context, big_file):
+    """Verify a failed backup is logged and raised."""
+    mocker.patch(
+        "tdpservice.search_indexes.utils.backup_datafile_rows",
+        side_effect=Exception("Backup exception"),
+    )
+    with pytest.raises(Exception, match="Backup exception"):
+        backup("/tmp/test_reparse.sql.gz", [big_file.pk], log_context)
+    assert LogEntry.objects.latest("pk").change_message == (
+        "Database backup FAILED. Clean and reparse NOT executed. Database "
+        "is CONSISTENT!"
+    )
+
+
+@pytest.mark.django_db
+def test_restore_reparse_backup(
     log_context,
     dfs,
     cat4_edge_case_file,
@@ -194,7 +287,7 @@ def test_reparse_backup_fail(
     small_ssp_section1_datafile,
     tribal_section_1_file,
 ):
-    """Verify a backup is created with the correct size."""
+    """Verify restoring a backup replaces the rows of the backed up datafiles and leaves the others alone."""
     parse_files(
         dfs,
         cat4_edge_case_file,
@@ -202,20 +295,50 @@ def test_reparse_backup_fail(
         small_ssp_section1_datafile,
         tribal_section_1_file,
     )
+    file_ids = [cat4_edge_case_file.pk, big_file.pk]
+    other_file_ids = [small_ssp_section1_datafile.pk, tribal_section_1_file.pk]
+    backed_up_rows = get_datafile_rows(file_ids)
+    other_rows = get_datafile_rows(other_file_ids)
 
-    mocker.patch(
-        "tdpservice.search_indexes.utils.backup",
-        side_effect=Exception("Backup exception"),
-    )
-    file_name = "/tmp/test_reparse.pg"
-    with pytest.raises(Exception):
-        backup(file_name, log_context)
-        assert os.path.exists(file_name) is False
-        exception_msg = LogEntry.objects.latest("pk").change_message
-        assert exception_msg == (
-            "Database backup FAILED. Clean and reparse NOT executed. Database "
-            "is CONSISTENT!"
-        )
+    file_name = "/tmp/test_restore_reparse.sql.gz"
+    backup(file_name, file_ids, log_context)
+
+    class Fake:
+        pass
+
+    delete_associated_models(Fake(), file_ids, log_context)
+    DataFileSummaryFactory(datafile=big_file)
+    ParserErrorFactory(file=big_file)
+
+    call_command("restore_reparse_backup", "-f", file_name)
+
+    assert get_datafile_rows(file_ids) == backed_up_rows
+    assert get_datafile_rows(other_file_ids) == other_rows
+
+
+@pytest.mark.django_db
+def test_restore_reparse_backup_by_reparse_meta(log_context, big_file):
+    """Verify the backup of a reparse is found from its ReparseMeta."""
+    DataFileSummaryFactory(datafile=big_file)
+    file_name = "/tmp/test_restore_reparse_meta.sql.gz"
+    backup(file_name, [big_file.pk], log_context)
+    meta_model = ReparseMeta.objects.create(db_backup_location=file_name)
+    DataFileSummary.objects.all().delete()
+
+    call_command("restore_reparse_backup", "-r", meta_model.pk)
+
+    assert DataFileSummary.objects.filter(datafile=big_file).count() == 1
+
+
+@pytest.mark.django_db
+def test_restore_reparse_backup_rejects_other_files(tmp_path):
+    """Verify restoring a file that isn't a reparse backup fails without changes."""
+    file_name = tmp_path / "not_a_backup.sql.gz"
+    with gzip.open(file_name, "wt") as f:
+        f.write('COPY "users_user" ("id") FROM stdin;\n1\n\\.\n')
+
+    with pytest.raises(CommandError, match="not a reparse backup"):
+        call_command("restore_reparse_backup", "-f", str(file_name))
 
 
 @pytest.mark.django_db
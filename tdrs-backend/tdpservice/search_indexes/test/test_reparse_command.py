@@ -85,7 +85,9 @@ def test_clean_reparse_single_file_updates_meta(monkeypatch, stt):
 
     calls = {}
 
-    def fake_handle(files, meta, context, previous_summary_statuses=None):
+    def fake_handle(
+        files, meta, context, previous_summary_statuses=None, num_records_in_files=None
+    ):
         calls["files"] = list(files)
         calls["meta"] = meta
         calls["context"] = context
@@ -1,4 +1,10 @@
 """Utility functions and definitions for models."""
+
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from tdpservice.parsers.models import DataFileSummary
 from tdpservice.search_indexes.models import fra, ssp, tanf, tribal
 
 MODELS = [
@@ -27,9 +33,26 @@
 ]
 
 
-def count_all_records():
-    """Count total number of records in the database."""
-    total_num_records = 0
-    for model in MODELS:
-        total_num_records += model.objects.all().count()
-    return total_num_records
+def count_all_records(exact=False):
+    """Count total number of records in the database.
+
+    By default the records counted by the parser on each datafile's summary are summed, which is one small query. Pass
+    `exact` to count the rows of every record table instead, which scans all of them.
+    """
+    if exact:
+        return sum(model.objects.count() for model in MODELS)
+    return DataFileSummary.objects.aggregate(
+        total=Coalesce(Sum("total_number_of_records_created"), 0)
+    )["total"]
+
+
+def estimate_record_count(model):
+    """Return the planner's estimate of the number of rows in the model's table, as of its last analyze."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # Tables that were never analyzed have no estimate.
+    return max(row[0], 0) if row else 0
@@ -3,7 +3,6 @@
 from datetime import timedelta
 
 from django.conf import settings
-from django.core.management import call_command
 from django.db.utils import DatabaseError
 from django.utils import timezone
 from django.contrib.admin.models import LogEntry, CHANGE
@@ -13,17 +12,24 @@
 from tdpservice.data_files.models import DataFile
 from tdpservice.parsers.models import DataFileSummary, ParserError
 from tdpservice.search_indexes.models.reparse_meta import ReparseMeta
-from tdpservice.search_indexes.util import MODELS, count_all_records
+from tdpservice.search_indexes.reparse_backup import backup_datafile_rows
+from tdpservice.search_indexes.util import (
+    MODELS,
+    count_all_records,
+    estimate_record_count,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def backup(backup_file_name, log_context):
-    """Execute Postgres DB backup."""
+def backup(backup_location, file_ids, log_context):
+    """Back up the rows the reparse of the datafiles deletes."""
     try:
         logger.info("Beginning reparse DB Backup.")
-        call_command("backup_db", "-b", "-f", f"{backup_file_name}")
-        logger.info("Backup complete! Commencing clean and reparse.")
+        counts = backup_datafile_rows(backup_location, file_ids)
+        logger.info(
+            f"Backed up {sum(counts.values())} rows to {backup_location}. Commencing clean and reparse."
+        )
 
         log("Database backup complete.", logger_context=log_context, level="info")
     except Exception as e:
@@ -90,10 +96,10 @@ def should_exit(condition):
         exit(1)
 
 
-def count_total_num_records(log_context):
-    """Count total number of records in the database for meta object."""
+def count_total_num_records(log_context, exact=False):
+    """Count total number of records in the database for meta object, see `count_all_records`."""
     try:
-        return count_all_records()
+        return count_all_records(exact)
     except DatabaseError as e:
         log(
             "Encountered a DatabaseError while counting records for meta model. The database "
@@ -165,21 +171,22 @@ def delete_errors(file_ids, log_context):
 
 
 def delete_records(file_ids, log_context):
-    """Delete records, errors from Postgres."""
+    """Delete records, errors from Postgres.
+
+    The summaries of the files are updated so that the record counts tracked on them stay correct.
+    """
     total_deleted = 0
     for model in MODELS:
         try:
             qset = model.objects.filter(datafile_id__in=file_ids).order_by("id")
-            total_in_table = model.objects.count()
-            count = qset.count()
+            count = qset._raw_delete(qset.db)
             total_deleted += count
             if count > 0:
                 log(
-                    f"Deleting {count} out of {total_in_table} records of type: {model}.",
+                    f"Deleted {count} out of about {estimate_record_count(model)} records of type: {model}.",
                     level="info",
                     logger_context=log_context,
                 )
-            qset._raw_delete(qset.db)
         except DatabaseError as e:
             log(
                 f"Encountered a DatabaseError while deleting records of type {model} from Postgres. The database "
@@ -196,6 +203,9 @@ def delete_records(file_ids, log_context):
                 level="critical",
             )
             raise e
+    DataFileSummary.objects.filter(datafile_id__in=file_ids).update(
+        total_number_of_records_created=0
+    )
     return total_deleted
 
 
@@ -243,10 +253,14 @@ def get_files_to_reparse(fiscal_year, fiscal_quarter, selected_files, reparse_al
     return files, backup_file_name, continue_msg
 
 
-def calculate_timeout(num_files, num_records):
-    """Estimate a timeout parameter based on the number of files and the number of records."""
-    # Double median parse time to account for CPU capability differences.
-    line_parse_time = settings.MEDIAN_LINE_PARSE_TIME * 2
+def calculate_timeout(num_files, num_records, line_parse_time=None):
+    """Estimate a timeout parameter based on the number of files and the number of records.
+
+    `line_parse_time` is the observed time to parse a line. The median parse time is used when there is none.
+    """
+    if line_parse_time is None:
+        # Double median parse time to account for CPU capability differences.
+        line_parse_time = float(settings.MEDIAN_LINE_PARSE_TIME) * 2
     time_to_queue_datafile = 10
     time_in_seconds = num_files * time_to_queue_datafile + num_records * line_parse_time
     delta = timedelta(seconds=time_in_seconds)
@@ -256,6 +270,15 @@ def calculate_timeout(num_files, num_records):
     return delta
 
 
+def get_num_records_in_files(files):
+    """Return the number of records in each of the files that has a summary, keyed on the file's id."""
+    return dict(
+        DataFileSummary.objects.filter(datafile__in=files).values_list(
+            "datafile_id", "total_number_of_records_in_file"
+        )
+    )
+
+
 def get_number_of_records(files):
     """Get the number of records in the files."""
     total_number_of_records = 0
@@ -172,6 +172,12 @@ class CloudGov(Common):
             "KEY_PREFIX": f"{cloudgov_name}-throttle",
         }
 
+        CACHES["error-reports"] = {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": f"{REDIS_URI}/{brokers['caches']['feature-flags']}",
+            "KEY_PREFIX": f"{cloudgov_name}-error-reports",
+        }
+
     OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv(
         "OTEL_EXPORTER_OTLP_ENDPOINT", "http://tempo.apps.internal:4317"
     )
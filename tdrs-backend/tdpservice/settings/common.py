@@ -736,6 +736,13 @@ class Common(Configuration):
             "task": "tdpservice.users.tasks.reconcile_keycloak_users",
             "schedule": crontab(minute="0", hour="*/6"),  # Every 6 hours
         },
+        "Release Pending Reparse Files": {
+            "task": "tdpservice.scheduling.tasks.release_pending_reparse_files",
+            "schedule": crontab(minute="*/5"),  # Every 5 minutes
+            "options": {
+                "expires": 240.0,
+            },
+        },
     }
 
     DEFAULT_CACHE_TIMEOUT = 300
@@ -755,6 +762,10 @@ class Common(Configuration):
             "BACKEND": "django.core.cache.backends.redis.RedisCache",
             "LOCATION": f"{REDIS_URI}/3",
         },
+        "error-reports": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": f"{REDIS_URI}/4",
+        },
     }
 
     CYPRESS_TOKEN = os.getenv("CYPRESS_TOKEN", None)
@@ -765,7 +776,28 @@ class Common(Configuration):
         "IGNORE_DUPLICATE_ERROR_PRECEDENCE", False
     )
     BULK_CREATE_BATCH_SIZE = os.getenv("BULK_CREATE_BATCH_SIZE", 10000)
+    # Strategy used to write parsed records and parser errors to the DB. One of "orm" (multi-row INSERT via
+    # `bulk_create`) or "copy" (Postgres `COPY ... FROM STDIN` with errors buffered as compact tuples).
+    BULK_CREATE_METHOD = os.getenv("BULK_CREATE_METHOD", "orm")
+    # Memory map TANF/SSP/Tribal files and only decode the parts of each line that are parsed.
+    USE_MMAP_DECODER = bool(strtobool(os.getenv("USE_MMAP_DECODER", "no")))
+    # Number of processes used to parse and validate TANF/SSP/Tribal files. Files are parsed in a single process when 1.
+    PARSER_NUM_PROCESSES = int(os.getenv("PARSER_NUM_PROCESSES", 1))
+    # Minimum number of rows handed to a parser process at once. Chunks are only split between cases.
+    PARSER_CHUNK_SIZE = int(os.getenv("PARSER_CHUNK_SIZE", 5000))
+    # Seconds a queued error report generation blocks queuing another for the same datafile and errors.
+    ERROR_REPORT_LOCK_TIMEOUT = int(os.getenv("ERROR_REPORT_LOCK_TIMEOUT", 600))
+    # Seconds clients are asked to wait before polling for an error report that is being generated.
+    ERROR_REPORT_RETRY_AFTER = int(os.getenv("ERROR_REPORT_RETRY_AFTER", 5))
+    # Size in bytes of the parts streamed exports are uploaded to s3 in. S3 requires at least 5 MiB.
+    S3_MULTIPART_UPLOAD_PART_SIZE = int(
+        os.getenv("S3_MULTIPART_UPLOAD_PART_SIZE", 8 * 1024 * 1024)
+    )
     MEDIAN_LINE_PARSE_TIME = os.getenv("MEDIAN_LINE_PARSE_TIME", 0.0005574226379394531)
+    # Number of files queued or being parsed at once, counting user submissions, above which reparses wait.
+    REPARSE_MAX_IN_FLIGHT_FILES = int(os.getenv("REPARSE_MAX_IN_FLIGHT_FILES", 4))
+    # Number of old datafile versions whose records the nightly version cleanup deletes per transaction.
+    DATAFILE_RETENTION_BATCH_SIZE = int(os.getenv("DATAFILE_RETENTION_BATCH_SIZE", 25))
     BYPASS_OFA_AUTH = os.getenv("BYPASS_OFA_AUTH", False)
 
     CELERY_WORKER_SEND_TASK_EVENTS = True
@@ -795,4 +827,4 @@ class Common(Configuration):
 
     # Per Lauren and Yun, 1 family (case) is expected to have a maximum of 6 adults and a maximum of 10 children plus
     # one T1 record. Thus, if a case has more than 17 records, it has an error and will not be serialized.
-    MAX_NUMBER_RECORDS_PER_CASE = os.getenv("MAX_NUMBER_RECORDS_PER_CASE", 17)
+    MAX_NUMBER_RECORDS_PER_CASE = int(os.getenv("MAX_NUMBER_RECORDS_PER_CASE", 17))
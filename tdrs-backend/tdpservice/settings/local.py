@@ -59,3 +59,4 @@ class Local(Common):
 
     Common.CACHES["stts"]["KEY_PREFIX"] = "local"
     Common.CACHES["feature-flags"]["KEY_PREFIX"] = "local"
+    Common.CACHES["error-reports"]["KEY_PREFIX"] = "local"
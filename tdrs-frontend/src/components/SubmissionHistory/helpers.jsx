@@ -1,4 +1,4 @@
-import React from 'react'
+import React, { useState } from 'react'
 import { get } from '../../fetch-instance'
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome'
 import {
@@ -12,18 +12,69 @@ import { getParseErrors } from '../../actions/createXLSReport'
 
 export const formatDate = (dateStr) => new Date(dateStr).toLocaleString()
 export const downloadFile = (dispatch, file) => dispatch(download(file))
+
+// The backend answers 202 with a Retry-After header while the report is generated in the background.
+export const ERROR_REPORT_DEFAULT_RETRY_AFTER_MS = 5000
+export const ERROR_REPORT_TIMEOUT_MS = 5 * 60 * 1000
+export const ERROR_REPORT_DOWNLOAD_FAILED_MESSAGE =
+  'The error report could not be downloaded. Please try again later.'
+
+const wait = (ms) => new Promise((resolve) => setTimeout(resolve, ms))
+
+export const getRetryAfterMs = (headers) => {
+  const seconds = Number(headers?.get('Retry-After'))
+  return seconds > 0 ? seconds * 1000 : ERROR_REPORT_DEFAULT_RETRY_AFTER_MS
+}
+
 export const downloadErrorReport = async (file, reportName) => {
-  try {
-    const { data, ok, error } = await get(
+  let waitedMs = 0
+  while (true) {
+    const { data, ok, error, status, headers } = await get(
       `${process.env.REACT_APP_BACKEND_URL}/data_files/${file.id}/download_error_report/`,
       { responseType: 'blob' }
     )
     if (!ok) throw error
-    getParseErrors(data, reportName)
-  } catch (error) {
-    console.log(error)
+    if (status !== 202) {
+      getParseErrors(data, reportName)
+      return
+    }
+
+    const retryAfterMs = getRetryAfterMs(headers)
+    if (waitedMs + retryAfterMs > ERROR_REPORT_TIMEOUT_MS) {
+      throw new Error('Timed out waiting for the error report.')
+    }
+    await wait(retryAfterMs)
+    waitedMs += retryAfterMs
   }
 }
+
+export const ErrorReportDownloadButton = ({ file, reportName }) => {
+  const [error, setError] = useState(null)
+
+  const onClick = async () => {
+    setError(null)
+    try {
+      await downloadErrorReport(file, reportName)
+    } catch (e) {
+      console.log(e)
+      setError(ERROR_REPORT_DOWNLOAD_FAILED_MESSAGE)
+    }
+  }
+
+  return (
+    <>
+      <button className="section-download" onClick={onClick}>
+        {reportName}.xlsx
+      </button>
+      {error && (
+        <div className="usa-error-message" role="alert">
+          {error}
+        </div>
+      )}
+    </>
+  )
+}
+
 export const hasReparsed = (f) =>
   f.latest_reparse_file_meta &&
   f.latest_reparse_file_meta.finished_at &&
@@ -54,12 +105,7 @@ export const getErrorReportStatus = (file) => {
     const errorFileName = `${file.year}-${file.quarter}-${programPrefix}${file.section} Error Report`
     if (file.hasError) {
       return (
-        <button
-          className="section-download"
-          onClick={() => downloadErrorReport(file, errorFileName)}
-        >
-          {errorFileName}.xlsx
-        </button>
+        <ErrorReportDownloadButton file={file} reportName={errorFileName} />
       )
     } else {
       return 'No Errors'
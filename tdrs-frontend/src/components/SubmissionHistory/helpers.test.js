@@ -11,6 +11,8 @@ import { getParseErrors } from '../../actions/createXLSReport'
 import {
   SubmissionSummaryStatusIcon,
   downloadErrorReport,
+  ERROR_REPORT_DEFAULT_RETRY_AFTER_MS,
+  ERROR_REPORT_DOWNLOAD_FAILED_MESSAGE,
   fileStatusOrDefault,
   formatProgramType,
   getErrorReportStatus,
@@ -59,19 +61,84 @@ describe('downloadErrorReport', () => {
     expect(getParseErrors).toHaveBeenCalledWith(blob, 'My Error Report')
   })
 
-  it('logs error when API returns non-ok response', async () => {
-    const consoleSpy = jest.spyOn(console, 'log').mockImplementation(() => {})
+  it('polls while the error report is being generated', async () => {
+    const timeoutSpy = jest
+      .spyOn(global, 'setTimeout')
+      .mockImplementation((callback) => callback())
+    const blob = new Blob(['error-data'])
+    get
+      .mockResolvedValueOnce({ data: null, ok: true, error: null, status: 202 })
+      .mockResolvedValueOnce({ data: blob, ok: true, error: null, status: 200 })
+
+    await downloadErrorReport({ id: 5 }, 'My Error Report')
+
+    expect(get).toHaveBeenCalledTimes(2)
+    expect(timeoutSpy).toHaveBeenCalledWith(
+      expect.any(Function),
+      ERROR_REPORT_DEFAULT_RETRY_AFTER_MS
+    )
+    expect(getParseErrors).toHaveBeenCalledTimes(1)
+    expect(getParseErrors).toHaveBeenCalledWith(blob, 'My Error Report')
+    timeoutSpy.mockRestore()
+  })
+
+  it('waits as long as the Retry-After header asks', async () => {
+    const timeoutSpy = jest
+      .spyOn(global, 'setTimeout')
+      .mockImplementation((callback) => callback())
+    get
+      .mockResolvedValueOnce({
+        data: null,
+        ok: true,
+        error: null,
+        status: 202,
+        headers: { get: () => '2' },
+      })
+      .mockResolvedValueOnce({
+        data: new Blob(),
+        ok: true,
+        error: null,
+        status: 200,
+      })
+
+    await downloadErrorReport({ id: 5 }, 'My Error Report')
+
+    expect(timeoutSpy).toHaveBeenCalledWith(expect.any(Function), 2000)
+    timeoutSpy.mockRestore()
+  })
+
+  it('times out when the error report is never generated', async () => {
+    const timeoutSpy = jest
+      .spyOn(global, 'setTimeout')
+      .mockImplementation((callback) => callback())
+    get.mockResolvedValue({
+      data: null,
+      ok: true,
+      error: null,
+      status: 202,
+      headers: { get: () => '60' },
+    })
+
+    await expect(
+      downloadErrorReport({ id: 5 }, 'My Error Report')
+    ).rejects.toThrow('Timed out waiting for the error report.')
+
+    expect(get).toHaveBeenCalledTimes(6)
+    expect(getParseErrors).not.toHaveBeenCalled()
+    timeoutSpy.mockRestore()
+  })
+
+  it('throws when API returns non-ok response', async () => {
     get.mockResolvedValue({
       data: null,
       ok: false,
       error: new Error('Server error'),
     })
 
-    await downloadErrorReport({ id: 5 }, 'Report')
-
-    expect(consoleSpy).toHaveBeenCalledWith(expect.any(Error))
+    await expect(downloadErrorReport({ id: 5 }, 'Report')).rejects.toThrow(
+      'Server error'
+    )
     expect(getParseErrors).not.toHaveBeenCalled()
-    consoleSpy.mockRestore()
   })
 })
 
@@ -132,6 +199,34 @@ describe('getErrorReportStatus', () => {
     fireEvent.click(screen.getByRole('button'))
     expect(get).toHaveBeenCalled()
   })
+
+  it('shows an error when the error report cannot be downloaded', async () => {
+    const consoleSpy = jest.spyOn(console, 'log').mockImplementation(() => {})
+    get.mockResolvedValue({
+      data: null,
+      ok: false,
+      error: new Error('HTTP 500'),
+      status: 500,
+    })
+    const file = {
+      summary: { status: 'Rejected' },
+      program_type: 'SSP',
+      year: '2025',
+      quarter: 'Q2',
+      section: 'Closed Case Data',
+      hasError: true,
+      id: 42,
+    }
+
+    render(getErrorReportStatus(file))
+    fireEvent.click(screen.getByRole('button'))
+
+    expect(await screen.findByRole('alert')).toHaveTextContent(
+      ERROR_REPORT_DOWNLOAD_FAILED_MESSAGE
+    )
+    expect(consoleSpy).toHaveBeenCalledWith(expect.any(Error))
+    consoleSpy.mockRestore()
+  })
 })
 
 describe('SubmissionSummaryStatusIcon', () => {
@@ -34,6 +34,7 @@ async function handleResponse(response, responseType) {
       error: response.ok ? null : new Error(`HTTP ${response.status}`),
       status: response.status,
       ok: response.ok,
+      headers: response.headers,
     }
   }
 
@@ -71,10 +71,11 @@ describe('fetch-instance', () => {
 
     it('handles blob response type', async () => {
       const blob = new Blob(['file-data'])
+      const headers = { get: () => 'application/octet-stream' }
       global.fetch.mockResolvedValue({
         ok: true,
         status: 200,
-        headers: { get: () => 'application/octet-stream' },
+        headers,
         blob: () => Promise.resolve(blob),
       })
 
@@ -83,6 +84,7 @@ describe('fetch-instance', () => {
       expect(result.data).toBe(blob)
       expect(result.ok).toBe(true)
       expect(result.error).toBeNull()
+      expect(result.headers).toBe(headers)
     })
 
     it('handles non-JSON text responses', async () => {